@@ -0,0 +1,132 @@
+"""
+Requests per second through the previous authentication stack, JWTMiddleware
+dispatched by BaseHTTPMiddleware, against the pure ASGI AuthMiddleware, for
+a small JSON response and a streamed one. No server nor database is needed,
+requests are sent in process through the ASGI interface.
+
+Usage (from src):
+    python -m benchmarks.auth_middleware_benchmark
+"""
+import asyncio
+import time
+from typing import Callable
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+import httpx
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from middleware.auth_middleware import AuthMiddleware
+from models.errors.errors import AuthenticationError
+from service.jwt_service import JWTService
+
+REQUESTS = 3_000
+CONCURRENCY = 50
+
+
+class PreviousJWTMiddleware:
+    """JWTMiddleware as it was before the pure ASGI middleware"""
+
+    def __init__(self, jwt_service: JWTService | None = None, security: HTTPBearer | None = None):
+        self.jwt_service = jwt_service or JWTService()
+        self.security = security or HTTPBearer()
+        self.__public_routes = [
+            "/health",
+            "/docs",
+            "/redoc",
+            "/openapi.json",
+            "/favicon.ico",
+        ]
+
+    async def __call__(self, request: Request, call_next):
+        if request.method == "OPTIONS" or request.method == "REDIRECT":
+            return await call_next(request)
+
+        if request.url.path == "/":
+            return await call_next(request)
+
+        referer: str = request.headers.get("referer", "")
+        if referer and (referer.startswith("http://127.0.0.1:") or referer.startswith("http://localhost:")) and referer.endswith("docs"):
+            return await call_next(request)
+
+        for route in self.__public_routes:
+            if request.url.path.startswith(route):
+                return await call_next(request)
+
+        credentials: HTTPAuthorizationCredentials | None = await self.security(request)
+
+        if not credentials:
+            raise AuthenticationError()
+
+        token = credentials.credentials
+        payload = self.jwt_service.verify(token)
+
+        request.state.user = payload
+        request.state.auth_header = f"Bearer {token}"
+
+        return await call_next(request)
+
+
+def build_app(add_auth: Callable[[FastAPI], None]) -> FastAPI:
+    app = FastAPI()
+    add_auth(app)
+
+    @app.get("/groups/{group_id}")
+    async def get_group(group_id: str, request: Request) -> dict:
+        return {"data": {"id": group_id, "user": request.state.user["username"]}}
+
+    @app.get("/polls/{poll_id}/stream")
+    async def stream(poll_id: str) -> StreamingResponse:
+        async def events():
+            for i in range(10):
+                yield f"event: votes\ndata: {{\"id\": \"{poll_id}\", \"votes\": {{\"1\": {i}}}}}\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+async def requests_per_second(app: FastAPI, path: str, token: str) -> float:
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {token}"}
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", headers=headers) as client:
+        async def request() -> None:
+            async with semaphore:
+                response = await client.get(path)
+                assert response.status_code == 200
+
+        await request()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(request() for _ in range(REQUESTS)))
+
+        return REQUESTS / (time.perf_counter() - started)
+
+
+async def main() -> None:
+    token = JWTService().sign({
+        "type": "user", "userId": 1, "email": "test@gmail.com", "username": "test"
+    })
+
+    stacks = {
+        "BaseHTTPMiddleware + JWTMiddleware": build_app(
+            lambda app: app.add_middleware(BaseHTTPMiddleware, dispatch=PreviousJWTMiddleware())),
+        "AuthMiddleware (pure ASGI)": build_app(
+            lambda app: app.add_middleware(AuthMiddleware)),
+    }
+
+    print(f"{'stack':<36} | {'json req/s':>10} | {'stream req/s':>12}")
+    print("-" * 64)
+
+    for name, app in stacks.items():
+        json_rate = await requests_per_second(app, "/groups/123", token)
+        stream_rate = await requests_per_second(app, "/polls/123/stream", token)
+
+        print(f"{name:<36} | {json_rate:>10.0f} | {stream_rate:>12.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+"""
+Availability engine against the list scans it replaces.
+
+Usage (from src):
+    python -m benchmarks.availability_benchmark
+"""
+import random
+import timeit
+
+from models.routine import Day, Schedule
+from utils.availability import WeeklyAvailability
+
+GROUP_SIZES = [10, 100, 1_000, 10_000]
+ROUTINES_PER_MEMBER = 5
+QUERIES = 100
+
+
+def random_schedules(rng: random.Random, count: int) -> list[Schedule]:
+    schedules: list[Schedule] = []
+
+    for _ in range(count):
+        start = rng.randrange(0, 22)
+        schedules.append(Schedule(
+            day=rng.choice(list(Day)), start_hour=start,
+            end_hour=rng.randrange(start + 1, 23)
+        ))
+
+    return schedules
+
+
+def blocking_members_loop(members_schedules: dict[str, list[Schedule]], routine: Schedule) -> list[str]:
+    """The overlap test of check_member_group_routines_collision, by member"""
+    return [
+        member for member, schedules in members_schedules.items()
+        if any(
+            s.day == routine.day and
+            s.end_hour > routine.start_hour and
+            s.start_hour < routine.end_hour
+            for s in schedules
+        )
+    ]
+
+
+def lacking_members_loop(members_schedules: dict[str, list[Schedule]], routine: Schedule) -> list[str]:
+    """The containment test of check_member_individual_routines_collision, by member"""
+    return [
+        member for member, schedules in members_schedules.items()
+        if not any(
+            s.day == routine.day and
+            s.start_hour <= routine.start_hour and
+            s.end_hour >= routine.end_hour
+            for s in schedules
+        )
+    ]
+
+
+def best_of(stmt, number: int) -> float:
+    """Best time of one call, in milliseconds"""
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number * 1000
+
+
+def main() -> None:
+    rng = random.Random(7)
+    routines = random_schedules(rng, QUERIES)
+
+    print(f"{'members':>8} | {'build ms':>9} | {'blocking loop ms':>16} | {'blocking masks ms':>17} "
+          f"| {'lacking loop ms':>15} | {'lacking masks ms':>16}")
+    print("-" * 98)
+
+    for size in GROUP_SIZES:
+        members_schedules = {
+            f"member-{i}": random_schedules(rng, ROUTINES_PER_MEMBER)
+            for i in range(size)
+        }
+        availability = WeeklyAvailability.from_schedules(members_schedules)
+
+        for routine in routines[:10]:
+            assert availability.blocking_members(routine) == blocking_members_loop(
+                members_schedules, routine)
+
+        number = max(1, 10_000 // size)
+
+        build = best_of(
+            lambda: WeeklyAvailability.from_schedules(members_schedules), number)
+        blocking_loop = best_of(
+            lambda: [blocking_members_loop(members_schedules, r) for r in routines], number) / QUERIES
+        blocking_masks = best_of(
+            lambda: [availability.blocking_members(r) for r in routines], number) / QUERIES
+        lacking_loop = best_of(
+            lambda: [lacking_members_loop(members_schedules, r) for r in routines], number) / QUERIES
+        lacking_masks = best_of(
+            lambda: [availability.lacking_members(r) for r in routines], number) / QUERIES
+
+        print(f"{size:>8} | {build:>9.3f} | {blocking_loop:>16.4f} | {blocking_masks:>17.4f} "
+              f"| {lacking_loop:>15.4f} | {lacking_masks:>16.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Busy slots of every member of a group: the previous join, which returns each
+routine once per member of its group, against the user_busy_slots
+projection. It needs a database with migrations applied, e.g. the test one:
+
+Usage (from src):
+    ENV_PATH=../.env.test python -m benchmarks.busy_slots_benchmark
+"""
+import os
+import time
+from typing import Callable
+
+import dotenv
+
+dotenv.load_dotenv(os.path.abspath(
+    os.getenv("ENV_PATH", "../.env")), override=True)
+
+from sqlalchemy import bindparam, text  # noqa: E402
+
+from database.database import engine  # noqa: E402
+from models.group import GroupDTO  # noqa: E402
+from models.routine import Day, RoutineDTO, Schedule  # noqa: E402
+from repository.group_repository import GroupRepository  # noqa: E402
+
+GROUP_SIZES = [10, 100, 500, 2_000]
+ROUTINES_PER_GROUP = 20
+QUERIES = 20
+
+
+def previous_user_groups_routines_schedules(users: list[str]) -> list[Schedule]:
+    """get_user_groups_routines_schedules as it was before the projection"""
+    query = text(
+        """
+        SELECT day, start_hour, end_hour
+        FROM group_members gm
+        JOIN group_routines gr ON gm.group_id = gr.group_id
+        WHERE creator_id IN :users
+        """
+    ).bindparams(bindparam("users", expanding=True))
+
+    with engine.begin() as connection:
+        result = connection.execute(query, {"users": users}).fetchall()
+
+    return [Schedule(**row._mapping) for row in result]
+
+
+def seed(repository: GroupRepository, size: int) -> tuple[str, list[str]]:
+    members = [f"{size:04d}{i:04d}-0279-4634-9bcd-c8ea1d2856af" for i in range(size)]
+
+    group = repository.save_group(GroupDTO(
+        name="Benchmark", description="Busy slots benchmark", owner_id=members[0]))
+    assert group
+
+    with engine.begin() as connection:
+        connection.execute(
+            text("INSERT INTO group_members (group_id, user_id) VALUES (:group_id, :user_id)"),
+            [{"group_id": group.id, "user_id": member} for member in members[1:]]
+        )
+
+    days = list(Day)
+    for i in range(ROUTINES_PER_GROUP):
+        repository.save_routine(group.id, RoutineDTO(
+            name="Routine", description="Benchmark routine", day=days[i % 7],
+            start_hour=i % 20, end_hour=i % 20 + 2, creator_id=members[i % size]
+        ))
+
+    return group.id, members
+
+
+def milliseconds(operation: Callable[[], list[Schedule]]) -> tuple[float, int]:
+    rows = len(operation())
+
+    started = time.perf_counter()
+    for _ in range(QUERIES):
+        operation()
+
+    return (time.perf_counter() - started) / QUERIES * 1000, rows
+
+
+def main() -> None:
+    repository = GroupRepository()
+    group_ids: list[str] = []
+
+    try:
+        print(f"{'members':>8} | {'previous ms':>11} | {'previous rows':>13} | {'projection ms':>13} | {'projection rows':>15}")
+        print("-" * 73)
+
+        for size in GROUP_SIZES:
+            group_id, members = seed(repository, size)
+            group_ids.append(group_id)
+
+            previous, previous_rows = milliseconds(
+                lambda: previous_user_groups_routines_schedules(members))
+            projection, projection_rows = milliseconds(
+                lambda: repository.get_user_groups_routines_schedules(members))
+
+            print(f"{size:>8} | {previous:>11.2f} | {previous_rows:>13} | {projection:>13.2f} | {projection_rows:>15}")
+
+    finally:
+        with engine.begin() as connection:
+            for table in ["group_routines", "group_members", "groups"]:
+                column = "id" if table == "groups" else "group_id"
+                connection.execute(
+                    text(f"DELETE FROM {table} WHERE {column} IN :ids").bindparams(
+                        bindparam("ids", expanding=True)),
+                    {"ids": group_ids}
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Time per response of large list payloads, 1000 events with their polls and
+5000 members, through FastAPI's default path (response model validation,
+jsonable_encoder and JSONResponse), the same path with ORJSONResponse as the
+default response class, and a ResponseEncoder writing the models straight
+to bytes. No server nor database is needed, requests are sent in process
+through the ASGI interface.
+
+Usage (from src):
+    python -m benchmarks.serialization_benchmark
+"""
+import asyncio
+from datetime import datetime, timedelta
+import time
+from typing import Any, Callable
+
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+import httpx
+
+from models.event import EventReturn
+from models.member import Member
+from models.poll import Option, PollReturn
+from models.response import CustomResponse, PageResponse
+from utils.serialization import ResponseEncoder
+
+EVENTS = 1_000
+MEMBERS = 5_000
+REQUESTS = 50
+
+GROUP_ID = "1cdba348-0279-4634-9bcd-c8ea1d2856af"
+
+
+def uuid(i: int) -> str:
+    return f"{i:08x}-0279-4634-9bcd-c8ea1d2856af"
+
+
+def build_events() -> list[EventReturn]:
+    created_at = datetime(2025, 1, 1, 12, 30)
+
+    return [
+        EventReturn(
+            id=uuid(i),
+            group_id=GROUP_ID,
+            creator_id=GROUP_ID,
+            name="Team Meeting",
+            description="Weekly team status meeting",
+            date=datetime(2025, 7, 1) + timedelta(days=i // 10),
+            start_hour=i % 10 + 8,
+            end_hour=i % 10 + 9,
+            poll=PollReturn(
+                id=uuid(i),
+                question="What topic should we focus on?",
+                options=[
+                    Option(id=1, text="Project Status", created_at=created_at),
+                    Option(id=2, text="Future Planning", created_at=created_at)
+                ],
+                votes={1: i % 7, 2: i % 5},
+                created_at=created_at
+            ),
+            created_at=created_at,
+            updated_at=created_at,
+        )
+        for i in range(EVENTS)
+    ]
+
+
+def build_members() -> list[Member]:
+    return [Member(user_id=uuid(i), created_at=datetime(2025, 1, 1, 12, 30)) for i in range(MEMBERS)]
+
+
+def build_app(encode: bool, **kwargs: Any) -> FastAPI:
+    app = FastAPI(**kwargs)
+    events = PageResponse(data=build_events(), next_cursor="cursor")
+    members = CustomResponse(data=build_members())
+
+    events_encoder: Callable[[Any], Any] = ResponseEncoder(
+        PageResponse[EventReturn]) if encode else lambda content: content
+    members_encoder: Callable[[Any], Any] = ResponseEncoder(
+        CustomResponse[list[Member]]) if encode else lambda content: content
+
+    @app.get("/events")
+    async def get_events() -> PageResponse[EventReturn]:
+        return events_encoder(events)
+
+    @app.get("/members")
+    async def get_members() -> CustomResponse[list[Member]]:
+        return members_encoder(members)
+
+    return app
+
+
+async def milliseconds_per_response(app: FastAPI, path: str) -> float:
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        (await client.get(path)).raise_for_status()
+
+        started = time.perf_counter()
+        for _ in range(REQUESTS):
+            (await client.get(path)).raise_for_status()
+
+        return (time.perf_counter() - started) * 1000 / REQUESTS
+
+
+async def main() -> None:
+    stacks = {
+        "response model + JSONResponse": build_app(False),
+        "response model + ORJSONResponse": build_app(False, default_response_class=ORJSONResponse),
+        "ResponseEncoder": build_app(True),
+    }
+
+    print(f"{'stack':<32} | {f'{EVENTS} events ms':>16} | {f'{MEMBERS} members ms':>17}")
+    print("-" * 71)
+
+    for name, app in stacks.items():
+        events_ms = await milliseconds_per_response(app, "/events")
+        members_ms = await milliseconds_per_response(app, "/members")
+
+        print(f"{name:<32} | {events_ms:>16.2f} | {members_ms:>17.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+"""
+Votes per second of the previous put_vote sequence against the single
+statement vote replacement. It needs a database with migrations applied,
+e.g. the test one:
+
+Usage (from src):
+    ENV_PATH=../.env.test python -m benchmarks.vote_benchmark
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import os
+import time
+from typing import Callable
+
+import dotenv
+
+dotenv.load_dotenv(os.path.abspath(
+    os.getenv("ENV_PATH", "../.env")), override=True)
+
+from sqlalchemy import text  # noqa: E402
+
+from database.database import engine  # noqa: E402
+from database.unit_of_work import UnitOfWork  # noqa: E402
+from models.event import EventDTO  # noqa: E402
+from models.group import GroupDTO  # noqa: E402
+from models.poll import Option, PollDTO, PollReturn, VoteDTO  # noqa: E402
+from repository.group_repository import GroupRepository  # noqa: E402
+from service.group_service import GroupService  # noqa: E402
+from service.vote_buffer import VoteBuffer  # noqa: E402
+
+VOTERS = 200
+VOTES = 2_000
+OPTIONS = 4
+THREADS = 8
+
+
+def previous_put_vote(repository: GroupRepository, vote: VoteDTO) -> PollReturn:
+    """put_vote as it was before replace_poll_vote"""
+    poll = repository.get_poll(vote.poll_id)
+    assert poll
+
+    options = repository.get_poll_options(vote.poll_id)
+    assert vote.option_id in [option.id for option in options]
+
+    repository.delete_poll_vote(vote.poll_id, vote.user_id)
+    repository.save_poll_vote(vote)
+
+    poll.votes = repository.get_poll_votes(vote.poll_id)
+
+    return poll
+
+
+def in_unit_of_work(put_vote: Callable[[VoteDTO], PollReturn]) -> Callable[[VoteDTO], PollReturn]:
+    def run(vote: VoteDTO) -> PollReturn:
+        with UnitOfWork():
+            return put_vote(vote)
+
+    return run
+
+
+def seed(repository: GroupRepository) -> tuple[str, str, str]:
+    owner = "00000000-0279-4634-9bcd-c8ea1d2856af"
+    group = repository.save_group(GroupDTO(
+        name="Benchmark", description="Vote benchmark", owner_id=owner))
+    assert group
+
+    event = repository.save_event(group.id, EventDTO(
+        name="Benchmark", description="Vote benchmark",
+        date=datetime.now() + timedelta(days=1), start_hour=10, end_hour=11, creator_id=owner
+    ))
+    assert event
+
+    poll_id = repository.save_poll(group.id, owner, event.id, PollDTO(
+        question="Benchmark",
+        options=[Option(id=i, text=f"Option {i}")
+                 for i in range(1, OPTIONS + 1)]
+    ))
+
+    return group.id, event.id, poll_id
+
+
+def votes_per_second(put_vote: Callable[[VoteDTO], PollReturn], poll_id: str, threads: int) -> float:
+    votes = [
+        VoteDTO(user_id=f"{i % VOTERS:08d}-0279-4634-9bcd-c8ea1d2856af",
+                option_id=i % OPTIONS + 1, poll_id=poll_id)
+        for i in range(VOTES)
+    ]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for _ in executor.map(put_vote, votes):
+            pass
+
+    return VOTES / (time.perf_counter() - started)
+
+
+def main() -> None:
+    repository = GroupRepository()
+    service = GroupService(repository=repository)
+    buffer = VoteBuffer(repository)
+    group_id, event_id, poll_id = seed(repository)
+
+    candidates: dict[str, Callable[[VoteDTO], PollReturn]] = {
+        "previous, a transaction per query": lambda vote: previous_put_vote(repository, vote),
+        "previous, one unit of work": in_unit_of_work(lambda vote: previous_put_vote(repository, vote)),
+        "replace_poll_vote, one unit of work": in_unit_of_work(service.put_vote),
+        "VoteBuffer, batched every 100ms": buffer.put,
+    }
+
+    try:
+        print(f"{'':<38} | {'1 thread votes/s':>16} | {f'{THREADS} threads votes/s':>17}")
+        print("-" * 78)
+
+        for name, put_vote in candidates.items():
+            serial = votes_per_second(put_vote, poll_id, 1)
+            concurrent = votes_per_second(put_vote, poll_id, THREADS)
+            print(f"{name:<38} | {serial:>16.0f} | {concurrent:>17.0f}")
+
+        buffer.close()
+
+        # Concurrent previous put_vote calls may leave several votes per user
+        tallies = repository.get_poll_votes(poll_id)
+        print(f"\nVotes counted at the end: {sum(tallies.values())} for {VOTERS} voters")
+
+    finally:
+        with engine.begin() as connection:
+            connection.execute(
+                text("DELETE FROM group_events WHERE id = :id"), {"id": event_id})
+            connection.execute(
+                text("DELETE FROM groups WHERE id = :id"), {"id": group_id})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import logging
+import os
+from os import getenv
+
+import dotenv
+
+
+def migrate(args: argparse.Namespace) -> None:
+    from database.migrations import apply_migrations
+
+    applied = apply_migrations()
+
+    if not applied:
+        print("Database schema is up to date")
+
+    for migration in applied:
+        print(f"Applied migration {migration.version} {migration.name}")
+
+
+def reconcile_tallies(args: argparse.Namespace) -> None:
+    from database.poll_tallies import reconcile_poll_tallies
+
+    fixed = reconcile_poll_tallies()
+
+    print(f"Reconciled {fixed} poll option tallies")
+
+
+def rebuild_busy_slots(args: argparse.Namespace) -> None:
+    from database.busy_slots import rebuild_user_busy_slots
+
+    slots = rebuild_user_busy_slots()
+
+    print(f"Rebuilt {slots} user busy slots")
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=logging.INFO, format='%(name)s - %(levelname)s - %(message)s - %(asctime)s')
+
+    env_path: str = getenv("ENV_PATH", "../.env")
+    dotenv.load_dotenv(os.path.abspath(env_path), override=True)
+
+    parser = argparse.ArgumentParser(description="Group service commands")
+    subparsers = parser.add_subparsers(required=True)
+
+    migrate_parser = subparsers.add_parser(
+        "migrate", help="Apply pending database migrations")
+    migrate_parser.set_defaults(command=migrate)
+
+    reconcile_parser = subparsers.add_parser(
+        "reconcile-tallies", help="Recompute poll vote tallies from poll_votes")
+    reconcile_parser.set_defaults(command=reconcile_tallies)
+
+    busy_slots_parser = subparsers.add_parser(
+        "rebuild-busy-slots", help="Rebuild the user busy slots from group routines and members")
+    busy_slots_parser.set_defaults(command=rebuild_busy_slots)
+
+    args = parser.parse_args()
+    args.command(args)
+
+
+if __name__ == "__main__":
+    main()
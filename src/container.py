@@ -0,0 +1,119 @@
+from os import getenv
+from typing import Optional
+
+from fastapi import Depends
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import HTTPConnection
+
+from controller.group_controller import GroupController
+from controller.health_controller import HealthController
+from repository.cached_group_repository import GroupCache, build_group_cache, default_async_group_repository, default_dashboard_cache, default_group_repository
+from service.async_group_service import AsyncGroupService, IAsyncGroupService
+from service.group_service import GroupService, IGroupService
+from service.health_service import HealthService
+from service.progress_service import AsyncProgressService, FreeScheduleCache, ProgressClients, ProgressClientSettings, ProgressService, build_progress_breaker, build_progress_executor
+from service.vote_buffer import VoteBuffer, is_vote_buffer_enabled
+from utils.metrics import metrics
+
+
+class Container:
+    """
+    Application wide object graph, built once in the lifespan instead of on
+    every request, with the settings read from the environment then.
+
+    It builds the long lived objects of the group service, the Progress
+    HTTP clients, executor, breaker and schedules cache, the group cache and
+    the vote buffer, passes them down to the controllers, services and
+    repositories it builds, and closes them on shutdown.
+
+    The database engines, the poll broadcast and the verified tokens cache
+    stay module globals: units of work, migrations and the CLI bind to the
+    engines, and the broadcast and the authentication middleware are used
+    before the lifespan runs.
+    """
+
+    def __init__(self, group_service: Optional[IGroupService | IAsyncGroupService] = None):
+        self.progress_settings = ProgressClientSettings.from_env()
+        self.progress_clients = ProgressClients()
+        self.progress_executor = build_progress_executor()
+        self.progress_breaker = build_progress_breaker()
+        self.free_schedule_cache = FreeScheduleCache.from_env()
+
+        self.group_cache = GroupCache(build_group_cache())
+        self.vote_buffer = VoteBuffer.from_env(default_group_repository(self.group_cache)) \
+            if is_vote_buffer_enabled() else None
+
+        self.group_controller = GroupController(
+            group_service or self.build_group_service())
+        self.health_controller = HealthController(HealthService())
+
+        metrics.register("progress_circuit_breaker", self.progress_breaker.stats)
+        metrics.register("free_schedule_cache", self.free_schedule_cache.stats)
+        metrics.register("group_cache", self.group_cache.cache.stats)
+        if self.vote_buffer is not None:
+            metrics.register("vote_buffer", self.vote_buffer.stats)
+
+    def build_group_service(self) -> IGroupService | IAsyncGroupService:
+        """Build the group service selected by GROUP_SERVICE_MODE ("sync" or "async")"""
+        dashboard_cache = default_dashboard_cache(self.group_cache)
+
+        match getenv("GROUP_SERVICE_MODE", "sync").lower():
+            case "async":
+                return AsyncGroupService(
+                    default_async_group_repository(self.group_cache),
+                    AsyncProgressService(
+                        settings=self.progress_settings,
+                        schedules=self.free_schedule_cache,
+                        breaker=self.progress_breaker,
+                        clients=self.progress_clients
+                    ),
+                    self.vote_buffer,
+                    dashboard_cache
+                )
+            case "sync":
+                return GroupService(
+                    default_group_repository(self.group_cache),
+                    ProgressService(
+                        self.progress_clients.sync_client(self.progress_settings),
+                        self.progress_settings,
+                        self.free_schedule_cache,
+                        self.progress_breaker,
+                        self.progress_executor
+                    ),
+                    self.vote_buffer,
+                    dashboard_cache
+                )
+            case mode:
+                raise ValueError(f"Unknown GROUP_SERVICE_MODE '{mode}'")
+
+    async def start(self) -> None:
+        self.progress_clients.start(self.progress_settings)
+
+    async def close(self) -> None:
+        await self.progress_clients.aclose()
+
+        if self.vote_buffer is not None:
+            await run_in_threadpool(self.vote_buffer.close)
+
+        self.progress_executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def get_container(connection: HTTPConnection) -> Container:
+    """
+    The container of the application, built on first use by apps that are
+    not started through their lifespan, like the ones of the tests
+    """
+    state = connection.app.state
+
+    if getattr(state, "container", None) is None:
+        state.container = Container()
+
+    return state.container
+
+
+async def group_controller(container: Container = Depends(get_container)) -> GroupController:
+    return container.group_controller
+
+
+async def health_controller(container: Container = Depends(get_container)) -> HealthController:
+    return container.health_controller
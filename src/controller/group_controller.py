@@ -1,88 +1,158 @@
-from typing import Optional
+from datetime import date
+from typing import Any, Callable, Optional
 
+from starlette.concurrency import run_in_threadpool
+
+from database.unit_of_work import AsyncUnitOfWork, UnitOfWork
+from models.availability import SlotSuggestion
+from models.dashboard import Dashboard
 from models.errors.errors import ValidationError
 from models.event import EventDTO, EventReturn
 from models.group import GroupDTO, GroupReturn
 from models.member import Member
 from models.poll import PollReturn, VoteDTO
-from models.response import CustomResponse
+from models.response import CustomResponse, PageResponse
 from models.routine import PostRoutineParams, RoutineDTO, RoutineReturn
+from service.async_group_service import IAsyncGroupService
 from service.group_service import GroupService, IGroupService
+from service.poll_events import PollWatch, broadcast, poll_channel
+from utils.include import parse_include, split_values
+
+EVENT_INCLUDES = {"poll"}
+GROUP_INCLUDES = {"routines", "members", "member_count"}
+MAX_GROUP_IDS = 100
 
 
 class GroupController:
-    def __init__(self, service: Optional[IGroupService] = None):
+    def __init__(self, service: Optional[IGroupService | IAsyncGroupService] = None):
         self.service = service or GroupService()
 
-    def post_group(self, group: GroupDTO) -> CustomResponse[GroupReturn]:
-        _group = self.service.save_group(group)
+    async def _call(self, method: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a service method inside one unit of work: async service methods are
+        awaited directly and blocking ones are pushed to the threadpool
+        """
+        if isinstance(self.service, IAsyncGroupService):
+            async with AsyncUnitOfWork():
+                return await method(*args)
+
+        return await run_in_threadpool(self._call_in_unit_of_work, method, *args)
+
+    @staticmethod
+    def _call_in_unit_of_work(method: Callable[..., Any], *args: Any) -> Any:
+        with UnitOfWork():
+            return method(*args)
+
+    async def post_group(self, group: GroupDTO) -> CustomResponse[GroupReturn]:
+        _group = await self._call(self.service.save_group, group)
 
         return CustomResponse(data=_group)
 
-    def get_group(self, group_id: str) -> CustomResponse[GroupReturn]:
-        group = self.service.get_group(group_id)
+    async def get_group(self, group_id: str) -> CustomResponse[GroupReturn]:
+        group = await self._call(self.service.get_group, group_id)
 
         return CustomResponse(data=group)
 
-    def get_user_groups(self, user_id: str) -> CustomResponse[list[GroupReturn]]:
-        groups = self.service.get_user_groups(user_id)
+    async def get_groups(self, ids: str, include: Optional[str]) -> CustomResponse[list[GroupReturn]]:
+        """Get many groups by id"""
+        group_ids = split_values(ids)
+
+        if not group_ids or len(group_ids) > MAX_GROUP_IDS:
+            raise ValidationError(
+                title="Invalid ids",
+                detail=f"Between 1 and {MAX_GROUP_IDS} group ids are required"
+            )
+
+        groups = await self._call(self.service.get_groups, group_ids, parse_include(include, GROUP_INCLUDES))
+
+        return CustomResponse(data=groups)
+
+    async def get_user_groups(self, user_id: str, include: Optional[str] = None) -> CustomResponse[list[GroupReturn]]:
+        groups = await self._call(self.service.get_user_groups, user_id, parse_include(include, GROUP_INCLUDES))
 
         return CustomResponse(data=groups)
 
-    def post_member(self, group_id: str, user_id: str) -> CustomResponse[list[Member]]:
-        members = self.service.save_member(group_id, user_id)
+    async def get_user_dashboard(self, user_id: str, events_limit: int) -> CustomResponse[Dashboard]:
+        """Get the groups, upcoming events and open polls of a user"""
+        dashboard = await self._call(self.service.get_dashboard, user_id, events_limit)
+
+        return CustomResponse(data=dashboard)
+
+    async def post_member(self, group_id: str, user_id: str) -> CustomResponse[list[Member]]:
+        members = await self._call(self.service.save_member, group_id, user_id)
 
         return CustomResponse(data=members)
 
-    def get_group_members(self, group_id: str) -> CustomResponse[list[Member]]:
-        members = self.service.get_group_members(group_id)
+    async def get_group_members(self, group_id: str) -> CustomResponse[list[Member]]:
+        members = await self._call(self.service.get_group_members, group_id)
 
         return CustomResponse(data=members)
 
-    def post_group_routine(self, group_id: str, routine: RoutineDTO, params: PostRoutineParams) -> CustomResponse[list[RoutineReturn]]:
-        group = self.service.save_routine(group_id, routine, params)
+    async def post_group_routine(self, group_id: str, routine: RoutineDTO, params: PostRoutineParams) -> CustomResponse[list[RoutineReturn]]:
+        group = await self._call(self.service.save_routine, group_id, routine, params)
 
         return CustomResponse(data=group)
 
-    def get_group_routines(self, group_id: str) -> CustomResponse[list[RoutineReturn]]:
-        routines = self.service.get_routines(group_id)
+    async def get_group_routines(self, group_id: str) -> CustomResponse[list[RoutineReturn]]:
+        routines = await self._call(self.service.get_routines, group_id)
 
         return CustomResponse(data=routines)
 
-    def post_group_event(self, group_id: str, event: EventDTO) -> CustomResponse[EventReturn]:
+    async def get_availability_suggestions(self, group_id: str, duration: int, limit: int, auth_header: str) -> CustomResponse[list[SlotSuggestion]]:
+        """Get the best weekly slots for a new group routine"""
+        suggestions = await self._call(self.service.get_availability_suggestions, group_id, duration, limit, auth_header)
+
+        return CustomResponse(data=suggestions)
+
+    async def post_group_event(self, group_id: str, event: EventDTO) -> CustomResponse[EventReturn]:
         """Create a new event for a group"""
-        event_return = self.service.save_event(group_id, event)
+        event_return = await self._call(self.service.save_event, group_id, event)
 
         return CustomResponse(data=event_return)
 
-    def patch_group_event(self, group_id: str, event_id: str, event: EventDTO) -> CustomResponse[EventReturn]:
+    async def patch_group_event(self, group_id: str, event_id: str, event: EventDTO) -> CustomResponse[EventReturn]:
         """Update an existing event in a group"""
-        updated_event = self.service.update_event(group_id, event_id, event)
+        updated_event = await self._call(self.service.update_event, group_id, event_id, event)
 
         return CustomResponse(data=updated_event)
 
-    def get_group_events(self, group_id: str) -> CustomResponse[list[EventReturn]]:
-        """Get all events for a group"""
-        events = self.service.get_events(group_id)
+    async def get_group_events(self, group_id: str, date_from: Optional[date], date_to: Optional[date], cursor: Optional[str], limit: int, include: Optional[str] = None) -> PageResponse[EventReturn]:
+        """Get a page of the events of a group"""
+        include_poll = "poll" in parse_include(include, EVENT_INCLUDES)
 
-        return CustomResponse(data=events)
+        page = await self._call(self.service.get_events, group_id, date_from, date_to, cursor, limit, include_poll)
 
-    def get_group_event(self, group_id: str, event_id: str) -> CustomResponse[EventReturn]:
+        return PageResponse(data=page.items, next_cursor=page.next_cursor)
+
+    async def get_group_event(self, group_id: str, event_id: str) -> CustomResponse[EventReturn]:
         """Get a specific event from a group"""
-        event = self.service.get_event(group_id, event_id)
+        event = await self._call(self.service.get_event, group_id, event_id)
 
         return CustomResponse(data=event)
 
-    def delete_group_event(self, group_id: str, event_id: str) -> CustomResponse[None]:
+    async def delete_group_event(self, group_id: str, event_id: str) -> CustomResponse[None]:
         """Delete an event from a group"""
-        self.service.delete_event(group_id, event_id)
+        await self._call(self.service.delete_event, group_id, event_id)
 
         return CustomResponse(data=None)
 
-    def put_vote(self, vote: VoteDTO, poll_id: str) -> CustomResponse[PollReturn]:
+    async def put_vote(self, vote: VoteDTO, poll_id: str) -> CustomResponse[PollReturn]:
         """Submit a vote for a poll"""
         vote.poll_id = poll_id
 
-        poll = self.service.put_vote(vote)
+        poll = await self._call(self.service.put_vote, vote)
 
         return CustomResponse(data=poll)
+
+    async def watch_poll(self, poll_id: str) -> PollWatch:
+        """Watch the vote tallies of a poll"""
+        # Subscribed before reading the poll, so no vote falls in between
+        subscription = broadcast.subscribe(poll_channel(poll_id))
+
+        try:
+            poll = await self._call(self.service.get_poll, poll_id)
+        except BaseException:
+            subscription.close()
+            raise
+
+        return PollWatch(subscription, poll)
@@ -2,7 +2,7 @@ from typing import Optional
 from fastapi import status
 from fastapi.responses import JSONResponse
 
-from models.health import Health, HealthDB
+from models.health import Health, HealthDB, HealthMetrics
 from service.health_service import HealthService, IHealthService
 
 
@@ -15,3 +15,6 @@ class HealthController:
 
     def get_health_db(self) -> HealthDB:
         return self.service.get_health_db()
+
+    def get_metrics(self) -> HealthMetrics:
+        return self.service.get_metrics()
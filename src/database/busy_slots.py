@@ -0,0 +1,32 @@
+from typing import Optional
+
+from sqlalchemy import Engine, text
+
+from database.database import engine
+
+
+def rebuild_user_busy_slots(engine_: Optional[Engine] = None) -> int:
+    """
+    Rebuild the user_busy_slots projection from group_routines and
+    group_members, e.g. after they were changed with the triggers disabled.
+
+    Routine and membership changes are blocked while it runs (SHARE locks),
+    so the projection cannot miss one.
+
+    Returns:
+        int: The number of busy slots
+    """
+    with (engine_ or engine).begin() as connection:
+        connection.execute(
+            text("LOCK TABLE group_routines, group_members IN SHARE MODE"))
+        connection.execute(text("DELETE FROM user_busy_slots"))
+
+        return connection.execute(text(
+            """
+            INSERT INTO user_busy_slots (user_id, routine_id, group_id, day, start_hour, end_hour, week_hours)
+            SELECT gm.user_id, gr.id, gr.group_id, gr.day, gr.start_hour, gr.end_hour,
+                routine_week_hours(gr.day, gr.start_hour, gr.end_hour)
+            FROM group_routines gr
+            JOIN group_members gm ON gm.group_id = gr.group_id
+            """
+        )).rowcount
@@ -0,0 +1,120 @@
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import Connection, Engine, text
+
+from database.database import engine
+
+MIGRATIONS_PATH = Path(__file__).resolve().parent.parent / "sql" / "migrations"
+
+# Arbitrary key shared by every worker, so concurrent startups apply migrations once
+MIGRATIONS_LOCK_KEY = 7_351_862_014
+
+_MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    path: Path
+
+    def sql(self) -> str:
+        return self.path.read_text()
+
+
+def get_migrations(path: Optional[Path] = None) -> list[Migration]:
+    """
+    Get the migrations found in the given directory, ordered by version.
+    Files must be named <version>_<name>.sql, e.g. 0001_hot_path_indexes.sql
+    """
+    migrations: list[Migration] = []
+
+    for file in (path or MIGRATIONS_PATH).iterdir():
+        match = _MIGRATION_FILE.match(file.name)
+        if not match:
+            continue
+
+        migrations.append(
+            Migration(version=int(match.group(1)),
+                      name=match.group(2), path=file)
+        )
+
+    migrations.sort(key=lambda migration: migration.version)
+
+    versions = [migration.version for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicated migration versions in {path}")
+
+    return migrations
+
+
+def get_applied_versions(connection: Connection) -> set[int]:
+    query = text("SELECT version FROM schema_migrations")
+
+    return {row.version for row in connection.execute(query)}
+
+
+def apply_migrations(engine_: Optional[Engine] = None, path: Optional[Path] = None) -> list[Migration]:
+    """
+    Apply every pending migration, each one in its own transaction.
+
+    It is idempotent: applied versions are recorded in schema_migrations and
+    skipped on later runs. A session level advisory lock serializes
+    concurrent runs (e.g. several workers starting at once).
+
+    Returns:
+        list[Migration]: The migrations applied by this run
+    """
+    applied: list[Migration] = []
+
+    with (engine_ or engine).connect() as connection:
+        connection.execute(
+            text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATIONS_LOCK_KEY})
+        connection.commit()
+
+        try:
+            with connection.begin():
+                connection.execute(text(
+                    """
+                    CREATE TABLE IF NOT EXISTS schema_migrations (
+                        version INTEGER PRIMARY KEY,
+                        name VARCHAR(128) NOT NULL,
+                        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                    """
+                ))
+
+            with connection.begin():
+                applied_versions = get_applied_versions(connection)
+
+            for migration in get_migrations(path):
+                if migration.version in applied_versions:
+                    continue
+
+                logging.info(
+                    f"Applying migration {migration.version} {migration.name}")
+
+                with connection.begin():
+                    connection.exec_driver_sql(migration.sql())
+                    connection.execute(
+                        text(
+                            """
+                            INSERT INTO schema_migrations (version, name)
+                            VALUES (:version, :name)
+                            """
+                        ),
+                        {"version": migration.version, "name": migration.name}
+                    )
+
+                applied.append(migration)
+
+        finally:
+            connection.execute(
+                text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATIONS_LOCK_KEY})
+            connection.commit()
+
+    return applied
@@ -0,0 +1,36 @@
+from typing import Optional
+
+from sqlalchemy import Engine, text
+
+from database.database import engine
+
+
+def reconcile_poll_tallies(engine_: Optional[Engine] = None) -> int:
+    """
+    Recompute every poll_options.vote_count from poll_votes, e.g. after
+    votes were changed with the trigger disabled.
+
+    Vote changes are blocked while it runs (SHARE lock on poll_votes), so
+    the counted votes cannot change under it.
+
+    Returns:
+        int: The number of options whose tally was wrong
+    """
+    query = text(
+        """
+        UPDATE poll_options o
+        SET vote_count = t.vote_count
+        FROM (
+            SELECT o.poll_id, o.id, COUNT(v.user_id) AS vote_count
+            FROM poll_options o
+            LEFT JOIN poll_votes v ON v.poll_id = o.poll_id AND v.option_id = o.id::text
+            GROUP BY o.poll_id, o.id
+        ) t
+        WHERE o.poll_id = t.poll_id AND o.id = t.id AND o.vote_count <> t.vote_count
+        """
+    )
+
+    with (engine_ or engine).begin() as connection:
+        connection.execute(text("LOCK TABLE poll_votes IN SHARE MODE"))
+
+        return connection.execute(query).rowcount
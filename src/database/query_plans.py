@@ -0,0 +1,37 @@
+from typing import Any, Iterator
+
+from sqlalchemy import Connection
+
+
+def explain(connection: Connection, statement: str, parameters: Any = None, allow_seqscan: bool = False) -> dict[str, Any]:
+    """
+    Get the JSON plan of an already compiled DBAPI statement.
+
+    With allow_seqscan False the planner avoids sequential scans whenever an
+    index can serve the query, so a "Seq Scan" left in the plan means there is
+    no usable index for it, no matter how small the tables are.
+    """
+    with connection.begin_nested():
+        if not allow_seqscan:
+            connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+
+        result = connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {statement}", parameters or {}
+        ).scalar_one()
+
+    return result[0]["Plan"]
+
+
+def iter_plan_nodes(plan: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    yield plan
+
+    for child in plan.get("Plans", []):
+        yield from iter_plan_nodes(child)
+
+
+def sequential_scans(plan: dict[str, Any]) -> list[str]:
+    """Get the relations read with a sequential scan in the given plan"""
+    return [
+        node["Relation Name"] for node in iter_plan_nodes(plan)
+        if node["Node Type"] == "Seq Scan"
+    ]
@@ -0,0 +1,307 @@
+from contextvars import ContextVar, Token
+import logging
+from inspect import isawaitable
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import Connection, Engine, RootTransaction
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncTransaction
+
+from database.database import async_engine, engine
+
+# Callbacks of async units of work may return an awaitable, which is awaited
+AsyncCallback = Callable[[], Optional[Awaitable[None]]]
+
+_current_unit_of_work: ContextVar[Optional["UnitOfWork"]] = ContextVar(
+    "current_unit_of_work", default=None
+)
+
+_current_async_unit_of_work: ContextVar[Optional["AsyncUnitOfWork"]] = ContextVar(
+    "current_async_unit_of_work", default=None
+)
+
+
+class UnitOfWork:
+    """
+    Request scoped connection and transaction.
+
+    While a unit of work is active, every repository call bound to the same
+    engine runs on its connection, so a request checks out one pooled
+    connection and commits (or rolls back) once. The connection is only
+    checked out when the first query runs.
+
+    Callbacks registered with after_completion run once the transaction
+    ended, whether it was committed or rolled back, and those registered
+    with after_commit only once it was committed.
+
+    Usage:
+        with UnitOfWork():
+            service.save_event(group_id, event)
+    """
+
+    def __init__(self, engine_: Optional[Engine] = None):
+        self.engine = engine_ or engine
+        self._connection: Optional[Connection] = None
+        self._transaction: Optional[RootTransaction] = None
+        self._token: Optional[Token] = None
+        self._after_completion: list[Callable[[], None]] = []
+        self._after_commit: list[Callable[[], None]] = []
+
+    @staticmethod
+    def current(engine_: Engine) -> Optional["UnitOfWork"]:
+        """Get the active unit of work for the given engine, if any"""
+        unit_of_work = _current_unit_of_work.get()
+
+        if unit_of_work and unit_of_work.engine is engine_:
+            return unit_of_work
+
+        return None
+
+    @staticmethod
+    def active() -> Optional["UnitOfWork"]:
+        """Get the active unit of work, whatever its engine"""
+        return _current_unit_of_work.get()
+
+    def after_completion(self, callback: Callable[[], None]) -> None:
+        """Run the callback once the unit of work transaction ends"""
+        self._after_completion.append(callback)
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """Run the callback once the unit of work transaction is committed"""
+        self._after_commit.append(callback)
+
+    def connection(self) -> Connection:
+        """Get the unit of work connection, beginning the transaction on first use"""
+        if self._connection is None:
+            self._connection = self.engine.connect()
+            self._transaction = self._connection.begin()
+
+        return self._connection
+
+    def release(self) -> None:
+        """
+        Commit the work done so far and return the connection to the pool, so
+        no transaction is held open across a slow outbound call. The next
+        query checks out a connection again and begins a new transaction.
+        Callbacks still wait for the unit of work to end.
+        """
+        if self._connection is None or self._transaction is None:
+            return
+
+        try:
+            self._transaction.commit()
+        finally:
+            self._connection.close()
+            self._connection = None
+            self._transaction = None
+
+    def __enter__(self) -> "UnitOfWork":
+        outer = UnitOfWork.current(self.engine)
+
+        # Nested units of work join the outer transaction
+        if outer:
+            return outer
+
+        self._token = _current_unit_of_work.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if self._token is None:
+            return
+
+        _current_unit_of_work.reset(self._token)
+        self._token = None
+
+        committed = False
+        try:
+            if self._connection is None or self._transaction is None:
+                # Nothing to commit
+                committed = exc_type is None
+                return
+
+            try:
+                if exc_type is None:
+                    self._transaction.commit()
+                    committed = True
+                else:
+                    self._transaction.rollback()
+            finally:
+                self._connection.close()
+                self._connection = None
+                self._transaction = None
+        finally:
+            _run_callbacks(self._after_completion)
+
+            if committed:
+                _run_callbacks(self._after_commit)
+            else:
+                self._after_commit.clear()
+
+
+class AsyncUnitOfWork:
+    """
+    Async counterpart of UnitOfWork for the asyncpg engine.
+
+    Usage:
+        async with AsyncUnitOfWork():
+            await service.save_event(group_id, event)
+    """
+
+    def __init__(self, engine_: Optional[AsyncEngine] = None):
+        self.engine = engine_ or async_engine
+        self._connection: Optional[AsyncConnection] = None
+        self._transaction: Optional[AsyncTransaction] = None
+        self._token: Optional[Token] = None
+        self._after_completion: list[AsyncCallback] = []
+        self._after_commit: list[AsyncCallback] = []
+
+    @staticmethod
+    def current(engine_: AsyncEngine) -> Optional["AsyncUnitOfWork"]:
+        """Get the active async unit of work for the given engine, if any"""
+        unit_of_work = _current_async_unit_of_work.get()
+
+        if unit_of_work and unit_of_work.engine is engine_:
+            return unit_of_work
+
+        return None
+
+    @staticmethod
+    def active() -> Optional["AsyncUnitOfWork"]:
+        """Get the active async unit of work, whatever its engine"""
+        return _current_async_unit_of_work.get()
+
+    def after_completion(self, callback: AsyncCallback) -> None:
+        """Run the callback once the unit of work transaction ends"""
+        self._after_completion.append(callback)
+
+    def after_commit(self, callback: AsyncCallback) -> None:
+        """Run the callback once the unit of work transaction is committed"""
+        self._after_commit.append(callback)
+
+    async def connection(self) -> AsyncConnection:
+        """Get the unit of work connection, beginning the transaction on first use"""
+        if self._connection is None:
+            self._connection = await self.engine.connect()
+            self._transaction = await self._connection.begin()
+
+        return self._connection
+
+    async def release(self) -> None:
+        """Commit the work done so far and return the connection to the pool, see UnitOfWork.release"""
+        if self._connection is None or self._transaction is None:
+            return
+
+        try:
+            await self._transaction.commit()
+        finally:
+            await self._connection.close()
+            self._connection = None
+            self._transaction = None
+
+    async def __aenter__(self) -> "AsyncUnitOfWork":
+        outer = AsyncUnitOfWork.current(self.engine)
+
+        # Nested units of work join the outer transaction
+        if outer:
+            return outer
+
+        self._token = _current_async_unit_of_work.set(self)
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        if self._token is None:
+            return
+
+        _current_async_unit_of_work.reset(self._token)
+        self._token = None
+
+        committed = False
+        try:
+            if self._connection is None or self._transaction is None:
+                # Nothing to commit
+                committed = exc_type is None
+                return
+
+            try:
+                if exc_type is None:
+                    await self._transaction.commit()
+                    committed = True
+                else:
+                    await self._transaction.rollback()
+            finally:
+                await self._connection.close()
+                self._connection = None
+                self._transaction = None
+        finally:
+            await _run_async_callbacks(self._after_completion)
+
+            if committed:
+                await _run_async_callbacks(self._after_commit)
+            else:
+                self._after_commit.clear()
+
+
+def run_after_completion(callback: Callable[[], None]) -> None:
+    """
+    Run the callback once the active unit of work (sync or async) ends, or
+    right away when there is none.
+    """
+    unit_of_work = UnitOfWork.active() or AsyncUnitOfWork.active()
+
+    if unit_of_work:
+        unit_of_work.after_completion(callback)
+    else:
+        callback()
+
+
+def run_after_commit(callback: Callable[[], None]) -> None:
+    """
+    Run the callback once the active unit of work (sync or async) commits,
+    or right away when there is none. It never runs on rollback.
+    """
+    unit_of_work = UnitOfWork.active() or AsyncUnitOfWork.active()
+
+    if unit_of_work:
+        unit_of_work.after_commit(callback)
+    else:
+        callback()
+
+
+def release_unit_of_work() -> None:
+    """
+    Release the connection of the active unit of work, if any, before a
+    slow outbound call, e.g. to the Progress service
+    """
+    unit_of_work = UnitOfWork.active()
+
+    if unit_of_work:
+        unit_of_work.release()
+
+
+async def release_async_unit_of_work() -> None:
+    """Async counterpart of release_unit_of_work"""
+    unit_of_work = AsyncUnitOfWork.active()
+
+    if unit_of_work:
+        await unit_of_work.release()
+
+
+def _run_callbacks(callbacks: list[Callable[[], None]]) -> None:
+    while callbacks:
+        callback = callbacks.pop(0)
+
+        try:
+            callback()
+        except Exception:
+            logging.exception("Unit of work completion callback failed")
+
+
+async def _run_async_callbacks(callbacks: list[AsyncCallback]) -> None:
+    while callbacks:
+        callback = callbacks.pop(0)
+
+        try:
+            result = callback()
+            if isawaitable(result):
+                await result
+        except Exception:
+            logging.exception("Unit of work completion callback failed")
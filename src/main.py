@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 import logging
 from os import getenv
 import os
@@ -5,22 +6,38 @@ import dotenv
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
+from starlette.concurrency import run_in_threadpool
 import uvicorn
 
-from middleware.auth_middleware import JWTMiddleware
+from container import Container
+from database.migrations import apply_migrations
+from middleware.auth_middleware import AuthMiddleware
 from middleware.error_handler import error_handler
-from starlette.middleware.base import BaseHTTPMiddleware
 
 from routes import group_routes, health_routes
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if getenv("RUN_MIGRATIONS", "true").lower() == "true":
+        await run_in_threadpool(apply_migrations)
+
+    app.state.container = Container()
+    await app.state.container.start()
+
+    yield
+
+    await app.state.container.close()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 
 @app.exception_handler(RequestValidationError)
 @app.exception_handler(HTTPException)
 @app.exception_handler(Exception)
-async def exception_handler(request: Request, exc: Exception) -> JSONResponse:
+async def exception_handler(request: Request, exc: Exception) -> ORJSONResponse:
     return error_handler(request, exc)
 
 app.add_middleware(
@@ -32,7 +49,7 @@ app.add_middleware(
 )
 
 # Add JWT middleware
-app.add_middleware(BaseHTTPMiddleware, dispatch=JWTMiddleware())
+app.add_middleware(AuthMiddleware)
 
 
 app.include_router(health_routes.router, prefix="/health", tags=["health"])
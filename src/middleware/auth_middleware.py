@@ -1,54 +1,104 @@
-from fastapi import Request
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from models.errors.errors import AuthenticationError
-from service.jwt_service import JWTService
+import re
+from typing import Optional
+from urllib.parse import parse_qsl
 
+from fastapi import HTTPException, Request, status
+from starlette.types import ASGIApp, Receive, Scope, Send
 
-class JWTMiddleware:
-    def __init__(self, jwt_service: JWTService | None = None, security: HTTPBearer | None = None):
+from middleware.error_handler import error_handler
+from service.jwt_service import IJWTService, JWTService
+
+# The health checks are anchored, so /health/metrics requires a token
+PUBLIC_ROUTES = re.compile(
+    r"/\Z|/health(?:/|/db)?\Z|/docs|/redoc|/openapi\.json|/favicon\.ico")
+
+# Requests sent from the interactive docs of a local server
+LOCAL_DOCS_REFERER = re.compile(
+    rb"http://(?:127\.0\.0\.1|localhost):.*docs\Z")
+
+
+class AuthMiddleware:
+    """
+    Pure ASGI middleware verifying the bearer JWT of every HTTP request and
+    WebSocket handshake, except for public routes and CORS preflights.
+
+    The payload is stored as request.state.user and the header as
+    request.state.auth_header, to be forwarded to other services. WebSockets
+    can also send the token as the token query parameter, since browsers
+    cannot set their headers, and are closed with 1008 when rejected.
+    """
+
+    def __init__(self, app: ASGIApp, jwt_service: Optional[IJWTService] = None):
+        self.app = app
         self.jwt_service = jwt_service or JWTService()
-        self.security = security or HTTPBearer()
-        self.__public_routes = [
-            "/health",
-            "/docs",
-            "/redoc",
-            "/openapi.json",
-            "/favicon.ico",
-        ]
-
-    async def __call__(self, request: Request, call_next):
-        if request.method == "OPTIONS" or request.method == "REDIRECT":
-            response = await call_next(request)
-            return response
-
-        if request.url.path == "/":
-            response = await call_next(request)
-            return response
-
-        referer: str = request.headers.get("referer", "")
-        if referer and (referer.startswith("http://127.0.0.1:") or referer.startswith("http://localhost:")) and referer.endswith("docs"):
-            response = await call_next(request)
-            return response
-
-        for route in self.__public_routes:
-            if request.url.path.startswith(route):
-                response = await call_next(request)
-                return response
-
-        if request.url.path == "/":
-            response = await call_next(request)
-            return response
-
-        credentials: HTTPAuthorizationCredentials | None = await self.security(request)
-
-        if not credentials:
-            raise AuthenticationError()
-
-        token = credentials.credentials
-        payload = self.jwt_service.verify(token)
-
-        request.state.user = payload
-        request.state.auth_header = f"Bearer {token}"
-        
-        response = await call_next(request)
-        return response
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket") or self.is_public(scope):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+
+        try:
+            token = self.token(scope, headers)
+
+            # The docs are only exempted when they send no credentials
+            if token is None and LOCAL_DOCS_REFERER.match(headers.get(b"referer", b"")):
+                await self.app(scope, receive, send)
+                return
+
+            if not token:
+                raise HTTPException(
+                    status.HTTP_403_FORBIDDEN, "Not authenticated")
+
+            payload = self.jwt_service.verify(token)
+
+        # AuthenticationError included
+        except HTTPException as e:
+            await self.reject(scope, receive, send, e)
+            return
+
+        state = scope.setdefault("state", {})
+        state["user"] = payload
+        state["auth_header"] = f"Bearer {token}"
+
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def is_public(scope: Scope) -> bool:
+        return scope.get("method") == "OPTIONS" or PUBLIC_ROUTES.match(scope["path"]) is not None
+
+    @staticmethod
+    def token(scope: Scope, headers: dict[bytes, bytes]) -> Optional[str]:
+        """
+        Get the bearer token of the request, None when no credentials are sent
+
+        Raises:
+            HTTPException: If the credentials are not a bearer token
+        """
+        authorization = headers.get(b"authorization")
+
+        if authorization:
+            scheme, _, token = authorization.decode("latin-1").partition(" ")
+
+            if scheme.lower() != "bearer":
+                raise HTTPException(
+                    status.HTTP_403_FORBIDDEN, "Invalid authentication credentials")
+
+            return token.strip()
+
+        if scope["type"] == "websocket":
+            for name, value in parse_qsl(scope.get("query_string", b"").decode("latin-1")):
+                if name == "token":
+                    return value
+
+        return None
+
+    @staticmethod
+    async def reject(scope: Scope, receive: Receive, send: Send, e: Exception) -> None:
+        if scope["type"] == "websocket":
+            await send({"type": "websocket.close", "code": 1008, "reason": getattr(e, "title", "")})
+            return
+
+        response = error_handler(Request(scope), e)
+        await response(scope, receive, send)
@@ -1,75 +1,56 @@
 import logging
+from typing import Any
 from fastapi import HTTPException, Request, status
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 
 from models.errors.errors import CustomHTTPException
-from models.response import ErrorDTO
 
 
-def error_handler(request: Request, e: Exception) -> JSONResponse:
-    match e:
-        case RequestValidationError():
-            content = ErrorDTO(
-                type="about:blank",
-                title="Validation error",
-                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail=" & ".join(
-                    [f"{err['loc'][1]}: {err['msg']}, got \'{err['input']}\'" for err in e.errors()]),
-                instance=str(request.url)
-            )
+def error_response(request: Request, title: str, status_code: int, detail: Any) -> ORJSONResponse:
+    """
+    Build the ErrorDTO body as a plain dict, without validating a model that
+    is only converted back to a dict
+    """
+    content = {
+        "type": "about:blank",
+        "title": title,
+        "status": status_code,
+        "detail": detail,
+        "instance": str(request.url),
+    }
 
-            logging.error(str(content))
+    logging.error(" ".join(f"{key}={value!r}" for key, value in content.items()))
 
-            return JSONResponse(
-                dict(content),
-                status_code=content.status
-            )
+    return ORJSONResponse(content, status_code=status_code)
 
-        case CustomHTTPException():
-            content = ErrorDTO(
-                type="about:blank",
-                title=e.title,
-                status=e.status_code,
-                detail=e.detail,
-                instance=str(request.url)
-            )
 
-            logging.error(str(content))
+def validation_error_field(loc: tuple) -> str:
+    # Errors of a whole model, like the ones of its validators, have no field
+    return str(loc[1] if len(loc) > 1 else loc[0])
 
-            return JSONResponse(
-                content=dict(content),
-                status_code=content.status
-            )
 
-        case HTTPException():
-            content = ErrorDTO(
-                type="about:blank",
-                title='',
-                status=e.status_code,
-                detail=e.detail,
-                instance=str(request.url)
+def error_handler(request: Request, e: Exception) -> ORJSONResponse:
+    match e:
+        case RequestValidationError():
+            return error_response(
+                request,
+                "Validation error",
+                status.HTTP_422_UNPROCESSABLE_ENTITY,
+                " & ".join(
+                    [f"{validation_error_field(err['loc'])}: {err['msg']}, got \'{err['input']}\'" for err in e.errors()])
             )
 
-            logging.error(str(content))
+        case CustomHTTPException():
+            return error_response(request, e.title, e.status_code, e.detail)
 
-            return JSONResponse(
-                dict(content),
-                status_code=content.status
-            )
+        case HTTPException():
+            return error_response(request, '', e.status_code, e.detail)
 
         case _:
-            content = ErrorDTO(
-                type="about:blank",
-                title="Internal server error",
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="An unexpected error occurred",
-                instance=str(request.url)
-            )
-
-            logging.error(str(content))
-
-            return JSONResponse(
-                dict(content),
-                status_code=content.status
+            return error_response(
+                request,
+                "Internal server error",
+                status.HTTP_500_INTERNAL_SERVER_ERROR,
+                "An unexpected error occurred"
             )
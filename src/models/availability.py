@@ -0,0 +1,16 @@
+from pydantic import Field
+
+from models.routine import Schedule
+
+
+class SlotSuggestion(Schedule):
+    available_members: list[str] = Field(
+        ...,
+        description="IDs of the members free during the whole slot",
+        examples=[["123e4567-e89b-12d3-a456-426614174000"]],
+    )
+    unavailable_members: list[str] = Field(
+        ...,
+        description="IDs of the members busy at some hour of the slot",
+        examples=[["123e4567-e89b-12d3-a456-426614174001"]],
+    )
@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+
+from models.event import EventReturn
+from models.group import GroupReturn
+
+
+class Dashboard(BaseModel):
+    groups: list[GroupReturn] = Field(
+        ...,
+        description="Groups of the user, with their routines",
+    )
+    events: list[EventReturn] = Field(
+        ...,
+        description="Next upcoming events of the user's groups, each with its open poll and tallies if any",
+    )
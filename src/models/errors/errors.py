@@ -63,3 +63,12 @@ class BadGatewayError(CustomHTTPException):
             detail="Bad gateway",
             title="BadGatewayError"
         )
+
+
+class ServiceUnavailableError(CustomHTTPException):
+    def __init__(self, detail: Optional[str] = None):
+        super().__init__(
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail if detail else "Service unavailable",
+            title="ServiceUnavailableError"
+        )
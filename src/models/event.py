@@ -1,6 +1,6 @@
-from datetime import datetime
-from typing import Optional
-from pydantic import BaseModel, Field
+from datetime import date, datetime
+from typing import Any, NamedTuple, Optional, Self
+from pydantic import BaseModel, Field, model_validator
 
 from models.poll import Option, PollDTO, PollReturn
 
@@ -65,6 +65,14 @@ class EventDTO(BaseModel):
         ]
     )
 
+    @model_validator(mode="after")
+    def check_hours(self) -> Self:
+        # Hours are a closed range, so an event may start and end at the same hour
+        if self.start_hour > self.end_hour:
+            raise ValueError("Event start hour cannot be after its end hour")
+
+        return self
+
 
 class EventReturn(EventDTO):
     id: str = Field(
@@ -87,3 +95,19 @@ class EventReturn(EventDTO):
                                  description="Creation timestamp of the routine")
     updated_at: datetime = Field(...,
                                  description="Last update timestamp of the routine")
+
+
+class EventKey(NamedTuple):
+    """Position of an event in the listing order of its group"""
+    date: date
+    start_hour: int
+    id: str
+
+    @staticmethod
+    def of(event: EventReturn) -> "EventKey":
+        return EventKey(event.date.date(), event.start_hour, event.id)
+
+    @staticmethod
+    def parse(values: list[Any]) -> "EventKey":
+        date_, start_hour, id_ = values
+        return EventKey(date.fromisoformat(date_), int(start_hour), str(id_))
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Optional
 from pydantic import BaseModel, Field
 
 from models.member import Member
@@ -28,5 +29,7 @@ class GroupReturn(GroupDTO):
         pattern="^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$"
     )
     routines: list[RoutineReturn] = Field([], description="List of routines associated with the group")
+    members: Optional[list[Member]] = Field(None, description="List of members of the group, when requested")
+    member_count: Optional[int] = Field(None, description="Number of members of the group, when requested")
     created_at: datetime = Field(..., description="Creation timestamp of the group")
     updated_at: datetime = Field(..., description="Last update timestamp of the group")
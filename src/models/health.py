@@ -1,3 +1,5 @@
+from typing import Any
+
 from pydantic import BaseModel, Field
 
 
@@ -17,3 +19,12 @@ class HealthDB(BaseModel):
         examples=["OK", "😎"],
         title="Database health status",
     )
+
+
+class HealthMetrics(BaseModel):
+    metrics: dict[str, dict[str, Any]] = Field(
+        ...,
+        description="In-process counters of the service, by component",
+        examples=[{"group_cache": {"hits": 10, "misses": 2, "evictions": 0}}],
+        title="Service metrics",
+    )
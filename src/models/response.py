@@ -1,4 +1,4 @@
-from typing import Generic, TypeVar
+from typing import Generic, Optional, TypeVar
 from fastapi import Response
 from pydantic import BaseModel, Field
 
@@ -9,6 +9,19 @@ class CustomResponse(BaseModel, Generic[T]):
     data: T
 
 
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: Optional[str] = None
+
+
+class PageResponse(CustomResponse[list[T]], Generic[T]):
+    next_cursor: Optional[str] = Field(
+        None,
+        description="Cursor of the next page, null on the last one",
+        title="Next page cursor",
+    )
+
+
 class ErrorDTO(BaseModel):
     type: str = Field(
         ...,
@@ -1,8 +1,8 @@
 from datetime import datetime
 from enum import Enum
-from pydantic import BaseModel, Field
+from typing import Self
+from pydantic import BaseModel, Field, model_validator
 
-from tests.test_jwt import auth_header
 
 
 class Day(str, Enum):
@@ -73,6 +73,14 @@ class RoutineDTO(Schedule):
         pattern="^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$"
     )
 
+    @model_validator(mode="after")
+    def check_hours(self) -> Self:
+        # Hours are half open, so a routine ending at its start hour is empty
+        if self.start_hour >= self.end_hour:
+            raise ValueError("Routine start hour must be before its end hour")
+
+        return self
+
 
 class RoutineReturn(RoutineDTO):
     id: str = Field(
@@ -95,3 +103,9 @@ class RoutineReturn(RoutineDTO):
                                  description="Creation timestamp of the routine")
     updated_at: datetime = Field(...,
                                  description="Last update timestamp of the routine")
+
+    @model_validator(mode="after")
+    def check_hours(self) -> Self:
+        # Stored routines are returned as they are, including the ones saved
+        # before their hours were checked
+        return self
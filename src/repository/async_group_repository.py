@@ -0,0 +1,330 @@
+from abc import ABCMeta, abstractmethod
+from datetime import date, datetime
+from typing import Callable, Optional, TypeVar
+
+from sqlalchemy import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from database.database import async_engine
+from database.unit_of_work import AsyncUnitOfWork
+from models.event import EventDTO, EventKey, EventReturn
+from models.group import GroupDTO, GroupReturn
+from models.member import Member
+from models.poll import Option, PollDTO, PollReturn, VoteDTO
+from models.routine import RoutineDTO, RoutineReturn, Schedule
+from repository.group_repository import GroupRepository, IGroupRepository
+
+T = TypeVar("T")
+
+
+class IAsyncGroupRepository(metaclass=ABCMeta):
+    @abstractmethod
+    async def save_group(self, group: GroupDTO) -> Optional[GroupReturn]:
+        pass
+
+    @abstractmethod
+    async def get_group(self, group_id: str) -> Optional[GroupReturn]:
+        pass
+
+    @abstractmethod
+    async def get_groups(self, group_ids: list[str]) -> list[GroupReturn]:
+        """Get many groups, missing ones are skipped"""
+        pass
+
+    @abstractmethod
+    async def group_exists(self, group_id: str) -> bool:
+        pass
+
+    @abstractmethod
+    async def get_group_aggregate(self, group_id: str, include_members: bool = False) -> Optional[GroupReturn]:
+        """Get a group with its routines, member count and optionally its members"""
+        pass
+
+    @abstractmethod
+    async def get_user_groups(self, user_id: str) -> list[GroupReturn]:
+        pass
+
+    @abstractmethod
+    async def save_member(self, group_id: str, user_id: str) -> None:
+        pass
+
+    @abstractmethod
+    async def get_group_members(self, group_id: str) -> list[Member]:
+        pass
+
+    @abstractmethod
+    async def get_members_by_group_ids(self, group_ids: list[str]) -> dict[str, list[Member]]:
+        """Get the members of many groups, by group id"""
+        pass
+
+    @abstractmethod
+    async def get_member_counts(self, group_ids: list[str]) -> dict[str, int]:
+        """Get the number of members of many groups, by group id"""
+        pass
+
+    @abstractmethod
+    async def save_routine(self, group_id: str, routine: RoutineDTO) -> None:
+        pass
+
+    @abstractmethod
+    async def get_routines(self, group_id: str) -> list[RoutineReturn]:
+        pass
+
+    @abstractmethod
+    async def get_routines_by_group_ids(self, group_ids: list[str]) -> dict[str, list[RoutineReturn]]:
+        """Get the routines of many groups, by group id"""
+        pass
+
+    @abstractmethod
+    async def get_user_groups_routines_schedules(self, users: list[str]) -> list[Schedule]:
+        pass
+
+    @abstractmethod
+    async def find_members_colliding_routine(self, users: list[str], schedule: Schedule) -> Optional[Schedule]:
+        pass
+
+    @abstractmethod
+    async def save_event(self, group_id: str, event: EventDTO) -> Optional[EventReturn]:
+        pass
+
+    @abstractmethod
+    async def get_event(self, group_id: str, event_id: str) -> Optional[EventReturn]:
+        pass
+
+    @abstractmethod
+    async def update_event(self, group_id: str, event_id: str, event: EventDTO) -> Optional[EventReturn]:
+        pass
+
+    @abstractmethod
+    async def get_events(self, group_id: str, date_from: Optional[date] = None, date_to: Optional[date] = None, after: Optional[EventKey] = None, limit: Optional[int] = None) -> list[EventReturn]:
+        pass
+
+    @abstractmethod
+    async def get_groups_events(self, group_ids: list[str], date_from: date, limit: int) -> list[EventReturn]:
+        """Get the first events of many groups from a date, in listing order"""
+        pass
+
+    @abstractmethod
+    async def delete_event(self, group_id: str, event_id: str) -> None:
+        pass
+
+    @abstractmethod
+    async def find_group_colliding_events(self, group_id: str, date: datetime, start_hour: int, end_hour: int) -> list[EventReturn]:
+        pass
+
+    @abstractmethod
+    async def save_poll(self, group_id: str, creator_id: str, event_id: str, poll: PollDTO) -> str:
+        """Create a new poll for a group and return the poll ID"""
+        pass
+
+    @abstractmethod
+    async def save_poll_vote(self, vote: VoteDTO) -> None:
+        """Save a user's vote for a poll option"""
+        pass
+
+    @abstractmethod
+    async def delete_poll_vote(self, poll_id: str, user_id: str) -> None:
+        """Delete a user's vote for a poll option"""
+        pass
+
+    @abstractmethod
+    async def replace_poll_vote(self, vote: VoteDTO) -> PollReturn:
+        """
+        Replace the user's vote in the poll and get the poll with the
+        resulting vote counts.
+
+        Raises:
+            NotFoundError: If the poll or the voted option does not exist
+        """
+        pass
+
+    @abstractmethod
+    async def save_poll_votes(self, votes: list[VoteDTO]) -> int:
+        """
+        Upsert many votes at once, at most one per poll and user. Votes for
+        options that no longer exist are dropped.
+
+        Returns:
+            int: The number of votes written
+        """
+        pass
+
+    @abstractmethod
+    async def get_poll_user_votes(self, poll_id: str) -> dict[str, int]:
+        """Get the option voted by each user in a poll"""
+        pass
+
+    @abstractmethod
+    async def get_poll_options(self, poll_id: str) -> list[Option]:
+        """Get all options for a poll"""
+        pass
+
+    @abstractmethod
+    async def get_poll_votes(self, poll_id: str) -> dict[int, int]:
+        """Get vote counts for each option in a poll"""
+        pass
+
+    @abstractmethod
+    async def get_poll(self, poll_id: str) -> Optional[PollReturn]:
+        """Get a poll with its options and votes"""
+        pass
+
+    @abstractmethod
+    async def get_poll_by_event_id(self, event_id: str) -> Optional[PollReturn]:
+        """Get a poll associated with a specific event"""
+        pass
+
+    @abstractmethod
+    async def get_polls_by_event_ids(self, event_ids: list[str]) -> dict[str, PollReturn]:
+        """Get the polls of many events, by event id"""
+        pass
+
+
+class AsyncGroupRepository(IAsyncGroupRepository):
+    """
+    Async repository backed by an asyncpg engine.
+
+    The SQL lives in GroupRepository: each call runs the synchronous
+    implementation on the greenlet-adapted facade of an async connection, so
+    the driver I/O never blocks the event loop and both modes share one set of
+    queries. Calls join the active AsyncUnitOfWork, if any.
+    """
+
+    def __init__(
+        self,
+        engine_: Optional[AsyncEngine] = None,
+        repository_factory: Optional[Callable[[Connection], IGroupRepository]] = None
+    ):
+        self.engine = engine_ or async_engine
+        self.repository_factory = repository_factory or (
+            lambda connection: GroupRepository(connection_=connection)
+        )
+
+    async def _run(self, operation: Callable[[IGroupRepository], T]) -> T:
+        def run(sync_connection: Connection) -> T:
+            return operation(self.repository_factory(sync_connection))
+
+        unit_of_work = AsyncUnitOfWork.current(self.engine)
+        if unit_of_work:
+            connection = await unit_of_work.connection()
+            return await connection.run_sync(run)
+
+        async with self.engine.begin() as connection:
+            return await connection.run_sync(run)
+
+    async def save_group(self, group: GroupDTO) -> Optional[GroupReturn]:
+        return await self._run(lambda repository: repository.save_group(group))
+
+    async def get_group(self, group_id: str) -> Optional[GroupReturn]:
+        return await self._run(lambda repository: repository.get_group(group_id))
+
+    async def get_groups(self, group_ids: list[str]) -> list[GroupReturn]:
+        return await self._run(lambda repository: repository.get_groups(group_ids))
+
+    async def group_exists(self, group_id: str) -> bool:
+        return await self._run(lambda repository: repository.group_exists(group_id))
+
+    async def get_group_aggregate(self, group_id: str, include_members: bool = False) -> Optional[GroupReturn]:
+        """Get a group with its routines, member count and optionally its members"""
+        return await self._run(lambda repository: repository.get_group_aggregate(group_id, include_members))
+
+    async def get_user_groups(self, user_id: str) -> list[GroupReturn]:
+        return await self._run(lambda repository: repository.get_user_groups(user_id))
+
+    async def save_member(self, group_id: str, user_id: str) -> None:
+        return await self._run(lambda repository: repository.save_member(group_id, user_id))
+
+    async def get_group_members(self, group_id: str) -> list[Member]:
+        return await self._run(lambda repository: repository.get_group_members(group_id))
+
+    async def get_members_by_group_ids(self, group_ids: list[str]) -> dict[str, list[Member]]:
+        return await self._run(lambda repository: repository.get_members_by_group_ids(group_ids))
+
+    async def get_member_counts(self, group_ids: list[str]) -> dict[str, int]:
+        return await self._run(lambda repository: repository.get_member_counts(group_ids))
+
+    async def save_routine(self, group_id: str, routine: RoutineDTO) -> None:
+        return await self._run(lambda repository: repository.save_routine(group_id, routine))
+
+    async def get_routines(self, group_id: str) -> list[RoutineReturn]:
+        return await self._run(lambda repository: repository.get_routines(group_id))
+
+    async def get_routines_by_group_ids(self, group_ids: list[str]) -> dict[str, list[RoutineReturn]]:
+        return await self._run(lambda repository: repository.get_routines_by_group_ids(group_ids))
+
+    async def get_user_groups_routines_schedules(self, users: list[str]) -> list[Schedule]:
+        return await self._run(lambda repository: repository.get_user_groups_routines_schedules(users))
+
+    async def find_members_colliding_routine(self, users: list[str], schedule: Schedule) -> Optional[Schedule]:
+        return await self._run(lambda repository: repository.find_members_colliding_routine(users, schedule))
+
+    async def save_event(self, group_id: str, event: EventDTO) -> Optional[EventReturn]:
+        return await self._run(lambda repository: repository.save_event(group_id, event))
+
+    async def get_event(self, group_id: str, event_id: str) -> Optional[EventReturn]:
+        return await self._run(lambda repository: repository.get_event(group_id, event_id))
+
+    async def update_event(self, group_id: str, event_id: str, event: EventDTO) -> Optional[EventReturn]:
+        return await self._run(lambda repository: repository.update_event(group_id, event_id, event))
+
+    async def get_events(self, group_id: str, date_from: Optional[date] = None, date_to: Optional[date] = None, after: Optional[EventKey] = None, limit: Optional[int] = None) -> list[EventReturn]:
+        return await self._run(lambda repository: repository.get_events(group_id, date_from, date_to, after, limit))
+
+    async def get_groups_events(self, group_ids: list[str], date_from: date, limit: int) -> list[EventReturn]:
+        return await self._run(lambda repository: repository.get_groups_events(group_ids, date_from, limit))
+
+    async def delete_event(self, group_id: str, event_id: str) -> None:
+        return await self._run(lambda repository: repository.delete_event(group_id, event_id))
+
+    async def find_group_colliding_events(self, group_id: str, date: datetime, start_hour: int, end_hour: int) -> list[EventReturn]:
+        return await self._run(
+            lambda repository: repository.find_group_colliding_events(
+                group_id, date, start_hour, end_hour)
+        )
+
+    async def save_poll(self, group_id: str, creator_id: str, event_id: str, poll: PollDTO) -> str:
+        """Create a new poll for a group and return the poll ID"""
+        return await self._run(
+            lambda repository: repository.save_poll(
+                group_id, creator_id, event_id, poll)
+        )
+
+    async def save_poll_vote(self, vote: VoteDTO) -> None:
+        """Save a user's vote for a poll option"""
+        return await self._run(lambda repository: repository.save_poll_vote(vote))
+
+    async def delete_poll_vote(self, poll_id: str, user_id: str) -> None:
+        """Delete a user's vote for a poll option"""
+        return await self._run(lambda repository: repository.delete_poll_vote(poll_id, user_id))
+
+    async def replace_poll_vote(self, vote: VoteDTO) -> PollReturn:
+        """Replace the user's vote in the poll and get the poll with the resulting vote counts"""
+        return await self._run(lambda repository: repository.replace_poll_vote(vote))
+
+    async def save_poll_votes(self, votes: list[VoteDTO]) -> int:
+        """Upsert many votes at once, at most one per poll and user"""
+        return await self._run(lambda repository: repository.save_poll_votes(votes))
+
+    async def get_poll_user_votes(self, poll_id: str) -> dict[str, int]:
+        """Get the option voted by each user in a poll"""
+        return await self._run(lambda repository: repository.get_poll_user_votes(poll_id))
+
+    async def get_poll_options(self, poll_id: str) -> list[Option]:
+        """Get all options for a poll"""
+        return await self._run(lambda repository: repository.get_poll_options(poll_id))
+
+    async def get_poll_votes(self, poll_id: str) -> dict[int, int]:
+        """Get vote counts for each option in a poll"""
+        return await self._run(lambda repository: repository.get_poll_votes(poll_id))
+
+    async def get_poll(self, poll_id: str) -> Optional[PollReturn]:
+        """Get a poll with its options and votes"""
+        return await self._run(lambda repository: repository.get_poll(poll_id))
+
+    async def get_poll_by_event_id(self, event_id: str) -> Optional[PollReturn]:
+        """Get a poll associated with a specific event"""
+        return await self._run(lambda repository: repository.get_poll_by_event_id(event_id))
+
+    async def get_polls_by_event_ids(self, event_ids: list[str]) -> dict[str, PollReturn]:
+        """Get the polls of many events, by event id"""
+        return await self._run(lambda repository: repository.get_polls_by_event_ids(event_ids))
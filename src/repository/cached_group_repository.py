@@ -0,0 +1,592 @@
+import copy
+from datetime import date, datetime
+from os import getenv
+from typing import Any, Callable, NamedTuple, Optional, TypeVar
+
+from starlette.concurrency import run_in_threadpool
+
+from database.unit_of_work import AsyncUnitOfWork, run_after_completion
+from models.dashboard import Dashboard
+from models.event import EventDTO, EventKey, EventReturn
+from models.group import GroupDTO, GroupReturn
+from models.member import Member
+from models.poll import Option, PollDTO, PollReturn, VoteDTO
+from models.routine import RoutineDTO, RoutineReturn, Schedule
+from repository.async_group_repository import AsyncGroupRepository, IAsyncGroupRepository
+from repository.group_repository import GroupRepository, IGroupRepository
+from utils.cache import CacheCodec, ICache, LRUCache, RedisCache, TieredCache
+
+T = TypeVar("T")
+
+# Models of the values cached in Redis
+CACHED_MODELS = (GroupReturn, Member, RoutineReturn, Option, PollReturn, Dashboard)
+
+
+def build_group_cache() -> ICache:
+    max_size = int(getenv("GROUP_CACHE_MAX_SIZE", "10000"))
+    ttl = float(getenv("GROUP_CACHE_TTL_SECONDS", "30"))
+    version_ttl = float(getenv("GROUP_CACHE_VERSION_TTL_SECONDS", "1"))
+    redis_url = getenv("REDIS_URL", "redis://localhost:6379/0")
+    codec = CacheCodec(CACHED_MODELS)
+
+    match getenv("GROUP_CACHE_BACKEND", "memory"):
+        case "memory":
+            return LRUCache(max_size=max_size, ttl=ttl)
+        case "redis":
+            return RedisCache(url=redis_url, ttl=ttl, codec=codec)
+        case "tiered":
+            return TieredCache(
+                LRUCache(max_size=max_size, ttl=ttl),
+                RedisCache(url=redis_url, ttl=ttl, codec=codec),
+                version_ttl
+            )
+        case backend:
+            raise ValueError(f"Unknown GROUP_CACHE_BACKEND {backend}")
+
+
+def is_group_cache_enabled() -> bool:
+    return getenv("GROUP_CACHE_ENABLED", "true").lower() == "true"
+
+
+def dashboard_cache_ttl() -> Optional[float]:
+    ttl = getenv("DASHBOARD_CACHE_TTL_SECONDS")
+    return float(ttl) if ttl else None
+
+
+class CacheKey(NamedTuple):
+    key: str
+    # The key is only valid for the current version of these namespaces
+    namespaces: tuple[str, ...] = ()
+
+
+class GroupCache:
+    """
+    Keys and invalidation rules of the cached group and poll read models.
+
+    Values are copied in and out, since services mutate the models they get.
+    Mutable read models are keyed by the versions of the namespaces they
+    depend on: a write bumps those versions right away and once more when
+    the unit of work ends, so reads made inside an uncommitted transaction
+    cannot outlive it. With a shared backend the bump reaches every worker.
+    """
+
+    def __init__(self, cache: Optional[ICache] = None):
+        self.cache = cache if cache is not None else build_group_cache()
+
+    @staticmethod
+    def members_namespace(group_id: str) -> str:
+        return f"group:{group_id}:members"
+
+    @staticmethod
+    def routines_namespace(group_id: str) -> str:
+        return f"group:{group_id}:routines"
+
+    @staticmethod
+    def poll_namespace(poll_id: str) -> str:
+        return f"poll:{poll_id}"
+
+    @staticmethod
+    def user_namespace(user_id: str) -> str:
+        return f"user:{user_id}"
+
+    # Groups cannot be updated nor deleted, so their keys are not versioned
+    @staticmethod
+    def group_key(group_id: str) -> CacheKey:
+        return CacheKey(f"group:{group_id}")
+
+    @staticmethod
+    def exists_key(group_id: str) -> CacheKey:
+        return CacheKey(f"group:{group_id}:exists")
+
+    @classmethod
+    def aggregate_key(cls, group_id: str, include_members: bool) -> CacheKey:
+        return CacheKey(
+            f"group:{group_id}:aggregate:{int(include_members)}",
+            (cls.members_namespace(group_id), cls.routines_namespace(group_id))
+        )
+
+    @classmethod
+    def members_key(cls, group_id: str) -> CacheKey:
+        return CacheKey(f"group:{group_id}:members", (cls.members_namespace(group_id),))
+
+    @classmethod
+    def routines_key(cls, group_id: str) -> CacheKey:
+        return CacheKey(f"group:{group_id}:routines", (cls.routines_namespace(group_id),))
+
+    @classmethod
+    def poll_key(cls, poll_id: str) -> CacheKey:
+        return CacheKey(f"poll:{poll_id}", (cls.poll_namespace(poll_id),))
+
+    @classmethod
+    def poll_options_key(cls, poll_id: str) -> CacheKey:
+        return CacheKey(f"poll:{poll_id}:options", (cls.poll_namespace(poll_id),))
+
+    @classmethod
+    def poll_votes_key(cls, poll_id: str) -> CacheKey:
+        return CacheKey(f"poll:{poll_id}:votes", (cls.poll_namespace(poll_id),))
+
+    # Only the user's memberships invalidate it, changes in their groups are
+    # seen once it expires
+    @classmethod
+    def dashboard_key(cls, user_id: str, today: date, events_limit: int) -> CacheKey:
+        return CacheKey(
+            f"user:{user_id}:dashboard:{today.isoformat()}:{events_limit}",
+            (cls.user_namespace(user_id),)
+        )
+
+    def resolve(self, cache_key: CacheKey) -> Optional[str]:
+        """Get the versioned key, or None when the cache must be bypassed"""
+        if not cache_key.namespaces:
+            return cache_key.key
+
+        versions = self.cache.get_versions(*cache_key.namespaces)
+        if versions is None:
+            return None
+
+        return f"{cache_key.key}@{'.'.join(str(version) for version in versions)}"
+
+    def get(self, key: Optional[str]) -> Optional[Any]:
+        if key is None:
+            return None
+
+        value = self.cache.get(key)
+
+        return copy.deepcopy(value) if value is not None else None
+
+    def set(self, key: Optional[str], value: Any, ttl: Optional[float] = None) -> None:
+        # Misses are not cached, so a group is visible as soon as it is created
+        if key is None or value is None or value is False:
+            return
+
+        self.cache.set(key, copy.deepcopy(value), ttl)
+
+    def get_or_load(self, cache_key: CacheKey, load: Callable[[], T], ttl: Optional[float] = None) -> T:
+        key = self.resolve(cache_key)
+
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        value = load()
+        self.set(key, value, ttl)
+
+        return value
+
+    def invalidate(self, *namespaces: str) -> None:
+        self.cache.bump_version(*namespaces)
+        run_after_completion(lambda: self.cache.bump_version(*namespaces))
+
+    # Async callers go through these, which run the calls of a blocking
+    # backend (Redis) in the threadpool instead of on the event loop
+
+    async def _offload(self, function: Callable[..., T], *args: Any) -> T:
+        if self.cache.blocking:
+            return await run_in_threadpool(function, *args)
+
+        return function(*args)
+
+    def lookup(self, cache_key: CacheKey) -> tuple[Optional[str], Optional[Any]]:
+        """Get the versioned key and its cached value, in one go"""
+        key = self.resolve(cache_key)
+
+        return key, self.get(key)
+
+    async def alookup(self, cache_key: CacheKey) -> tuple[Optional[str], Optional[Any]]:
+        return await self._offload(self.lookup, cache_key)
+
+    async def aset(self, key: Optional[str], value: Any, ttl: Optional[float] = None) -> None:
+        await self._offload(self.set, key, value, ttl)
+
+    async def ainvalidate(self, *namespaces: str) -> None:
+        await self._offload(self.cache.bump_version, *namespaces)
+
+        unit_of_work = AsyncUnitOfWork.active()
+        if unit_of_work:
+            unit_of_work.after_completion(
+                lambda: self._offload(self.cache.bump_version, *namespaces))
+
+    def invalidate_members(self, group_id: str) -> None:
+        self.invalidate(self.members_namespace(group_id))
+
+    def invalidate_routines(self, group_id: str) -> None:
+        self.invalidate(self.routines_namespace(group_id))
+
+    def invalidate_poll(self, poll_id: str) -> None:
+        self.invalidate(self.poll_namespace(poll_id))
+
+    def invalidate_user(self, user_id: str) -> None:
+        self.invalidate(self.user_namespace(user_id))
+
+
+class CachedGroupRepository(IGroupRepository):
+    """
+    IGroupRepository decorator serving groups, routines, member sets and
+    polls from a bounded LRU/TTL cache, in-process or shared between workers.
+
+    Member, routine and vote writes invalidate the affected group or poll
+    only. Events are not cached, so their writes go straight to the wrapped
+    repository, except deletions, which also drop the event poll.
+    """
+
+    def __init__(self, repository: Optional[IGroupRepository] = None, cache: Optional[GroupCache] = None):
+        self.repository = repository or GroupRepository()
+        self.cache = cache or GroupCache()
+
+    def save_group(self, group: GroupDTO) -> Optional[GroupReturn]:
+        ret = self.repository.save_group(group)
+
+        # The owner joins the group as its first member
+        if ret:
+            self.cache.invalidate_members(ret.id)
+            self.cache.invalidate_user(ret.owner_id)
+
+        return ret
+
+    def get_group(self, group_id: str) -> Optional[GroupReturn]:
+        return self.cache.get_or_load(
+            self.cache.group_key(group_id),
+            lambda: self.repository.get_group(group_id)
+        )
+
+    def get_groups(self, group_ids: list[str]) -> list[GroupReturn]:
+        return self.repository.get_groups(group_ids)
+
+    def group_exists(self, group_id: str) -> bool:
+        return self.cache.get_or_load(
+            self.cache.exists_key(group_id),
+            lambda: self.repository.group_exists(group_id)
+        )
+
+    def get_group_aggregate(self, group_id: str, include_members: bool = False) -> Optional[GroupReturn]:
+        return self.cache.get_or_load(
+            self.cache.aggregate_key(group_id, include_members),
+            lambda: self.repository.get_group_aggregate(
+                group_id, include_members)
+        )
+
+    def get_user_groups(self, user_id: str) -> list[GroupReturn]:
+        return self.repository.get_user_groups(user_id)
+
+    def save_member(self, group_id: str, user_id: str) -> None:
+        try:
+            return self.repository.save_member(group_id, user_id)
+        finally:
+            self.cache.invalidate_members(group_id)
+            self.cache.invalidate_user(user_id)
+
+    def get_group_members(self, group_id: str) -> list[Member]:
+        return self.cache.get_or_load(
+            self.cache.members_key(group_id),
+            lambda: self.repository.get_group_members(group_id)
+        )
+
+    def get_members_by_group_ids(self, group_ids: list[str]) -> dict[str, list[Member]]:
+        return self.repository.get_members_by_group_ids(group_ids)
+
+    def get_member_counts(self, group_ids: list[str]) -> dict[str, int]:
+        return self.repository.get_member_counts(group_ids)
+
+    def save_routine(self, group_id: str, routine: RoutineDTO) -> None:
+        try:
+            return self.repository.save_routine(group_id, routine)
+        finally:
+            self.cache.invalidate_routines(group_id)
+
+    def get_routines(self, group_id: str) -> list[RoutineReturn]:
+        return self.cache.get_or_load(
+            self.cache.routines_key(group_id),
+            lambda: self.repository.get_routines(group_id)
+        )
+
+    def get_routines_by_group_ids(self, group_ids: list[str]) -> dict[str, list[RoutineReturn]]:
+        return self.repository.get_routines_by_group_ids(group_ids)
+
+    def get_user_groups_routines_schedules(self, users: list[str]) -> list[Schedule]:
+        return self.repository.get_user_groups_routines_schedules(users)
+
+    def find_members_colliding_routine(self, users: list[str], schedule: Schedule) -> Optional[Schedule]:
+        return self.repository.find_members_colliding_routine(users, schedule)
+
+    def save_event(self, group_id: str, event: EventDTO) -> Optional[EventReturn]:
+        return self.repository.save_event(group_id, event)
+
+    def get_event(self, group_id: str, event_id: str) -> Optional[EventReturn]:
+        return self.repository.get_event(group_id, event_id)
+
+    def update_event(self, group_id: str, event_id: str, event: EventDTO) -> Optional[EventReturn]:
+        return self.repository.update_event(group_id, event_id, event)
+
+    def get_events(self, group_id: str, date_from: Optional[date] = None, date_to: Optional[date] = None, after: Optional[EventKey] = None, limit: Optional[int] = None) -> list[EventReturn]:
+        return self.repository.get_events(group_id, date_from, date_to, after, limit)
+
+    def get_groups_events(self, group_ids: list[str], date_from: date, limit: int) -> list[EventReturn]:
+        return self.repository.get_groups_events(group_ids, date_from, limit)
+
+    def delete_event(self, group_id: str, event_id: str) -> None:
+        poll = self.repository.get_poll_by_event_id(event_id)
+
+        try:
+            return self.repository.delete_event(group_id, event_id)
+        finally:
+            if poll:
+                self.cache.invalidate_poll(poll.id)
+
+    def find_group_colliding_events(self, group_id: str, date: datetime, start_hour: int, end_hour: int) -> list[EventReturn]:
+        return self.repository.find_group_colliding_events(group_id, date, start_hour, end_hour)
+
+    def save_poll(self, group_id: str, creator_id: str, event_id: str, poll: PollDTO) -> str:
+        return self.repository.save_poll(group_id, creator_id, event_id, poll)
+
+    def save_poll_vote(self, vote: VoteDTO) -> None:
+        try:
+            return self.repository.save_poll_vote(vote)
+        finally:
+            self.cache.invalidate_poll(vote.poll_id)
+
+    def delete_poll_vote(self, poll_id: str, user_id: str) -> None:
+        try:
+            return self.repository.delete_poll_vote(poll_id, user_id)
+        finally:
+            self.cache.invalidate_poll(poll_id)
+
+    def replace_poll_vote(self, vote: VoteDTO) -> PollReturn:
+        try:
+            return self.repository.replace_poll_vote(vote)
+        finally:
+            self.cache.invalidate_poll(vote.poll_id)
+
+    def save_poll_votes(self, votes: list[VoteDTO]) -> int:
+        try:
+            return self.repository.save_poll_votes(votes)
+        finally:
+            for poll_id in {vote.poll_id for vote in votes}:
+                self.cache.invalidate_poll(poll_id)
+
+    def get_poll_user_votes(self, poll_id: str) -> dict[str, int]:
+        return self.repository.get_poll_user_votes(poll_id)
+
+    def get_poll_options(self, poll_id: str) -> list[Option]:
+        return self.cache.get_or_load(
+            self.cache.poll_options_key(poll_id),
+            lambda: self.repository.get_poll_options(poll_id)
+        )
+
+    def get_poll_votes(self, poll_id: str) -> dict[int, int]:
+        return self.cache.get_or_load(
+            self.cache.poll_votes_key(poll_id),
+            lambda: self.repository.get_poll_votes(poll_id)
+        )
+
+    def get_poll(self, poll_id: str) -> Optional[PollReturn]:
+        return self.cache.get_or_load(
+            self.cache.poll_key(poll_id),
+            lambda: self.repository.get_poll(poll_id)
+        )
+
+    def get_poll_by_event_id(self, event_id: str) -> Optional[PollReturn]:
+        return self.repository.get_poll_by_event_id(event_id)
+
+    def get_polls_by_event_ids(self, event_ids: list[str]) -> dict[str, PollReturn]:
+        return self.repository.get_polls_by_event_ids(event_ids)
+
+
+class CachedAsyncGroupRepository(IAsyncGroupRepository):
+    """
+    Async counterpart of CachedGroupRepository. Cache hits are served without
+    checking out a connection.
+    """
+
+    def __init__(self, repository: Optional[IAsyncGroupRepository] = None, cache: Optional[GroupCache] = None):
+        self.repository = repository or AsyncGroupRepository()
+        self.cache = cache or GroupCache()
+
+    async def _get_or_load(self, cache_key: CacheKey, load: Callable[[], Any]) -> Any:
+        key, value = await self.cache.alookup(cache_key)
+        if value is not None:
+            return value
+
+        value = await load()
+        await self.cache.aset(key, value)
+
+        return value
+
+    async def save_group(self, group: GroupDTO) -> Optional[GroupReturn]:
+        ret = await self.repository.save_group(group)
+
+        # The owner joins the group as its first member
+        if ret:
+            await self.cache.ainvalidate(
+                self.cache.members_namespace(ret.id), self.cache.user_namespace(ret.owner_id))
+
+        return ret
+
+    async def get_group(self, group_id: str) -> Optional[GroupReturn]:
+        return await self._get_or_load(
+            self.cache.group_key(group_id),
+            lambda: self.repository.get_group(group_id)
+        )
+
+    async def get_groups(self, group_ids: list[str]) -> list[GroupReturn]:
+        return await self.repository.get_groups(group_ids)
+
+    async def group_exists(self, group_id: str) -> bool:
+        return await self._get_or_load(
+            self.cache.exists_key(group_id),
+            lambda: self.repository.group_exists(group_id)
+        )
+
+    async def get_group_aggregate(self, group_id: str, include_members: bool = False) -> Optional[GroupReturn]:
+        return await self._get_or_load(
+            self.cache.aggregate_key(group_id, include_members),
+            lambda: self.repository.get_group_aggregate(
+                group_id, include_members)
+        )
+
+    async def get_user_groups(self, user_id: str) -> list[GroupReturn]:
+        return await self.repository.get_user_groups(user_id)
+
+    async def save_member(self, group_id: str, user_id: str) -> None:
+        try:
+            return await self.repository.save_member(group_id, user_id)
+        finally:
+            await self.cache.ainvalidate(
+                self.cache.members_namespace(group_id), self.cache.user_namespace(user_id))
+
+    async def get_group_members(self, group_id: str) -> list[Member]:
+        return await self._get_or_load(
+            self.cache.members_key(group_id),
+            lambda: self.repository.get_group_members(group_id)
+        )
+
+    async def get_members_by_group_ids(self, group_ids: list[str]) -> dict[str, list[Member]]:
+        return await self.repository.get_members_by_group_ids(group_ids)
+
+    async def get_member_counts(self, group_ids: list[str]) -> dict[str, int]:
+        return await self.repository.get_member_counts(group_ids)
+
+    async def save_routine(self, group_id: str, routine: RoutineDTO) -> None:
+        try:
+            return await self.repository.save_routine(group_id, routine)
+        finally:
+            await self.cache.ainvalidate(self.cache.routines_namespace(group_id))
+
+    async def get_routines(self, group_id: str) -> list[RoutineReturn]:
+        return await self._get_or_load(
+            self.cache.routines_key(group_id),
+            lambda: self.repository.get_routines(group_id)
+        )
+
+    async def get_routines_by_group_ids(self, group_ids: list[str]) -> dict[str, list[RoutineReturn]]:
+        return await self.repository.get_routines_by_group_ids(group_ids)
+
+    async def get_user_groups_routines_schedules(self, users: list[str]) -> list[Schedule]:
+        return await self.repository.get_user_groups_routines_schedules(users)
+
+    async def find_members_colliding_routine(self, users: list[str], schedule: Schedule) -> Optional[Schedule]:
+        return await self.repository.find_members_colliding_routine(users, schedule)
+
+    async def save_event(self, group_id: str, event: EventDTO) -> Optional[EventReturn]:
+        return await self.repository.save_event(group_id, event)
+
+    async def get_event(self, group_id: str, event_id: str) -> Optional[EventReturn]:
+        return await self.repository.get_event(group_id, event_id)
+
+    async def update_event(self, group_id: str, event_id: str, event: EventDTO) -> Optional[EventReturn]:
+        return await self.repository.update_event(group_id, event_id, event)
+
+    async def get_events(self, group_id: str, date_from: Optional[date] = None, date_to: Optional[date] = None, after: Optional[EventKey] = None, limit: Optional[int] = None) -> list[EventReturn]:
+        return await self.repository.get_events(group_id, date_from, date_to, after, limit)
+
+    async def get_groups_events(self, group_ids: list[str], date_from: date, limit: int) -> list[EventReturn]:
+        return await self.repository.get_groups_events(group_ids, date_from, limit)
+
+    async def delete_event(self, group_id: str, event_id: str) -> None:
+        poll = await self.repository.get_poll_by_event_id(event_id)
+
+        try:
+            return await self.repository.delete_event(group_id, event_id)
+        finally:
+            if poll:
+                await self.cache.ainvalidate(self.cache.poll_namespace(poll.id))
+
+    async def find_group_colliding_events(self, group_id: str, date: datetime, start_hour: int, end_hour: int) -> list[EventReturn]:
+        return await self.repository.find_group_colliding_events(group_id, date, start_hour, end_hour)
+
+    async def save_poll(self, group_id: str, creator_id: str, event_id: str, poll: PollDTO) -> str:
+        return await self.repository.save_poll(group_id, creator_id, event_id, poll)
+
+    async def save_poll_vote(self, vote: VoteDTO) -> None:
+        try:
+            return await self.repository.save_poll_vote(vote)
+        finally:
+            await self.cache.ainvalidate(self.cache.poll_namespace(vote.poll_id))
+
+    async def delete_poll_vote(self, poll_id: str, user_id: str) -> None:
+        try:
+            return await self.repository.delete_poll_vote(poll_id, user_id)
+        finally:
+            await self.cache.ainvalidate(self.cache.poll_namespace(poll_id))
+
+    async def replace_poll_vote(self, vote: VoteDTO) -> PollReturn:
+        try:
+            return await self.repository.replace_poll_vote(vote)
+        finally:
+            await self.cache.ainvalidate(self.cache.poll_namespace(vote.poll_id))
+
+    async def save_poll_votes(self, votes: list[VoteDTO]) -> int:
+        try:
+            return await self.repository.save_poll_votes(votes)
+        finally:
+            await self.cache.ainvalidate(
+                *{self.cache.poll_namespace(vote.poll_id) for vote in votes})
+
+    async def get_poll_user_votes(self, poll_id: str) -> dict[str, int]:
+        return await self.repository.get_poll_user_votes(poll_id)
+
+    async def get_poll_options(self, poll_id: str) -> list[Option]:
+        return await self._get_or_load(
+            self.cache.poll_options_key(poll_id),
+            lambda: self.repository.get_poll_options(poll_id)
+        )
+
+    async def get_poll_votes(self, poll_id: str) -> dict[int, int]:
+        return await self._get_or_load(
+            self.cache.poll_votes_key(poll_id),
+            lambda: self.repository.get_poll_votes(poll_id)
+        )
+
+    async def get_poll(self, poll_id: str) -> Optional[PollReturn]:
+        return await self._get_or_load(
+            self.cache.poll_key(poll_id),
+            lambda: self.repository.get_poll(poll_id)
+        )
+
+    async def get_poll_by_event_id(self, event_id: str) -> Optional[PollReturn]:
+        return await self.repository.get_poll_by_event_id(event_id)
+
+    async def get_polls_by_event_ids(self, event_ids: list[str]) -> dict[str, PollReturn]:
+        return await self.repository.get_polls_by_event_ids(event_ids)
+
+
+def default_group_repository(cache: Optional[GroupCache] = None) -> IGroupRepository:
+    if is_group_cache_enabled():
+        return CachedGroupRepository(cache=cache)
+
+    return GroupRepository()
+
+
+def default_async_group_repository(cache: Optional[GroupCache] = None) -> IAsyncGroupRepository:
+    if is_group_cache_enabled():
+        return CachedAsyncGroupRepository(cache=cache)
+
+    return AsyncGroupRepository()
+
+
+def default_dashboard_cache(cache: GroupCache) -> Optional[GroupCache]:
+    """Dashboards are cached per user only when DASHBOARD_CACHE_TTL_SECONDS is set"""
+    ttl = dashboard_cache_ttl()
+
+    if is_group_cache_enabled() and ttl is not None and ttl > 0:
+        return cache
+
+    return None
@@ -1,17 +1,21 @@
 from abc import ABCMeta, abstractmethod
-from tkinter import W
-from typing import Any, Optional
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
 from uuid import uuid4
-from sqlalchemy import Engine, text
+from sqlalchemy import Connection, Engine, bindparam, text
 from sqlalchemy.exc import IntegrityError
 from database.database import engine
-from models.errors.errors import EntityAlreadyExistsError, NotFoundError
-from models.event import EventDTO, EventReturn
+from database.unit_of_work import UnitOfWork
+from models.errors.errors import ConflictError, EntityAlreadyExistsError, NotFoundError
+from models.event import EventDTO, EventKey, EventReturn
 from models.group import GroupDTO, GroupReturn
 from models.member import Member
 from models.routine import RoutineDTO, RoutineReturn, Schedule
 from models.poll import Option, PollDTO, PollReturn, VoteDTO
-from datetime import datetime
+from utils.availability import week_hours
+from datetime import date, datetime
+
+EXCLUSION_VIOLATION = "23P01"
 
 
 class IGroupRepository(metaclass=ABCMeta):
@@ -23,6 +27,20 @@ class IGroupRepository(metaclass=ABCMeta):
     def get_group(self, group_id: str) -> Optional[GroupReturn]:
         pass
 
+    @abstractmethod
+    def get_groups(self, group_ids: list[str]) -> list[GroupReturn]:
+        """Get many groups, missing ones are skipped"""
+        pass
+
+    @abstractmethod
+    def group_exists(self, group_id: str) -> bool:
+        pass
+
+    @abstractmethod
+    def get_group_aggregate(self, group_id: str, include_members: bool = False) -> Optional[GroupReturn]:
+        """Get a group with its routines, member count and optionally its members"""
+        pass
+
     @abstractmethod
     def get_user_groups(self, user_id: str) -> list[GroupReturn]:
         pass
@@ -35,6 +53,16 @@ class IGroupRepository(metaclass=ABCMeta):
     def get_group_members(self, group_id: str) -> list[Member]:
         pass
 
+    @abstractmethod
+    def get_members_by_group_ids(self, group_ids: list[str]) -> dict[str, list[Member]]:
+        """Get the members of many groups, by group id"""
+        pass
+
+    @abstractmethod
+    def get_member_counts(self, group_ids: list[str]) -> dict[str, int]:
+        """Get the number of members of many groups, by group id"""
+        pass
+
     @abstractmethod
     def save_routine(self, group_id: str, routine: RoutineDTO) -> None:
         pass
@@ -43,12 +71,32 @@ class IGroupRepository(metaclass=ABCMeta):
     def get_routines(self, group_id: str) -> list[RoutineReturn]:
         pass
 
+    @abstractmethod
+    def get_routines_by_group_ids(self, group_ids: list[str]) -> dict[str, list[RoutineReturn]]:
+        """Get the routines of many groups, by group id"""
+        pass
+
     @abstractmethod
     def get_user_groups_routines_schedules(self, users: list[str]) -> list[Schedule]:
+        """Get the routines of the groups of the users, once each"""
+        pass
+
+    @abstractmethod
+    def find_members_colliding_routine(self, users: list[str], schedule: Schedule) -> Optional[Schedule]:
+        """
+        Get the earliest routine of the groups of the users that shares an
+        hour with the schedule, if any
+        """
         pass
 
     @abstractmethod
     def save_event(self, group_id: str, event: EventDTO) -> Optional[EventReturn]:
+        """
+        Save a new event for a group
+
+        Raises:
+            ConflictError: If it overlaps another event of the group
+        """
         pass
 
     @abstractmethod
@@ -57,10 +105,25 @@ class IGroupRepository(metaclass=ABCMeta):
 
     @abstractmethod
     def update_event(self, group_id: str, event_id: str, event: EventDTO) -> Optional[EventReturn]:
+        """
+        Update an existing event
+
+        Raises:
+            ConflictError: If it would overlap another event of the group
+        """
         pass
 
     @abstractmethod
-    def get_events(self, group_id: str) -> list[EventReturn]:
+    def get_events(self, group_id: str, date_from: Optional[date] = None, date_to: Optional[date] = None, after: Optional[EventKey] = None, limit: Optional[int] = None) -> list[EventReturn]:
+        """
+        Get the events of a group ordered by date, start hour and id,
+        optionally between two dates (both included) and after a given one
+        """
+        pass
+
+    @abstractmethod
+    def get_groups_events(self, group_ids: list[str], date_from: date, limit: int) -> list[EventReturn]:
+        """Get the first events of many groups from a date, in listing order"""
         pass
 
     @abstractmethod
@@ -86,6 +149,33 @@ class IGroupRepository(metaclass=ABCMeta):
         """Delete a user's vote for a poll option"""
         pass
 
+    @abstractmethod
+    def replace_poll_vote(self, vote: VoteDTO) -> PollReturn:
+        """
+        Replace the user's vote in the poll and get the poll with the
+        resulting vote counts.
+
+        Raises:
+            NotFoundError: If the poll or the voted option does not exist
+        """
+        pass
+
+    @abstractmethod
+    def save_poll_votes(self, votes: list[VoteDTO]) -> int:
+        """
+        Upsert many votes at once, at most one per poll and user. Votes for
+        options that no longer exist are dropped.
+
+        Returns:
+            int: The number of votes written
+        """
+        pass
+
+    @abstractmethod
+    def get_poll_user_votes(self, poll_id: str) -> dict[str, int]:
+        """Get the option voted by each user in a poll"""
+        pass
+
     @abstractmethod
     def get_poll_options(self, poll_id: str) -> list[Option]:
         """Get all options for a poll"""
@@ -106,10 +196,34 @@ class IGroupRepository(metaclass=ABCMeta):
         """Get a poll associated with a specific event"""
         pass
 
+    @abstractmethod
+    def get_polls_by_event_ids(self, event_ids: list[str]) -> dict[str, PollReturn]:
+        """Get the polls of many events, by event id"""
+        pass
+
 
 class GroupRepository(IGroupRepository):
-    def __init__(self, engine_: Optional[Engine] = None):
+    def __init__(self, engine_: Optional[Engine] = None, connection_: Optional[Connection] = None):
         self.engine = engine_ or engine
+        self.connection = connection_
+
+    @contextmanager
+    def _begin(self) -> Iterator[Connection]:
+        """
+        Yield the bound connection or the active unit of work connection,
+        otherwise begin a new transaction for this call only
+        """
+        if self.connection is not None:
+            yield self.connection
+            return
+
+        unit_of_work = UnitOfWork.current(self.engine)
+        if unit_of_work:
+            yield unit_of_work.connection()
+            return
+
+        with self.engine.begin() as connection:
+            yield connection
 
     def save_group(self, group: GroupDTO) -> Optional[GroupReturn]:
         query = text(
@@ -129,7 +243,7 @@ class GroupRepository(IGroupRepository):
 
         ret = None
 
-        with self.engine.begin() as connection:
+        with self._begin() as connection:
             ret = connection.execute(query, params).fetchone()
 
         self.save_member(params["id"], group.owner_id)
@@ -150,7 +264,85 @@ class GroupRepository(IGroupRepository):
             "group_id": group_id
         }
 
-        with self.engine.begin() as connection:
+        with self._begin() as connection:
+            result = connection.execute(query, params).fetchone()
+
+        if result:
+            return GroupReturn(**result._mapping)
+
+    def get_groups(self, group_ids: list[str]) -> list[GroupReturn]:
+        if not group_ids:
+            return []
+
+        query = text(
+            """
+            SELECT id, name, description, owner_id, created_at, updated_at
+            FROM groups
+            WHERE id = ANY(:group_ids)
+            """
+        )
+
+        params: dict[str, Any] = {
+            "group_ids": list(group_ids)
+        }
+
+        with self._begin() as connection:
+            result = connection.execute(query, params).fetchall()
+
+        return [GroupReturn(**row._mapping) for row in result]
+
+    def group_exists(self, group_id: str) -> bool:
+        query = text(
+            """
+            SELECT EXISTS (SELECT 1 FROM groups WHERE id = :group_id)
+            """
+        )
+
+        params: dict[str, Any] = {
+            "group_id": group_id
+        }
+
+        with self._begin() as connection:
+            return bool(connection.execute(query, params).scalar())
+
+    def get_group_aggregate(self, group_id: str, include_members: bool = False) -> Optional[GroupReturn]:
+        """Get a group with its routines, member count and optionally its members"""
+        query = text(
+            """
+            SELECT g.id, g.name, g.description, g.owner_id, g.created_at, g.updated_at,
+                COALESCE(r.routines, '[]'::json) AS routines,
+                m.members, m.member_count
+            FROM groups g
+            LEFT JOIN LATERAL (
+                SELECT json_agg(routine) AS routines
+                FROM (
+                    SELECT id, group_id, name, description, day, start_hour, end_hour, created_at, updated_at, creator_id
+                    FROM group_routines
+                    WHERE group_id = g.id
+                ) routine
+            ) r ON TRUE
+            LEFT JOIN LATERAL (
+                SELECT
+                    CASE WHEN :include_members
+                        THEN COALESCE(json_agg(member), '[]'::json)
+                    END AS members,
+                    COUNT(*) AS member_count
+                FROM (
+                    SELECT user_id, created_at
+                    FROM group_members
+                    WHERE group_id = g.id
+                ) member
+            ) m ON TRUE
+            WHERE g.id = :group_id
+            """
+        )
+
+        params: dict[str, Any] = {
+            "group_id": group_id,
+            "include_members": include_members
+        }
+
+        with self._begin() as connection:
             result = connection.execute(query, params).fetchone()
 
         if result:
@@ -170,7 +362,7 @@ class GroupRepository(IGroupRepository):
             "user_id": user_id
         }
 
-        with self.engine.begin() as connection:
+        with self._begin() as connection:
             result = connection.execute(query, params).fetchall()
 
         return [GroupReturn(**row._mapping) for row in result]
@@ -189,7 +381,7 @@ class GroupRepository(IGroupRepository):
         }
 
         try:
-            with self.engine.begin() as connection:
+            with self._begin() as connection:
                 connection.execute(query, params)
 
         except IntegrityError:
@@ -211,11 +403,63 @@ class GroupRepository(IGroupRepository):
             "group_id": group_id
         }
 
-        with self.engine.begin() as connection:
+        with self._begin() as connection:
             result = connection.execute(query, params).fetchall()
 
         return [Member(**row._mapping) for row in result]
 
+    def get_members_by_group_ids(self, group_ids: list[str]) -> dict[str, list[Member]]:
+        if not group_ids:
+            return {}
+
+        query = text(
+            """
+            SELECT group_id, user_id, created_at
+            FROM group_members
+            WHERE group_id = ANY(:group_ids)
+            """
+        )
+
+        params: dict[str, Any] = {
+            "group_ids": list(group_ids)
+        }
+
+        with self._begin() as connection:
+            result = connection.execute(query, params).fetchall()
+
+        members: dict[str, list[Member]] = {
+            group_id: [] for group_id in group_ids}
+        for row in result:
+            members[row.group_id].append(
+                Member(user_id=row.user_id, created_at=row.created_at))
+
+        return members
+
+    def get_member_counts(self, group_ids: list[str]) -> dict[str, int]:
+        if not group_ids:
+            return {}
+
+        query = text(
+            """
+            SELECT group_id, COUNT(*) AS member_count
+            FROM group_members
+            WHERE group_id = ANY(:group_ids)
+            GROUP BY group_id
+            """
+        )
+
+        params: dict[str, Any] = {
+            "group_ids": list(group_ids)
+        }
+
+        with self._begin() as connection:
+            result = connection.execute(query, params).fetchall()
+
+        counts = {group_id: 0 for group_id in group_ids}
+        counts.update({row.group_id: row.member_count for row in result})
+
+        return counts
+
     def save_routine(self, group_id: str, routine: RoutineDTO) -> None:
         query = text(
             """
@@ -235,7 +479,7 @@ class GroupRepository(IGroupRepository):
             "creator_id": routine.creator_id
         }
 
-        with self.engine.begin() as connection:
+        with self._begin() as connection:
             connection.execute(query, params)
 
     def get_routines(self, group_id: str) -> list[RoutineReturn]:
@@ -251,36 +495,91 @@ class GroupRepository(IGroupRepository):
             "group_id": group_id
         }
 
-        with self.engine.begin() as connection:
+        with self._begin() as connection:
             result = connection.execute(query, params).fetchall()
 
         return [RoutineReturn(**row._mapping) for row in result]
 
-    def get_user_groups_routines_schedules(self, users: list[str]) -> list[Schedule]:
+    def get_routines_by_group_ids(self, group_ids: list[str]) -> dict[str, list[RoutineReturn]]:
+        if not group_ids:
+            return {}
+
         query = text(
             """
-            SELECT day, start_hour, end_hour
-            FROM group_members gm
-            JOIN group_routines gr ON gm.group_id = gr.group_id
-            WHERE creator_id IN :users
+            SELECT id, group_id, name, description, day, start_hour, end_hour, created_at, updated_at, creator_id
+            FROM group_routines
+            WHERE group_id = ANY(:group_ids)
             """
         )
 
         params: dict[str, Any] = {
-            "users": tuple(users)
+            "group_ids": list(group_ids)
         }
 
-        with self.engine.begin() as connection:
+        with self._begin() as connection:
+            result = connection.execute(query, params).fetchall()
+
+        routines: dict[str, list[RoutineReturn]] = {
+            group_id: [] for group_id in group_ids}
+        for row in result:
+            routines[row.group_id].append(RoutineReturn(**row._mapping))
+
+        return routines
+
+    def get_user_groups_routines_schedules(self, users: list[str]) -> list[Schedule]:
+        # Maintained by triggers on group_routines and group_members
+        query = text(
+            """
+            SELECT DISTINCT ON (routine_id) day, start_hour, end_hour
+            FROM user_busy_slots
+            WHERE user_id IN :users
+            ORDER BY routine_id
+            """
+        ).bindparams(bindparam("users", expanding=True))
+
+        params: dict[str, Any] = {
+            "users": list(users)
+        }
+
+        with self._begin() as connection:
             result = connection.execute(query, params).fetchall()
 
         return [Schedule(**row._mapping) for row in result]
 
+    def find_members_colliding_routine(self, users: list[str], schedule: Schedule) -> Optional[Schedule]:
+        start, end = week_hours(schedule)
+
+        query = text(
+            """
+            SELECT day, start_hour, end_hour
+            FROM user_busy_slots
+            WHERE user_id IN :users
+            AND week_hours && int4range(:start, :end)
+            ORDER BY week_hours
+            LIMIT 1
+            """
+        ).bindparams(bindparam("users", expanding=True))
+
+        params: dict[str, Any] = {
+            "users": list(users),
+            "start": start,
+            "end": end
+        }
+
+        with self._begin() as connection:
+            result = connection.execute(query, params).fetchone()
+
+        if result:
+            return Schedule(**result._mapping)
+
     def save_event(self, group_id: str, event: EventDTO) -> Optional[EventReturn]:
         """Save a new event for a group"""
+        # The exclusion constraint rejects overlapping events, even concurrent ones
         query = text(
             """
             INSERT INTO group_events (id, group_id, creator_id, name, description, date, start_hour, end_hour)
             VALUES (:id, :group_id, :creator_id, :name, :description, :date, :start_hour, :end_hour)
+            ON CONFLICT ON CONSTRAINT group_events_no_overlap DO NOTHING
             RETURNING id, group_id, creator_id, name, description, date, start_hour, end_hour, created_at, updated_at
             """
         )
@@ -296,11 +595,23 @@ class GroupRepository(IGroupRepository):
             "end_hour": event.end_hour
         }
 
-        with self.engine.begin() as connection:
+        with self._begin() as connection:
             result = connection.execute(query, params).fetchone()
 
-        if result:
-            return EventReturn(**result._mapping)
+        if not result:
+            raise self._event_conflict(group_id, event)
+
+        return EventReturn(**result._mapping)
+
+    def _event_conflict(self, group_id: str, event: EventDTO) -> ConflictError:
+        colliding_events = self.find_group_colliding_events(
+            group_id, event.date, event.start_hour, event.end_hour
+        )
+
+        return ConflictError(
+            title="Conflict in event schedules",
+            detail=f"Event collides with existing events: {colliding_events}"
+        )
 
     def get_event(self, group_id: str, event_id: str) -> Optional[EventReturn]:
         """Get a specific event by ID for a group"""
@@ -317,7 +628,7 @@ class GroupRepository(IGroupRepository):
             "event_id": event_id
         }
 
-        with self.engine.begin() as connection:
+        with self._begin() as connection:
             result = connection.execute(query, params).fetchone()
 
         if result:
@@ -350,29 +661,83 @@ class GroupRepository(IGroupRepository):
             "end_hour": event.end_hour
         }
 
-        with self.engine.begin() as connection:
-            result = connection.execute(query, params).fetchone()
+        try:
+            with self._begin() as connection:
+                result = connection.execute(query, params).fetchone()
+
+        except IntegrityError as e:
+            # The transaction is aborted, the colliding events cannot be read
+            if getattr(e.orig, "pgcode", None) == EXCLUSION_VIOLATION:
+                raise ConflictError(
+                    title="Conflict in event schedules",
+                    detail="Event collides with existing events"
+                )
+            raise
 
         if result:
             return EventReturn(**result._mapping)
         return None
 
-    def get_events(self, group_id: str) -> list[EventReturn]:
-        """Get all events for a group"""
+    def get_events(self, group_id: str, date_from: Optional[date] = None, date_to: Optional[date] = None, after: Optional[EventKey] = None, limit: Optional[int] = None) -> list[EventReturn]:
+        conditions = ["group_id = :group_id"]
+        params: dict[str, Any] = {
+            "group_id": group_id
+        }
+
+        if date_from is not None:
+            conditions.append("date >= :date_from")
+            params["date_from"] = date_from
+
+        if date_to is not None:
+            conditions.append("date <= :date_to")
+            params["date_to"] = date_to
+
+        # Keyset pagination, a range scan of the index whatever the page
+        if after is not None:
+            conditions.append(
+                "(date, start_hour, id) > (:after_date, :after_start_hour, :after_id)")
+            params.update(after_date=after.date,
+                          after_start_hour=after.start_hour, after_id=after.id)
+
+        query = text(
+            f"""
+            SELECT id, group_id, creator_id, name, description, date, start_hour, end_hour, created_at, updated_at
+            FROM group_events
+            WHERE {" AND ".join(conditions)}
+            ORDER BY date, start_hour, id
+            {"LIMIT :limit" if limit is not None else ""}
+            """
+        )
+
+        if limit is not None:
+            params["limit"] = limit
+
+        with self._begin() as connection:
+            result = connection.execute(query, params).fetchall()
+
+        return [EventReturn(**row._mapping) for row in result]
+
+    def get_groups_events(self, group_ids: list[str], date_from: date, limit: int) -> list[EventReturn]:
+        if not group_ids:
+            return []
+
         query = text(
             """
             SELECT id, group_id, creator_id, name, description, date, start_hour, end_hour, created_at, updated_at
             FROM group_events
-            WHERE group_id = :group_id
-            ORDER BY date, start_hour
+            WHERE group_id = ANY(:group_ids) AND date >= :date_from
+            ORDER BY date, start_hour, id
+            LIMIT :limit
             """
         )
 
         params: dict[str, Any] = {
-            "group_id": group_id
+            "group_ids": list(group_ids),
+            "date_from": date_from,
+            "limit": limit
         }
 
-        with self.engine.begin() as connection:
+        with self._begin() as connection:
             result = connection.execute(query, params).fetchall()
 
         return [EventReturn(**row._mapping) for row in result]
@@ -391,7 +756,7 @@ class GroupRepository(IGroupRepository):
             "event_id": event_id
         }
 
-        with self.engine.begin() as connection:
+        with self._begin() as connection:
             connection.execute(query, params)
 
     def find_group_colliding_events(self, group_id: str, date: datetime, start_hour: int, end_hour: int) -> list[EventReturn]:
@@ -414,7 +779,7 @@ class GroupRepository(IGroupRepository):
             "end_hour": end_hour
         }
 
-        with self.engine.begin() as connection:
+        with self._begin() as connection:
             result = connection.execute(query, params).fetchall()
 
         return [EventReturn(**row._mapping) for row in result] if result else []
@@ -447,7 +812,7 @@ class GroupRepository(IGroupRepository):
         )
 
         try:
-            with self.engine.begin() as connection:
+            with self._begin() as connection:
                 connection.execute(query, params)
 
                 # Insert options
@@ -468,6 +833,138 @@ class GroupRepository(IGroupRepository):
                 detail=f"Duplicate option in poll data"
             ) from e
 
+    def replace_poll_vote(self, vote: VoteDTO) -> PollReturn:
+        """
+        Replace the user's vote in the poll and get the poll with the
+        resulting vote counts, in one statement.
+
+        The option is checked by joining it, and the vote is upserted on the
+        (poll_id, user_id) unique key, so concurrent changes of one user's
+        vote cannot leave two votes. Every statement of the query sees the
+        same snapshot, so the counts are the stored tallies adjusted by the
+        vote change (the tally trigger updates them at the end).
+        """
+        query = text(
+            """
+            WITH voted_option AS (
+                SELECT id
+                FROM poll_options
+                WHERE poll_id = :poll_id AND id = :option_id
+            ),
+            previous AS (
+                SELECT option_id
+                FROM poll_votes
+                WHERE poll_id = :poll_id AND user_id = :user_id
+            ),
+            vote AS (
+                INSERT INTO poll_votes (poll_id, user_id, option_id)
+                SELECT :poll_id, :user_id, :vote_option_id
+                FROM voted_option
+                ON CONFLICT (poll_id, user_id)
+                DO UPDATE SET option_id = EXCLUDED.option_id, created_at = CURRENT_TIMESTAMP
+                RETURNING option_id
+            )
+            SELECT
+                p.question,
+                p.created_at AS poll_created_at,
+                o.id,
+                o.option_text,
+                o.created_at,
+                o.vote_count
+                    - (SELECT COUNT(*) FROM previous p, vote v
+                       WHERE p.option_id = o.id::text AND p.option_id <> v.option_id)
+                    + (SELECT COUNT(*) FROM vote v
+                       WHERE v.option_id = o.id::text
+                       AND NOT EXISTS (SELECT 1 FROM previous p WHERE p.option_id = v.option_id))
+                    AS vote_count,
+                EXISTS (SELECT 1 FROM vote) AS voted
+            FROM poll p
+            JOIN poll_options o ON o.poll_id = p.id
+            WHERE p.id = :poll_id
+            """
+        )
+
+        params: dict[str, Any] = {
+            "poll_id": vote.poll_id,
+            "user_id": vote.user_id,
+            "option_id": vote.option_id,
+            "vote_option_id": str(vote.option_id)
+        }
+
+        with self._begin() as connection:
+            result = connection.execute(query, params).fetchall()
+
+        if not result:
+            raise NotFoundError(f"Poll with id {vote.poll_id} not found")
+
+        if not result[0].voted:
+            raise NotFoundError(
+                detail=f"Option with id {vote.option_id} does not exist in poll {vote.poll_id}"
+            )
+
+        return PollReturn(
+            id=vote.poll_id,
+            question=result[0].question,
+            options=[
+                Option(id=row.id, text=row.option_text,
+                       created_at=row.created_at)
+                for row in result
+            ],
+            votes={int(row.id): row.vote_count for row in result if row.vote_count > 0},
+            created_at=result[0].poll_created_at
+        )
+
+    def save_poll_votes(self, votes: list[VoteDTO]) -> int:
+        """
+        Upsert many votes in one multi-row statement, at most one per poll
+        and user. Votes for options that no longer exist are dropped.
+        """
+        if not votes:
+            return 0
+
+        query = text(
+            """
+            INSERT INTO poll_votes (poll_id, user_id, option_id)
+            SELECT v.poll_id, v.user_id, v.option_id
+            FROM unnest(
+                CAST(:poll_ids AS VARCHAR[]),
+                CAST(:user_ids AS VARCHAR[]),
+                CAST(:option_ids AS VARCHAR[])
+            ) AS v (poll_id, user_id, option_id)
+            JOIN poll_options o ON o.poll_id = v.poll_id AND o.id::text = v.option_id
+            ON CONFLICT (poll_id, user_id)
+            DO UPDATE SET option_id = EXCLUDED.option_id, created_at = CURRENT_TIMESTAMP
+            """
+        )
+
+        params: dict[str, Any] = {
+            "poll_ids": [vote.poll_id for vote in votes],
+            "user_ids": [vote.user_id for vote in votes],
+            "option_ids": [str(vote.option_id) for vote in votes]
+        }
+
+        with self._begin() as connection:
+            return connection.execute(query, params).rowcount
+
+    def get_poll_user_votes(self, poll_id: str) -> dict[str, int]:
+        """Get the option voted by each user in a poll"""
+        query = text(
+            """
+            SELECT user_id, option_id
+            FROM poll_votes
+            WHERE poll_id = :poll_id
+            """
+        )
+
+        params: dict[str, Any] = {
+            "poll_id": poll_id
+        }
+
+        with self._begin() as connection:
+            result = connection.execute(query, params).fetchall()
+
+        return {row.user_id: int(row.option_id) for row in result}
+
     def get_poll_options(self, poll_id: str) -> list[Option]:
         """Get all options for a poll"""
         query = text(
@@ -482,7 +979,7 @@ class GroupRepository(IGroupRepository):
             "poll_id": poll_id
         }
 
-        with self.engine.begin() as connection:
+        with self._begin() as connection:
             result = connection.execute(query, params).fetchall()
 
         return [Option(id=row.id, text=row.option_text, created_at=row.created_at) for row in result]
@@ -501,10 +998,10 @@ class GroupRepository(IGroupRepository):
         params: dict[str, Any] = {
             "poll_id": vote.poll_id,
             "user_id": vote.user_id,
-            "option_id": vote.option_id
+            "option_id": str(vote.option_id)
         }
 
-        with self.engine.begin() as connection:
+        with self._begin() as connection:
             connection.execute(query, params)
 
     def delete_poll_vote(self, poll_id: str, user_id: str) -> None:
@@ -521,17 +1018,17 @@ class GroupRepository(IGroupRepository):
             "user_id": user_id
         }
 
-        with self.engine.begin() as connection:
+        with self._begin() as connection:
             connection.execute(query, params)
 
     def get_poll_votes(self, poll_id: str) -> dict[int, int]:
         """Get vote counts for each option in a poll"""
+        # Tallies are kept up to date by the poll_votes_tally trigger
         query = text(
             """
-            SELECT option_id, COUNT(*) as vote_count
-            FROM poll_votes
-            WHERE poll_id = :poll_id
-            GROUP BY option_id
+            SELECT id, vote_count
+            FROM poll_options
+            WHERE poll_id = :poll_id AND vote_count > 0
             """
         )
 
@@ -539,11 +1036,11 @@ class GroupRepository(IGroupRepository):
             "poll_id": poll_id
         }
 
-        with self.engine.begin() as connection:
+        with self._begin() as connection:
             result = connection.execute(query, params).fetchall()
 
         # Convert to dictionary of option_id -> count
-        return {int(row.option_id): row.vote_count for row in result}
+        return {int(row.id): row.vote_count for row in result}
 
     def get_poll(self, poll_id: str) -> Optional[PollReturn]:
         """Get a poll with its options and votes"""
@@ -561,13 +1058,13 @@ class GroupRepository(IGroupRepository):
 
         options_query = text(
             """
-                SELECT id, option_text, created_at
+                SELECT id, option_text, vote_count, created_at
                 FROM poll_options
                 WHERE poll_id = :poll_id
                 """
         )
 
-        with self.engine.begin() as connection:
+        with self._begin() as connection:
             poll_result = connection.execute(query, params).fetchone()
 
             if not poll_result:
@@ -586,8 +1083,10 @@ class GroupRepository(IGroupRepository):
                 ) for row in options_result
             ]
 
-            # Get vote counts
-            votes = self.get_poll_votes(poll_id)
+            # Vote counts come with the options
+            votes = {
+                int(row.id): row.vote_count for row in options_result if row.vote_count > 0
+            }
 
             # Construct the PollReturn object
             return PollReturn(
@@ -614,7 +1113,7 @@ class GroupRepository(IGroupRepository):
         }
 
         poll_id: str = ""
-        with self.engine.begin() as connection:
+        with self._begin() as connection:
             poll_id_result = connection.execute(
                 poll_id_query, params).fetchone()
 
@@ -625,3 +1124,60 @@ class GroupRepository(IGroupRepository):
 
         # Now get the poll details using the existing get_poll method
         return self.get_poll(poll_id)
+
+    def get_polls_by_event_ids(self, event_ids: list[str]) -> dict[str, PollReturn]:
+        """
+        Get the polls of many events, by event id, with their options and
+        votes in two queries whatever the number of events
+        """
+        if not event_ids:
+            return {}
+
+        query = text(
+            """
+            SELECT id, event_id, question, created_at
+            FROM poll
+            WHERE event_id = ANY(:event_ids)
+            """
+        )
+
+        options_query = text(
+            """
+            SELECT poll_id, id, option_text, vote_count, created_at
+            FROM poll_options
+            WHERE poll_id = ANY(:poll_ids)
+            ORDER BY poll_id, id
+            """
+        )
+
+        with self._begin() as connection:
+            polls_result = connection.execute(
+                query, {"event_ids": list(event_ids)}).fetchall()
+
+            if not polls_result:
+                return {}
+
+            options_result = connection.execute(
+                options_query, {"poll_ids": [row.id for row in polls_result]}).fetchall()
+
+        options: dict[str, list[Any]] = {}
+        for row in options_result:
+            options.setdefault(row.poll_id, []).append(row)
+
+        return {
+            row.event_id: PollReturn(
+                id=row.id,
+                question=row.question,
+                options=[
+                    Option(id=option.id, text=option.option_text,
+                           created_at=option.created_at)
+                    for option in options.get(row.id, [])
+                ],
+                votes={
+                    int(option.id): option.vote_count
+                    for option in options.get(row.id, []) if option.vote_count > 0
+                },
+                created_at=row.created_at
+            )
+            for row in polls_result
+        }
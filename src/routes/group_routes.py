@@ -1,18 +1,31 @@
+import asyncio
+from datetime import date
 from typing import Optional
-from fastapi import APIRouter, Path, Query, Request, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, Path, Query, Request, WebSocket, status
+from fastapi.responses import JSONResponse, StreamingResponse
 
+from container import group_controller
 from controller.group_controller import GroupController
+from models.availability import SlotSuggestion
+from models.dashboard import Dashboard
+from models.errors.errors import CustomHTTPException
 from models.event import EventDTO, EventReturn
 from models.group import GroupDTO, GroupReturn
 from models.member import Member
 from models.poll import PollReturn, VoteDTO
-from models.response import CustomResponse, ErrorDTO
+from models.response import CustomResponse, ErrorDTO, PageResponse
 from models.routine import PostRoutineParams, RoutineDTO, RoutineReturn
-from tests.test_jwt import auth_header
+from service.poll_events import poll_stream_heartbeat
+from utils.serialization import ResponseEncoder
 
 router = APIRouter()
 
+# List endpoints write their rows straight to JSON bytes
+GROUPS = ResponseEncoder(CustomResponse[list[GroupReturn]])
+MEMBERS = ResponseEncoder(CustomResponse[list[Member]])
+ROUTINES = ResponseEncoder(CustomResponse[list[RoutineReturn]])
+EVENTS_PAGE = ResponseEncoder(PageResponse[EventReturn])
+
 
 @router.post(
     "/groups",
@@ -45,8 +58,56 @@ router = APIRouter()
         },
     }
 )
-def post_group(group: GroupDTO) -> CustomResponse[GroupReturn]:
-    return GroupController().post_group(group)
+async def post_group(group: GroupDTO, controller: GroupController = Depends(group_controller)) -> CustomResponse[GroupReturn]:
+    return await controller.post_group(group)
+
+
+@router.get(
+    "/groups",
+    summary="Get many groups by id",
+    description="Groups in the order of `ids`, unknown ones are skipped. Each included relation is loaded for every group at once.",
+    status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_200_OK: {
+            "model": CustomResponse[list[GroupReturn]],
+            "description": "Groups retrieved successfully"
+        },
+        status.HTTP_400_BAD_REQUEST: {
+            "model": ErrorDTO,
+            "description": "Bad request"
+        },
+        status.HTTP_401_UNAUTHORIZED: {
+            "model": ErrorDTO,
+            "description": "User unauthorized"
+        },
+        status.HTTP_403_FORBIDDEN: {
+            "model": ErrorDTO,
+            "description": "No authorization provided"
+        },
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {
+            "model": ErrorDTO,
+            "description": "Unprocessable entity, body must match the schema"
+        },
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {
+            "model": ErrorDTO,
+            "description": "Internal server error"
+        },
+    }
+)
+async def get_groups(
+    ids: str = Query(
+        ...,
+        description="Comma separated IDs of the groups, at most 100",
+        examples=["123e4567-e89b-12d3-a456-426614174000,123e4567-e89b-12d3-a456-426614174001"],
+    ),
+    include: str = Query(
+        "routines,member_count",
+        description="Comma separated relations to include in each group: routines, members, member_count",
+        examples=["routines,members"],
+    ),
+    controller: GroupController = Depends(group_controller)
+) -> CustomResponse[list[GroupReturn]]:
+    return GROUPS(await controller.get_groups(ids, include))
 
 
 @router.get(
@@ -84,7 +145,7 @@ def post_group(group: GroupDTO) -> CustomResponse[GroupReturn]:
         },
     }
 )
-def get_group(
+async def get_group(
     group_id: str = Path(
         ...,
         description="ID of the group",
@@ -92,9 +153,10 @@ def get_group(
         title="UUID",
         min_length=36, max_length=36,
         pattern="^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$"
-    )
+    ),
+    controller: GroupController = Depends(group_controller)
 ) -> CustomResponse[GroupReturn]:
-    return GroupController().get_group(group_id)
+    return await controller.get_group(group_id)
 
 
 @router.get(
@@ -128,7 +190,7 @@ def get_group(
         },
     }
 )
-def get_user_groups(
+async def get_user_groups(
         user_id: str = Path(
             ...,
             description="ID of the user",
@@ -136,8 +198,66 @@ def get_user_groups(
             title="UUID",
             min_length=36, max_length=36,
             pattern="^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$"
-        )) -> CustomResponse[list[GroupReturn]]:
-    return GroupController().get_user_groups(user_id)
+        ),
+        include: Optional[str] = Query(
+            None,
+            description="Comma separated relations to include in each group: routines, members, member_count",
+            examples=["routines,member_count"],
+        ),
+    controller: GroupController = Depends(group_controller)
+) -> CustomResponse[list[GroupReturn]]:
+    return GROUPS(await controller.get_user_groups(user_id, include))
+
+
+@router.get(
+    "/users/{user_id}/dashboard",
+    summary="Get the dashboard of the user: {user_id}",
+    description="Groups of the user with their routines, and the next upcoming events of those groups with their polls and tallies.",
+    status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_200_OK: {
+            "model": CustomResponse[Dashboard],
+            "description": "Dashboard retrieved successfully"
+        },
+        status.HTTP_400_BAD_REQUEST: {
+            "model": ErrorDTO,
+            "description": "Bad request"
+        },
+        status.HTTP_401_UNAUTHORIZED: {
+            "model": ErrorDTO,
+            "description": "User unauthorized"
+        },
+        status.HTTP_403_FORBIDDEN: {
+            "model": ErrorDTO,
+            "description": "No authorization provided"
+        },
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {
+            "model": ErrorDTO,
+            "description": "Unprocessable entity, body must match the schema"
+        },
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {
+            "model": ErrorDTO,
+            "description": "Internal server error"
+        },
+    }
+)
+async def get_user_dashboard(
+    user_id: str = Path(
+        ...,
+        description="ID of the user",
+        examples=["123e4567-e89b-12d3-a456-426614174000"],
+        title="UUID",
+        min_length=36, max_length=36,
+        pattern="^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$"
+    ),
+    events: int = Query(
+        10,
+        ge=1, le=50,
+        description="Maximum number of upcoming events to return",
+    ),
+    controller: GroupController = Depends(group_controller)
+) -> CustomResponse[Dashboard]:
+    return await controller.get_user_dashboard(user_id, events)
 
 
 @router.post(
@@ -175,7 +295,7 @@ def get_user_groups(
         },
     }
 )
-def post_member(
+async def post_member(
     group_id: str = Path(
         ...,
         description="ID of the group",
@@ -190,9 +310,10 @@ def post_member(
         title="UUID",
         min_length=36, max_length=36,
         pattern="^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$"
-    )
+    ),
+    controller: GroupController = Depends(group_controller)
 ) -> CustomResponse[list[Member]]:
-    return GroupController().post_member(group_id, user_id)
+    return await controller.post_member(group_id, user_id)
 
 
 @router.get(
@@ -230,7 +351,7 @@ def post_member(
         },
     }
 )
-def get_group_members(
+async def get_group_members(
     group_id: str = Path(
         ...,
         description="ID of the group",
@@ -238,9 +359,10 @@ def get_group_members(
         title="UUID",
         min_length=36, max_length=36,
         pattern="^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$"
-    )
+    ),
+    controller: GroupController = Depends(group_controller)
 ) -> CustomResponse[list[Member]]:
-    return GroupController().get_group_members(group_id)
+    return MEMBERS(await controller.get_group_members(group_id))
 
 
 @router.post(
@@ -282,7 +404,7 @@ def get_group_members(
         },
     }
 )
-def post_group_routine(
+async def post_group_routine(
     request: Request,
     routine: RoutineDTO,
     group_id: str = Path(
@@ -300,14 +422,15 @@ def post_group_routine(
             that are incompatible with individual members' routines.
             In other words, if this parameter is true, this service does not check
             whether all members can meet this new schedule.
-        """)
+        """),
+    controller: GroupController = Depends(group_controller)
 ) -> CustomResponse[list[RoutineReturn]]:
     params: PostRoutineParams = PostRoutineParams(
         force_members=force_members, auth_header=getattr(
             request.state, "auth_header", "")
     )
 
-    return GroupController().post_group_routine(group_id, routine, params)
+    return await controller.post_group_routine(group_id, routine, params)
 
 
 @router.get(
@@ -345,7 +468,7 @@ def post_group_routine(
         },
     }
 )
-def get_group_routines(
+async def get_group_routines(
     group_id: str = Path(
         ...,
         description="ID of the group",
@@ -354,8 +477,76 @@ def get_group_routines(
         min_length=36, max_length=36,
         pattern="^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$"
     ),
+    controller: GroupController = Depends(group_controller)
 ) -> CustomResponse[list[RoutineReturn]]:
-    return GroupController().get_group_routines(group_id)
+    return ROUTINES(await controller.get_group_routines(group_id))
+
+
+@router.get(
+    "/groups/{group_id}/availability/suggestions",
+    summary="Get the best weekly slots for a new routine of group: {group_id}",
+    status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_200_OK: {
+            "model": CustomResponse[list[SlotSuggestion]],
+            "description": "Slots ranked by free members, best first"
+        },
+        status.HTTP_400_BAD_REQUEST: {
+            "model": ErrorDTO,
+            "description": "Bad request"
+        },
+        status.HTTP_401_UNAUTHORIZED: {
+            "model": ErrorDTO,
+            "description": "User unauthorized"
+        },
+        status.HTTP_403_FORBIDDEN: {
+            "model": ErrorDTO,
+            "description": "No authorization provided"
+        },
+        status.HTTP_404_NOT_FOUND: {
+            "model": ErrorDTO,
+            "description": "Group with id {group_id} not found"
+        },
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {
+            "model": ErrorDTO,
+            "description": "Unprocessable entity, body must match the schema"
+        },
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {
+            "model": ErrorDTO,
+            "description": "Internal server error"
+        },
+        status.HTTP_502_BAD_GATEWAY: {
+            "model": ErrorDTO,
+            "description": "Progress service failed"
+        },
+    }
+)
+async def get_availability_suggestions(
+    request: Request,
+    group_id: str = Path(
+        ...,
+        description="ID of the group",
+        examples=["123e4567-e89b-12d3-a456-426614174000"],
+        title="UUID",
+        min_length=36, max_length=36,
+        pattern="^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$"
+    ),
+    duration: int = Query(
+        1,
+        ge=1, le=23,
+        description="Length of the slots in hours",
+    ),
+    limit: int = Query(
+        5,
+        ge=1, le=50,
+        description="Maximum number of slots to return",
+    ),
+    controller: GroupController = Depends(group_controller)
+) -> CustomResponse[list[SlotSuggestion]]:
+    return await controller.get_availability_suggestions(
+        group_id, duration, limit, getattr(
+            request.state, "auth_header", "")
+    )
 
 
 @router.post(
@@ -397,7 +588,7 @@ def get_group_routines(
         },
     }
 )
-def post_group_event(
+async def post_group_event(
     event: EventDTO,
     group_id: str = Path(
         ...,
@@ -406,9 +597,10 @@ def post_group_event(
         title="UUID",
         min_length=36, max_length=36,
         pattern="^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$"
-    )
+    ),
+    controller: GroupController = Depends(group_controller)
 ) -> CustomResponse[EventReturn]:
-    return GroupController().post_group_event(group_id, event)
+    return await controller.post_group_event(group_id, event)
 
 
 @router.patch(
@@ -446,7 +638,7 @@ def post_group_event(
         },
     }
 )
-def patch_group_event(
+async def patch_group_event(
     event: EventDTO,
     group_id: str = Path(
         ...,
@@ -463,18 +655,20 @@ def patch_group_event(
         title="UUID",
         min_length=36, max_length=36,
         pattern="^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$"
-    )
+    ),
+    controller: GroupController = Depends(group_controller)
 ) -> CustomResponse[EventReturn]:
-    return GroupController().patch_group_event(group_id, event_id, event)
+    return await controller.patch_group_event(group_id, event_id, event)
 
 
 @router.get(
     "/groups/{group_id}/events",
     summary="Get all events for group: {group_id}",
+    description="Events ordered by date and start hour, upcoming ones unless `from` is given. Pass the `next_cursor` of a page as `cursor` to get the next one, and `include=poll` to get the poll of each event.",
     status_code=status.HTTP_200_OK,
     responses={
         status.HTTP_200_OK: {
-            "model": CustomResponse[list[EventReturn]],
+            "model": PageResponse[EventReturn],
             "description": "Events retrieved successfully"
         },
         status.HTTP_400_BAD_REQUEST: {
@@ -503,7 +697,7 @@ def patch_group_event(
         },
     }
 )
-def get_group_events(
+async def get_group_events(
     group_id: str = Path(
         ...,
         description="ID of the group",
@@ -511,9 +705,36 @@ def get_group_events(
         title="UUID",
         min_length=36, max_length=36,
         pattern="^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$"
-    )
-) -> CustomResponse[list[EventReturn]]:
-    return GroupController().get_group_events(group_id)
+    ),
+    date_from: Optional[date] = Query(
+        None,
+        alias="from",
+        description="First date of the events, today when omitted",
+        examples=["2025-01-01"],
+    ),
+    date_to: Optional[date] = Query(
+        None,
+        alias="to",
+        description="Last date of the events, included",
+        examples=["2025-12-31"],
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        description="next_cursor of the previous page",
+    ),
+    limit: int = Query(
+        50,
+        ge=1, le=200,
+        description="Maximum number of events to return",
+    ),
+    include: Optional[str] = Query(
+        None,
+        description="Comma separated relations to include in each event: poll",
+        examples=["poll"],
+    ),
+    controller: GroupController = Depends(group_controller)
+) -> PageResponse[EventReturn]:
+    return EVENTS_PAGE(await controller.get_group_events(group_id, date_from, date_to, cursor, limit, include))
 
 
 @router.get(
@@ -551,7 +772,7 @@ def get_group_events(
         },
     }
 )
-def get_group_event(
+async def get_group_event(
     group_id: str = Path(
         ...,
         description="ID of the group",
@@ -567,9 +788,10 @@ def get_group_event(
         title="UUID",
         min_length=36, max_length=36,
         pattern="^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$"
-    )
+    ),
+    controller: GroupController = Depends(group_controller)
 ) -> CustomResponse[EventReturn]:
-    return GroupController().get_group_event(group_id, event_id)
+    return await controller.get_group_event(group_id, event_id)
 
 
 @router.delete(
@@ -607,7 +829,7 @@ def get_group_event(
         },
     }
 )
-def delete_group_event(
+async def delete_group_event(
     group_id: str = Path(
         ...,
         description="ID of the group",
@@ -623,9 +845,10 @@ def delete_group_event(
         title="UUID",
         min_length=36, max_length=36,
         pattern="^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$"
-    )
+    ),
+    controller: GroupController = Depends(group_controller)
 ) -> CustomResponse[None]:
-    return GroupController().delete_group_event(group_id, event_id)
+    return await controller.delete_group_event(group_id, event_id)
 
 
 @router.put(
@@ -663,7 +886,7 @@ def delete_group_event(
         },
     }
 )
-def put_vote(
+async def put_vote(
     vote: VoteDTO,
     poll_id: str = Path(
         ...,
@@ -673,5 +896,83 @@ def put_vote(
         min_length=36, max_length=36,
         pattern="^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$"
     ),
+    controller: GroupController = Depends(group_controller)
 ) -> CustomResponse[PollReturn]:
-    return GroupController().put_vote(vote, poll_id)
+    return await controller.put_vote(vote, poll_id)
+
+
+@router.get(
+    "/polls/{poll_id}/stream",
+    summary="Stream the vote tallies of poll: {poll_id}",
+    description="Server-Sent Events: a `votes` event with the current tallies, then one after each committed vote",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {
+            "content": {"text/event-stream": {}},
+            "description": "Stream of vote tallies"
+        },
+        status.HTTP_401_UNAUTHORIZED: {
+            "model": ErrorDTO,
+            "description": "User unauthorized"
+        },
+        status.HTTP_403_FORBIDDEN: {
+            "model": ErrorDTO,
+            "description": "No authorization provided"
+        },
+        status.HTTP_404_NOT_FOUND: {
+            "model": ErrorDTO,
+            "description": "Poll not found"
+        },
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {
+            "model": ErrorDTO,
+            "description": "Internal server error"
+        },
+    }
+)
+async def stream_poll_votes(
+    poll_id: str = Path(
+        ...,
+        description="ID of the poll",
+        examples=["123e4567-e89b-12d3-a456-426614174001"],
+        title="UUID",
+        min_length=36, max_length=36,
+        pattern="^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$"
+    ),
+    controller: GroupController = Depends(group_controller)
+) -> StreamingResponse:
+    watch = await controller.watch_poll(poll_id)
+
+    return StreamingResponse(
+        watch.server_sent_events(poll_stream_heartbeat()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/polls/{poll_id}/ws")
+async def watch_poll_votes(websocket: WebSocket, poll_id: str, controller: GroupController = Depends(group_controller)):
+    """Same messages as the poll stream, as JSON text frames"""
+    # Authenticated by the JWT middleware, with the token query parameter browsers can send
+    try:
+        watch = await controller.watch_poll(poll_id)
+    except CustomHTTPException as e:
+        await websocket.close(code=1008, reason=e.title)
+        return
+
+    await websocket.accept()
+
+    async def send_messages():
+        async for message in watch.messages(poll_stream_heartbeat()):
+            if message is not None:
+                await websocket.send_text(message)
+
+    sender = asyncio.create_task(send_messages())
+
+    try:
+        # Incoming frames are ignored, waiting for them detects the disconnection
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        sender.cancel()
+        watch.close()
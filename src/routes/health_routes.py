@@ -1,7 +1,8 @@
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Depends, status
 
+from container import health_controller
 from controller.health_controller import HealthController
-from models.health import Health, HealthDB
+from models.health import Health, HealthDB, HealthMetrics
 
 router = APIRouter()
 
@@ -11,8 +12,8 @@ router = APIRouter()
     summary="Health check",
     status_code=status.HTTP_200_OK
 )
-def get_health() -> Health:
-    return HealthController().get_health()
+def get_health(controller: HealthController = Depends(health_controller)) -> Health:
+    return controller.get_health()
 
 
 @router.get(
@@ -20,5 +21,14 @@ def get_health() -> Health:
     summary="Health check db",
     status_code=status.HTTP_200_OK
 )
-def get_health_db() -> HealthDB:
-    return HealthController().get_health_db()
+def get_health_db(controller: HealthController = Depends(health_controller)) -> HealthDB:
+    return controller.get_health_db()
+
+
+@router.get(
+    "/metrics",
+    summary="Service metrics",
+    status_code=status.HTTP_200_OK
+)
+def get_metrics(controller: HealthController = Depends(health_controller)) -> HealthMetrics:
+    return controller.get_metrics()
@@ -0,0 +1,401 @@
+from abc import ABCMeta, abstractmethod
+import datetime
+from typing import Collection, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from database.unit_of_work import release_async_unit_of_work, run_after_commit
+from models.availability import SlotSuggestion
+from models.dashboard import Dashboard
+from models.errors.errors import NotFoundError
+from models.event import EventDTO, EventKey, EventReturn
+from models.group import GroupDTO, GroupReturn
+from models.member import Member
+from models.poll import PollReturn, VoteDTO
+from models.response import Page
+from models.routine import PostRoutineParams, RoutineDTO, RoutineReturn, Schedule
+from repository.async_group_repository import IAsyncGroupRepository
+from repository.cached_group_repository import GroupCache, dashboard_cache_ttl, default_async_group_repository
+from service.group_rules import build_dashboard, busy_schedules, check_event_date, check_is_member, check_no_colliding_events, check_no_colliding_routine, check_routine_fits, event_not_found, event_page, fill_member_counts, fill_members, fill_polls, fill_routines, group_not_found, in_requested_order, member_ids_of, suggest_slots, week_ahead
+from service.poll_events import publish_poll_votes
+from service.progress_service import AsyncProgressService, IAsyncProgressService
+from service.vote_buffer import VoteBuffer
+from utils.pagination import decode_cursor
+
+
+class IAsyncGroupService(metaclass=ABCMeta):
+    @abstractmethod
+    async def save_group(self, group: GroupDTO) -> GroupReturn:
+        pass
+
+    @abstractmethod
+    async def get_group(self, group_id: str) -> GroupReturn:
+        pass
+
+    @abstractmethod
+    async def get_groups(self, group_ids: list[str], include: Collection[str] = ("routines", "member_count")) -> list[GroupReturn]:
+        pass
+
+    @abstractmethod
+    async def get_user_groups(self, user_id: str, include: Collection[str] = ()) -> list[GroupReturn]:
+        pass
+
+    @abstractmethod
+    async def get_dashboard(self, user_id: str, events_limit: int = 10) -> Dashboard:
+        pass
+
+    @abstractmethod
+    async def save_member(self, group_id: str, user_id: str) -> list[Member]:
+        pass
+
+    @abstractmethod
+    async def get_group_members(self, group_id: str) -> list[Member]:
+        pass
+
+    @abstractmethod
+    async def save_routine(self, group_id: str, routine: RoutineDTO, params: PostRoutineParams) -> list[RoutineReturn]:
+        pass
+
+    @abstractmethod
+    async def get_routines(self, group_id: str) -> list[RoutineReturn]:
+        pass
+
+    @abstractmethod
+    async def get_availability_suggestions(self, group_id: str, duration: int, limit: int, auth_header: str) -> list[SlotSuggestion]:
+        pass
+
+    @abstractmethod
+    async def save_event(self, group_id: str, event: EventDTO) -> EventReturn:
+        pass
+
+    @abstractmethod
+    async def update_event(self, group_id: str, event_id: str, event: EventDTO) -> EventReturn:
+        pass
+
+    @abstractmethod
+    async def get_events(self, group_id: str, date_from: Optional[datetime.date] = None, date_to: Optional[datetime.date] = None, cursor: Optional[str] = None, limit: int = 50, include_poll: bool = False) -> Page[EventReturn]:
+        pass
+
+    @abstractmethod
+    async def get_event(self, group_id: str, event_id: str) -> EventReturn:
+        pass
+
+    @abstractmethod
+    async def delete_event(self, group_id: str, event_id: str) -> None:
+        pass
+
+    @abstractmethod
+    async def get_poll(self, poll_id: str) -> PollReturn:
+        pass
+
+    @abstractmethod
+    async def put_vote(self, vote: VoteDTO) -> PollReturn:
+        pass
+
+
+class AsyncGroupService(IAsyncGroupService):
+    def __init__(self, repository: Optional[IAsyncGroupRepository] = None, progress_service: Optional[IAsyncProgressService] = None, vote_buffer: Optional[VoteBuffer] = None, dashboard_cache: Optional[GroupCache] = None):
+        self.repository = repository or default_async_group_repository()
+        self.progress_service = progress_service or AsyncProgressService()
+        self.vote_buffer = vote_buffer
+        self.dashboard_cache = dashboard_cache
+
+    async def save_group(self, group: GroupDTO) -> GroupReturn:
+        ret = await self.repository.save_group(group)
+
+        if not ret:
+            raise Exception("Failed to save group")
+
+        return ret
+
+    async def get_group(self, group_id: str) -> GroupReturn:
+        ret = await self.repository.get_group_aggregate(group_id)
+
+        if not ret:
+            raise group_not_found(group_id)
+
+        return ret
+
+    async def check_group_exists(self, group_id: str) -> None:
+        if not await self.repository.group_exists(group_id):
+            raise group_not_found(group_id)
+
+    async def get_groups(self, group_ids: list[str], include: Collection[str] = ("routines", "member_count")) -> list[GroupReturn]:
+        """
+        Get many groups in the given order, missing ones are skipped
+        """
+        groups = in_requested_order(group_ids, await self.repository.get_groups(group_ids))
+
+        return await self._include_relations(groups, include)
+
+    async def get_user_groups(self, user_id: str, include: Collection[str] = ()) -> list[GroupReturn]:
+        return await self._include_relations(await self.repository.get_user_groups(user_id), include)
+
+    async def _include_relations(self, groups: list[GroupReturn], include: Collection[str]) -> list[GroupReturn]:
+        """
+        Fill the included relations (routines, members, member_count) of
+        many groups, with one query per relation whatever their number
+        """
+        group_ids = [group.id for group in groups]
+
+        if not group_ids:
+            return groups
+
+        if "routines" in include:
+            fill_routines(groups, await self.repository.get_routines_by_group_ids(group_ids))
+
+        if "members" in include:
+            fill_members(groups, await self.repository.get_members_by_group_ids(group_ids))
+
+        elif "member_count" in include:
+            fill_member_counts(groups, await self.repository.get_member_counts(group_ids))
+
+        return groups
+
+    async def get_dashboard(self, user_id: str, events_limit: int = 10) -> Dashboard:
+        """
+        Get the groups of a user with their routines and the next upcoming
+        events of those groups with their polls, in a fixed number of queries
+        whatever the number of groups
+        """
+        today = datetime.datetime.now().date()
+
+        if self.dashboard_cache is None:
+            return await self._load_dashboard(user_id, today, events_limit)
+
+        key, dashboard = await self.dashboard_cache.alookup(
+            self.dashboard_cache.dashboard_key(user_id, today, events_limit))
+
+        if dashboard is None:
+            dashboard = await self._load_dashboard(user_id, today, events_limit)
+            await self.dashboard_cache.aset(key, dashboard, dashboard_cache_ttl())
+
+        return dashboard
+
+    async def _load_dashboard(self, user_id: str, today: datetime.date, events_limit: int) -> Dashboard:
+        groups = await self.get_user_groups(user_id, {"routines"})
+
+        events = await self.repository.get_groups_events(
+            [group.id for group in groups], today, events_limit)
+
+        return build_dashboard(groups, events, await self.repository.get_polls_by_event_ids(
+            [event.id for event in events]))
+
+    async def save_member(self, group_id: str, user_id: str) -> list[Member]:
+        await self.check_group_exists(group_id)
+
+        await self.repository.save_member(group_id, user_id)
+        return await self.repository.get_group_members(group_id)
+
+    async def get_group_members(self, group_id: str) -> list[Member]:
+        await self.check_group_exists(group_id)
+
+        return await self.repository.get_group_members(group_id)
+
+    async def get_free_schedules(self, members: list[str], auth_header: str) -> list[Schedule]:
+        return await self.progress_service.get_free_schedules(members, auth_header)
+
+    async def get_members_free_schedules(self, members: list[str], auth_header: str) -> dict[str, list[Schedule]]:
+        return await self.progress_service.get_members_free_schedules(members, auth_header)
+
+    async def check_member_individual_routines_collision(self, member_ids: list[str], routine: RoutineDTO, auth_header: str) -> None:
+        # No transaction is held open while the Progress service answers
+        await release_async_unit_of_work()
+
+        check_routine_fits(await self.get_free_schedules(member_ids, auth_header), routine)
+
+    async def check_member_group_routines_collision(self, member_ids: list[str], routine: RoutineDTO) -> None:
+        # One indexed lookup, whatever the number of routines of the members
+        check_no_colliding_routine(await self.repository.find_members_colliding_routine(
+            member_ids, routine
+        ))
+
+    async def save_routine(self, group_id: str, routine: RoutineDTO, params: PostRoutineParams) -> list[RoutineReturn]:
+        member_ids = member_ids_of(group_id, await self.repository.get_group_members(group_id))
+
+        check_is_member(group_id, member_ids, routine.creator_id)
+
+        if not params.force_members:
+            await self.check_member_group_routines_collision(
+                member_ids, routine
+            )
+
+            await self.check_member_individual_routines_collision(
+                member_ids, routine, params.auth_header
+            )
+
+        await self.repository.save_routine(group_id, routine)
+
+        return await self.repository.get_routines(group_id)
+
+    async def get_routines(self, group_id: str) -> list[RoutineReturn]:
+        await self.check_group_exists(group_id)
+
+        return await self.repository.get_routines(group_id)
+
+    async def get_availability_suggestions(self, group_id: str, duration: int, limit: int, auth_header: str) -> list[SlotSuggestion]:
+        """
+        Rank the weekly slots of duration hours by how many members are free,
+        leaving out the hours a new routine would collide with: routines of
+        the members' groups and the group events of the coming week
+        """
+        member_ids = member_ids_of(group_id, await self.repository.get_group_members(group_id))
+        today = datetime.date.today()
+
+        busy = busy_schedules(
+            await self.repository.get_user_groups_routines_schedules(member_ids),
+            await self.repository.get_events(group_id, *week_ahead(today)),
+            today
+        )
+
+        await release_async_unit_of_work()
+
+        return suggest_slots(
+            member_ids, await self.get_members_free_schedules(member_ids, auth_header), busy, duration, limit)
+
+    async def save_event(self, group_id: str, event: EventDTO) -> EventReturn:
+        """
+        Create a new event for a group
+        """
+        # Check if group exists
+        await self.check_group_exists(group_id)
+
+        # Check if event creator is a member of the group
+        members = await self.repository.get_group_members(group_id)
+        check_is_member(group_id, [member.user_id for member in members], event.creator_id)
+
+        check_event_date(event)
+
+        # Save event and return it, colliding events are rejected by the insert
+        ret = await self.repository.save_event(group_id, event)
+
+        if not ret:
+            raise Exception("Failed to group event")
+
+        if not event.poll:
+            return ret
+
+        poll_id: str = await self.repository.save_poll(
+            group_id, event.creator_id, ret.id, event.poll)
+
+        ret.poll = await self.repository.get_poll(poll_id)
+        if not ret.poll:
+            raise Exception("Failed to save event poll")
+
+        return ret
+
+    async def update_event(self, group_id: str, event_id: str, event: EventDTO) -> EventReturn:
+        """
+        Update an existing event in a group
+        """
+        # Check if group exists
+        await self.check_group_exists(group_id)
+
+        # Check if event exists
+        existing_event = await self.repository.get_event(group_id, event_id)
+
+        if not existing_event:
+            raise event_not_found(group_id, event_id)
+
+        # Check if event updater is a member of the group
+        members = await self.repository.get_group_members(group_id)
+        check_is_member(group_id, [member.user_id for member in members], event.creator_id)
+
+        if existing_event.date != event.date:
+            check_event_date(event)
+
+        # Check for colliding events
+        check_no_colliding_events(event_id, await self.repository.find_group_colliding_events(
+            group_id, event.date, event.start_hour, event.end_hour
+        ))
+
+        # Update event and return it
+        ret = await self.repository.update_event(group_id, event_id, event)
+
+        if not ret:
+            raise Exception("Failed to update group event")
+
+        return ret
+
+    async def get_events(self, group_id: str, date_from: Optional[datetime.date] = None, date_to: Optional[datetime.date] = None, cursor: Optional[str] = None, limit: int = 50, include_poll: bool = False) -> Page[EventReturn]:
+        """
+        Get a page of the events of a group, from today unless date_from is
+        given, continuing after the cursor of the previous page if any, with
+        their polls when include_poll is set
+        """
+        # Check if group exists
+        await self.check_group_exists(group_id)
+
+        after = decode_cursor(cursor, EventKey.parse) if cursor else None
+
+        # One more to know whether there is a next page
+        page = event_page(await self.repository.get_events(
+            group_id, date_from or datetime.datetime.now().date(), date_to, after, limit + 1
+        ), limit)
+
+        if include_poll:
+            # The polls of the whole page at once, not one lookup per event
+            fill_polls(page.items, await self.repository.get_polls_by_event_ids(
+                [event.id for event in page.items]))
+
+        return page
+
+    async def get_event(self, group_id: str, event_id: str) -> EventReturn:
+        """
+        Get a specific event from a group
+        """
+        # Check if group exists
+        await self.check_group_exists(group_id)
+
+        # Get event
+        event = await self.repository.get_event(group_id, event_id)
+
+        if not event:
+            raise event_not_found(group_id, event_id)
+
+        event.poll = await self.repository.get_poll_by_event_id(event_id)
+
+        return event
+
+    async def delete_event(self, group_id: str, event_id: str) -> None:
+        """
+        Delete an event from a group
+        """
+        # Check if group exists
+        await self.check_group_exists(group_id)
+
+        # Check if event exists
+        event = await self.repository.get_event(group_id, event_id)
+
+        if not event:
+            raise event_not_found(group_id, event_id)
+
+        # Delete event
+        await self.repository.delete_event(group_id, event_id)
+
+    async def get_poll(self, poll_id: str) -> PollReturn:
+        """
+        Get a poll with its options and votes
+        """
+        poll = await self.repository.get_poll(poll_id)
+
+        if not poll:
+            raise NotFoundError(f"Poll with id {poll_id} not found")
+
+        return poll
+
+    async def put_vote(self, vote: VoteDTO) -> PollReturn:
+        """
+        Save a vote for a poll option, replacing the user's previous vote
+        """
+        if self.vote_buffer:
+            # Loading a poll into the buffer and flushing it block
+            return await run_in_threadpool(self.vote_buffer.put, vote)
+
+        # Checks the poll and option, replaces the vote and counts votes at once
+        poll = await self.repository.replace_poll_vote(vote)
+
+        # Watchers only see committed votes
+        run_after_commit(lambda: publish_poll_votes(poll))
+
+        return poll
@@ -0,0 +1,157 @@
+"""
+Rules of the group service that need no I/O, shared by GroupService and
+AsyncGroupService: validations, collision checks, slot ranking and the
+assembly of pages, dashboards and included relations. The services load
+what these need from their repository and Progress service, sync or async.
+"""
+import datetime
+from typing import Optional
+
+from models.availability import SlotSuggestion
+from models.dashboard import Dashboard
+from models.errors.errors import AuthenticationError, ConflictError, NotFoundError, ValidationError
+from models.event import EventDTO, EventKey, EventReturn
+from models.group import GroupReturn
+from models.member import Member
+from models.poll import PollReturn
+from models.response import Page
+from models.routine import RoutineDTO, RoutineReturn, Schedule
+from utils.availability import DAY_INDEX, WeeklyAvailability, hours_mask, rank_slots, week_ahead_schedules, week_masks
+from utils.pagination import encode_cursor
+
+
+def group_not_found(group_id: str) -> NotFoundError:
+    return NotFoundError(f"Group with id {group_id} not found")
+
+
+def event_not_found(group_id: str, event_id: str) -> NotFoundError:
+    return NotFoundError(f"Event with id {event_id} not found in group {group_id}")
+
+
+def member_ids_of(group_id: str, members: list[Member]) -> list[str]:
+    """IDs of the members of a group, which has at least its owner"""
+    if not members:
+        raise group_not_found(group_id)
+
+    return [member.user_id for member in members]
+
+
+def check_is_member(group_id: str, member_ids: list[str], user_id: str) -> None:
+    if user_id not in member_ids:
+        raise AuthenticationError(
+            f"User with id {user_id} is not a member of group {group_id}"
+        )
+
+
+def check_event_date(event: EventDTO) -> None:
+    if event.date < datetime.datetime.now():
+        raise ValidationError(
+            title="Invalid event date",
+            detail="Event date cannot be in the past"
+        )
+
+
+def check_no_colliding_events(event_id: str, colliding_events: list[EventReturn]) -> None:
+    """The event may collide with its previous version only"""
+    colliding_events = [e for e in colliding_events if e.id != event_id]
+
+    if colliding_events:
+        raise ConflictError(
+            title="Conflict in event schedules",
+            detail=f"Event collides with existing events: {colliding_events}"
+        )
+
+
+def check_routine_fits(member_free_schedules: list[Schedule], routine: RoutineDTO) -> None:
+    # The routine must fit in the hours every member is free. These are
+    # merged, so free windows back to back are one window, and a routine
+    # spanning both fits.
+    free = week_masks(member_free_schedules)[DAY_INDEX[routine.day]]
+    routine_hours = hours_mask(routine.start_hour, routine.end_hour)
+
+    if free & routine_hours != routine_hours:
+        raise ConflictError(
+            title="Conflict in routine schedules",
+            detail="There are members with conflicting routines",
+        )
+
+
+def check_no_colliding_routine(colliding: Optional[Schedule]) -> None:
+    if colliding:
+        raise ConflictError(
+            title="Conflict in routine schedules",
+            detail=f"Conflicting member routine on {colliding.day} from {colliding.start_hour} to {colliding.end_hour}"
+        )
+
+
+def busy_schedules(routines: list[Schedule], events: list[EventReturn], today: datetime.date) -> list[Schedule]:
+    """Hours a new routine would collide with: member routines and the events of the coming week"""
+    return routines + week_ahead_schedules(events, today)
+
+
+def week_ahead(today: datetime.date) -> tuple[datetime.date, datetime.date]:
+    return today, today + datetime.timedelta(days=6)
+
+
+def suggest_slots(
+    member_ids: list[str],
+    members_free_schedules: dict[str, list[Schedule]],
+    busy: list[Schedule],
+    duration: int,
+    limit: int
+) -> list[SlotSuggestion]:
+    free = WeeklyAvailability.from_schedules(members_free_schedules)
+
+    return [
+        SlotSuggestion(
+            **slot.model_dump(),
+            available_members=available,
+            unavailable_members=[
+                m for m in member_ids if m not in available]
+        )
+        for slot, available in rank_slots(free, week_masks(busy), duration, limit)
+    ]
+
+
+def in_requested_order(group_ids: list[str], groups: list[GroupReturn]) -> list[GroupReturn]:
+    """The groups in the order of their ids, without repeats, missing ones skipped"""
+    by_id = {group.id: group for group in groups}
+
+    return [by_id[group_id] for group_id in dict.fromkeys(group_ids) if group_id in by_id]
+
+
+def fill_routines(groups: list[GroupReturn], routines: dict[str, list[RoutineReturn]]) -> None:
+    for group in groups:
+        group.routines = routines.get(group.id, [])
+
+
+def fill_members(groups: list[GroupReturn], members: dict[str, list[Member]]) -> None:
+    for group in groups:
+        group.members = members.get(group.id, [])
+        group.member_count = len(group.members)
+
+
+def fill_member_counts(groups: list[GroupReturn], counts: dict[str, int]) -> None:
+    for group in groups:
+        group.member_count = counts.get(group.id, 0)
+
+
+def fill_polls(events: list[EventReturn], polls: dict[str, PollReturn]) -> None:
+    for event in events:
+        event.poll = polls.get(event.id)
+
+
+def event_page(events: list[EventReturn], limit: int) -> Page[EventReturn]:
+    """Page of the events loaded with one more than the limit, to know whether there is a next page"""
+    page = Page(items=events[:limit])
+
+    if len(events) > limit:
+        page.next_cursor = encode_cursor(EventKey.of(events[limit - 1]))
+
+    return page
+
+
+def build_dashboard(groups: list[GroupReturn], events: list[EventReturn], polls: dict[str, PollReturn]) -> Dashboard:
+    fill_polls(events, polls)
+
+    return Dashboard(groups=groups, events=events)
@@ -1,18 +1,24 @@
 from abc import ABCMeta, abstractmethod
-from datetime import date
 import datetime
-import logging
-from os import getenv
-from typing import Optional
+from typing import Collection, Optional
 
-from models.errors.errors import AuthenticationError, BadGatewayError, ConflictError, NotFoundError, ValidationError
-from models.event import EventDTO, EventReturn
+from database.unit_of_work import release_unit_of_work, run_after_commit
+from models.availability import SlotSuggestion
+from models.dashboard import Dashboard
+from models.errors.errors import NotFoundError
+from models.event import EventDTO, EventKey, EventReturn
 from models.group import GroupDTO, GroupReturn
 from models.member import Member
 from models.poll import PollReturn, VoteDTO
+from models.response import Page
 from models.routine import PostRoutineParams, RoutineDTO, RoutineReturn, Schedule
-from repository.group_repository import GroupRepository, IGroupRepository
-import requests
+from repository.cached_group_repository import GroupCache, dashboard_cache_ttl, default_group_repository
+from repository.group_repository import IGroupRepository
+from service.group_rules import build_dashboard, busy_schedules, check_event_date, check_is_member, check_no_colliding_events, check_no_colliding_routine, check_routine_fits, event_not_found, event_page, fill_member_counts, fill_members, fill_polls, fill_routines, group_not_found, in_requested_order, member_ids_of, suggest_slots, week_ahead
+from service.poll_events import publish_poll_votes
+from service.progress_service import IProgressService, ProgressService
+from service.vote_buffer import VoteBuffer
+from utils.pagination import decode_cursor
 
 
 class IGroupService(metaclass=ABCMeta):
@@ -25,7 +31,15 @@ class IGroupService(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    def get_user_groups(self, user_id: str) -> list[GroupReturn]:
+    def get_groups(self, group_ids: list[str], include: Collection[str] = ("routines", "member_count")) -> list[GroupReturn]:
+        pass
+
+    @abstractmethod
+    def get_user_groups(self, user_id: str, include: Collection[str] = ()) -> list[GroupReturn]:
+        pass
+
+    @abstractmethod
+    def get_dashboard(self, user_id: str, events_limit: int = 10) -> Dashboard:
         pass
 
     @abstractmethod
@@ -44,6 +58,10 @@ class IGroupService(metaclass=ABCMeta):
     def get_routines(self, group_id: str) -> list[RoutineReturn]:
         pass
 
+    @abstractmethod
+    def get_availability_suggestions(self, group_id: str, duration: int, limit: int, auth_header: str) -> list[SlotSuggestion]:
+        pass
+
     @abstractmethod
     def save_event(self, group_id: str, event: EventDTO) -> EventReturn:
         pass
@@ -53,7 +71,7 @@ class IGroupService(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    def get_events(self, group_id: str) -> list[EventReturn]:
+    def get_events(self, group_id: str, date_from: Optional[datetime.date] = None, date_to: Optional[datetime.date] = None, cursor: Optional[str] = None, limit: int = 50, include_poll: bool = False) -> Page[EventReturn]:
         pass
 
     @abstractmethod
@@ -64,17 +82,21 @@ class IGroupService(metaclass=ABCMeta):
     def delete_event(self, group_id: str, event_id: str) -> None:
         pass
 
+    @abstractmethod
+    def get_poll(self, poll_id: str) -> PollReturn:
+        pass
+
     @abstractmethod
     def put_vote(self, vote: VoteDTO) -> PollReturn:
         pass
 
 
 class GroupService(IGroupService):
-    def __init__(self, repository: Optional[IGroupRepository] = None):
-        self.repository = repository or GroupRepository()
-        self.PROGRESS_SERVICE_URI = getenv(
-            "PROGRESS_SERVICE_URI", "http://0.0.0.0:8082"
-        )
+    def __init__(self, repository: Optional[IGroupRepository] = None, progress_service: Optional[IProgressService] = None, vote_buffer: Optional[VoteBuffer] = None, dashboard_cache: Optional[GroupCache] = None):
+        self.repository = repository or default_group_repository()
+        self.progress_service = progress_service or ProgressService()
+        self.vote_buffer = vote_buffer
+        self.dashboard_cache = dashboard_cache
 
     def save_group(self, group: GroupDTO) -> GroupReturn:
         ret = self.repository.save_group(group)
@@ -85,101 +107,112 @@ class GroupService(IGroupService):
         return ret
 
     def get_group(self, group_id: str) -> GroupReturn:
-        ret = self.repository.get_group(group_id)
+        ret = self.repository.get_group_aggregate(group_id)
 
         if not ret:
-            raise NotFoundError(f"Group with id {group_id} not found")
-
-        ret.routines = self.repository.get_routines(group_id)
+            raise group_not_found(group_id)
 
         return ret
 
-    def get_user_groups(self, user_id: str) -> list[GroupReturn]:
-        return self.repository.get_user_groups(user_id)
+    def check_group_exists(self, group_id: str) -> None:
+        if not self.repository.group_exists(group_id):
+            raise group_not_found(group_id)
 
-    def save_member(self, group_id: str, user_id: str) -> list[Member]:
-        group = self.get_group(group_id)
+    def get_groups(self, group_ids: list[str], include: Collection[str] = ("routines", "member_count")) -> list[GroupReturn]:
+        """
+        Get many groups in the given order, missing ones are skipped
+        """
+        groups = in_requested_order(group_ids, self.repository.get_groups(group_ids))
+
+        return self._include_relations(groups, include)
+
+    def get_user_groups(self, user_id: str, include: Collection[str] = ()) -> list[GroupReturn]:
+        return self._include_relations(self.repository.get_user_groups(user_id), include)
+
+    def _include_relations(self, groups: list[GroupReturn], include: Collection[str]) -> list[GroupReturn]:
+        """
+        Fill the included relations (routines, members, member_count) of
+        many groups, with one query per relation whatever their number
+        """
+        group_ids = [group.id for group in groups]
 
-        if not group:
-            raise NotFoundError(f"Group with id {group_id} not found")
+        if not group_ids:
+            return groups
+
+        if "routines" in include:
+            fill_routines(groups, self.repository.get_routines_by_group_ids(group_ids))
+
+        if "members" in include:
+            fill_members(groups, self.repository.get_members_by_group_ids(group_ids))
+
+        elif "member_count" in include:
+            fill_member_counts(groups, self.repository.get_member_counts(group_ids))
+
+        return groups
+
+    def get_dashboard(self, user_id: str, events_limit: int = 10) -> Dashboard:
+        """
+        Get the groups of a user with their routines and the next upcoming
+        events of those groups with their polls, in a fixed number of queries
+        whatever the number of groups
+        """
+        today = datetime.datetime.now().date()
+
+        if self.dashboard_cache is None:
+            return self._load_dashboard(user_id, today, events_limit)
+
+        key = self.dashboard_cache.resolve(
+            self.dashboard_cache.dashboard_key(user_id, today, events_limit))
+
+        dashboard = self.dashboard_cache.get(key)
+        if dashboard is None:
+            dashboard = self._load_dashboard(user_id, today, events_limit)
+            self.dashboard_cache.set(key, dashboard, dashboard_cache_ttl())
+
+        return dashboard
+
+    def _load_dashboard(self, user_id: str, today: datetime.date, events_limit: int) -> Dashboard:
+        groups = self.get_user_groups(user_id, {"routines"})
+
+        events = self.repository.get_groups_events(
+            [group.id for group in groups], today, events_limit)
+
+        return build_dashboard(groups, events, self.repository.get_polls_by_event_ids(
+            [event.id for event in events]))
+
+    def save_member(self, group_id: str, user_id: str) -> list[Member]:
+        self.check_group_exists(group_id)
 
         self.repository.save_member(group_id, user_id)
         return self.repository.get_group_members(group_id)
 
     def get_group_members(self, group_id: str) -> list[Member]:
-        group = self.get_group(group_id)
-
-        if not group:
-            raise NotFoundError(f"Group with id {group_id} not found")
+        self.check_group_exists(group_id)
 
         return self.repository.get_group_members(group_id)
 
     def get_free_schedules(self, members: list[str], auth_header: str) -> list[Schedule]:
-        query_param = "?users=" + "&users=".join(members)
+        return self.progress_service.get_free_schedules(members, auth_header)
 
-        response = requests.get(
-            f"{self.PROGRESS_SERVICE_URI}/users/freeSchedules/{query_param}",
-            headers={"Authorization": auth_header}
-        )
-
-        match response.status_code:
-            case 200:
-                r: dict = response.json()
-                data = r.get("data", None)
-                if not data:
-                    raise BadGatewayError()
-
-                schedules = data.get("schedules", [])
-
-                return [Schedule(**schedule) for schedule in schedules]
-            case _:
-                logging.error(response.json())
-                raise BadGatewayError()
+    def get_members_free_schedules(self, members: list[str], auth_header: str) -> dict[str, list[Schedule]]:
+        return self.progress_service.get_members_free_schedules(members, auth_header)
 
     def check_member_individual_routines_collision(self, member_ids: list[str], routine: RoutineDTO, auth_header: str) -> None:
-        member_free_schedules = self.get_free_schedules(
-            member_ids, auth_header
-        )
+        # No transaction is held open while the Progress service answers
+        release_unit_of_work()
 
-        no_conflictive_schedules_with_new_routine = [
-            schedule for schedule in member_free_schedules
-            if schedule.day == routine.day and
-            schedule.start_hour <= routine.start_hour
-            and schedule.end_hour >= routine.end_hour
-        ]
-
-        if len(no_conflictive_schedules_with_new_routine) == 0:
-            raise ConflictError(
-                title="Conflict in routine schedules",
-                detail="There are members with conflicting routines",
-            )
+        check_routine_fits(self.get_free_schedules(member_ids, auth_header), routine)
 
     def check_member_group_routines_collision(self, member_ids: list[str], routine: RoutineDTO) -> None:
-        members_group_routines_schedules = self.repository.get_user_groups_routines_schedules(
-            member_ids
-        )
-
-        for s in members_group_routines_schedules:
-            if s.day == routine.day and \
-                s.end_hour > routine.start_hour and \
-                    s.start_hour < routine.end_hour:
-                raise ConflictError(
-                    title="Conflict in routine schedules",
-                    detail=f"Conflicting member routine on {s.day} from {s.start_hour} to {s.end_hour}"
-                )
+        # One indexed lookup, whatever the number of routines of the members
+        check_no_colliding_routine(self.repository.find_members_colliding_routine(
+            member_ids, routine
+        ))
 
     def save_routine(self, group_id: str, routine: RoutineDTO, params: PostRoutineParams) -> list[RoutineReturn]:
-        members = self.repository.get_group_members(group_id)
-
-        if not members:
-            raise NotFoundError(f"Group with id {group_id} not found")
+        member_ids = member_ids_of(group_id, self.repository.get_group_members(group_id))
 
-        member_ids = [member.user_id for member in members]
-
-        if routine.creator_id not in member_ids:
-            raise AuthenticationError(
-                f"User with id {routine.creator_id} is not a member of group {group_id}"
-            )
+        check_is_member(group_id, member_ids, routine.creator_id)
 
         if not params.force_members:
             self.check_member_group_routines_collision(
@@ -195,50 +228,44 @@ class GroupService(IGroupService):
         return self.repository.get_routines(group_id)
 
     def get_routines(self, group_id: str) -> list[RoutineReturn]:
-        group = self.get_group(group_id)
-
-        if not group:
-            raise NotFoundError(f"Group with id {group_id} not found")
+        self.check_group_exists(group_id)
 
         return self.repository.get_routines(group_id)
 
+    def get_availability_suggestions(self, group_id: str, duration: int, limit: int, auth_header: str) -> list[SlotSuggestion]:
+        """
+        Rank the weekly slots of duration hours by how many members are free,
+        leaving out the hours a new routine would collide with: routines of
+        the members' groups and the group events of the coming week
+        """
+        member_ids = member_ids_of(group_id, self.repository.get_group_members(group_id))
+        today = datetime.date.today()
+
+        busy = busy_schedules(
+            self.repository.get_user_groups_routines_schedules(member_ids),
+            self.repository.get_events(group_id, *week_ahead(today)),
+            today
+        )
+
+        release_unit_of_work()
+
+        return suggest_slots(
+            member_ids, self.get_members_free_schedules(member_ids, auth_header), busy, duration, limit)
+
     def save_event(self, group_id: str, event: EventDTO) -> EventReturn:
         """
         Create a new event for a group
         """
         # Check if group exists
-        group = self.get_group(group_id)
-
-        if not group:
-            raise NotFoundError(f"Group with id {group_id} not found")
+        self.check_group_exists(group_id)
 
         # Check if event creator is a member of the group
         members = self.repository.get_group_members(group_id)
-        member_ids = [member.user_id for member in members]
-
-        if event.creator_id not in member_ids:
-            raise AuthenticationError(
-                f"User with id {event.creator_id} is not a member of group {group_id}"
-            )
-
-        if event.date < datetime.datetime.now():
-            raise ValidationError(
-                title="Invalid event date",
-                detail="Event date cannot be in the past"
-            )
-
-        # Check for colliding events
-        colliding_events = self.repository.find_group_colliding_events(
-            group_id, event.date, event.start_hour, event.end_hour
-        )
+        check_is_member(group_id, [member.user_id for member in members], event.creator_id)
 
-        if colliding_events:
-            raise ConflictError(
-                title="Conflict in event schedules",
-                detail=f"Event collides with existing events: {colliding_events}"
-            )
+        check_event_date(event)
 
-        # Save event and return it
+        # Save event and return it, colliding events are rejected by the insert
         ret = self.repository.save_event(group_id, event)
 
         if not ret:
@@ -261,46 +288,25 @@ class GroupService(IGroupService):
         Update an existing event in a group
         """
         # Check if group exists
-        group = self.get_group(group_id)
-
-        if not group:
-            raise NotFoundError(f"Group with id {group_id} not found")
+        self.check_group_exists(group_id)
 
         # Check if event exists
         existing_event = self.repository.get_event(group_id, event_id)
 
         if not existing_event:
-            raise NotFoundError(
-                f"Event with id {event_id} not found in group {group_id}")
+            raise event_not_found(group_id, event_id)
 
         # Check if event updater is a member of the group
         members = self.repository.get_group_members(group_id)
-        member_ids = [member.user_id for member in members]
-
-        if event.creator_id not in member_ids:
-            raise AuthenticationError(
-                f"User with id {event.creator_id} is not a member of group {group_id}"
-            )
+        check_is_member(group_id, [member.user_id for member in members], event.creator_id)
 
         if existing_event.date != event.date:
-            if event.date < datetime.datetime.now():
-                raise ValidationError(
-                    title="Invalid event date",
-                    detail="Event date cannot be in the past"
-                )
+            check_event_date(event)
 
         # Check for colliding events
-        colliding_events = self.repository.find_group_colliding_events(
+        check_no_colliding_events(event_id, self.repository.find_group_colliding_events(
             group_id, event.date, event.start_hour, event.end_hour
-        )
-
-        colliding_events = [e for e in colliding_events if e.id != event_id]
-
-        if colliding_events:
-            raise ConflictError(
-                title="Conflict in event schedules",
-                detail=f"Event collides with existing events: {colliding_events}"
-            )
+        ))
 
         # Update event and return it
         ret = self.repository.update_event(group_id, event_id, event)
@@ -310,35 +316,41 @@ class GroupService(IGroupService):
 
         return ret
 
-    def get_events(self, group_id: str) -> list[EventReturn]:
+    def get_events(self, group_id: str, date_from: Optional[datetime.date] = None, date_to: Optional[datetime.date] = None, cursor: Optional[str] = None, limit: int = 50, include_poll: bool = False) -> Page[EventReturn]:
         """
-        Get all events for a group
+        Get a page of the events of a group, from today unless date_from is
+        given, continuing after the cursor of the previous page if any, with
+        their polls when include_poll is set
         """
         # Check if group exists
-        group = self.get_group(group_id)
+        self.check_group_exists(group_id)
+
+        after = decode_cursor(cursor, EventKey.parse) if cursor else None
 
-        if not group:
-            raise NotFoundError(f"Group with id {group_id} not found")
+        # One more to know whether there is a next page
+        page = event_page(self.repository.get_events(
+            group_id, date_from or datetime.datetime.now().date(), date_to, after, limit + 1
+        ), limit)
 
-        # Return all events for the group
-        return self.repository.get_events(group_id)
+        if include_poll:
+            # The polls of the whole page at once, not one lookup per event
+            fill_polls(page.items, self.repository.get_polls_by_event_ids(
+                [event.id for event in page.items]))
+
+        return page
 
     def get_event(self, group_id: str, event_id: str) -> EventReturn:
         """
         Get a specific event from a group
         """
         # Check if group exists
-        group = self.get_group(group_id)
-
-        if not group:
-            raise NotFoundError(f"Group with id {group_id} not found")
+        self.check_group_exists(group_id)
 
         # Get event
         event = self.repository.get_event(group_id, event_id)
 
         if not event:
-            raise NotFoundError(
-                f"Event with id {event_id} not found in group {group_id}")
+            raise event_not_found(group_id, event_id)
 
         event.poll = self.repository.get_poll_by_event_id(event_id)
 
@@ -349,39 +361,39 @@ class GroupService(IGroupService):
         Delete an event from a group
         """
         # Check if group exists
-        group = self.get_group(group_id)
-
-        if not group:
-            raise NotFoundError(f"Group with id {group_id} not found")
+        self.check_group_exists(group_id)
 
         # Check if event exists
         event = self.repository.get_event(group_id, event_id)
 
         if not event:
-            raise NotFoundError(
-                f"Event with id {event_id} not found in group {group_id}")
+            raise event_not_found(group_id, event_id)
 
         # Delete event
         self.repository.delete_event(group_id, event_id)
 
-    def put_vote(self, vote: VoteDTO) -> PollReturn:
+    def get_poll(self, poll_id: str) -> PollReturn:
         """
-        Save a vote for a poll option
+        Get a poll with its options and votes
         """
-        poll = self.repository.get_poll(vote.poll_id)
+        poll = self.repository.get_poll(poll_id)
+
         if not poll:
-            raise NotFoundError(f"Poll with id {vote.poll_id} not found")
+            raise NotFoundError(f"Poll with id {poll_id} not found")
 
-        options = self.repository.get_poll_options(vote.poll_id)
-        option_ids = [option.id for option in options]
-        if vote.option_id not in option_ids:
-            raise NotFoundError(
-                detail=f"Option with id {vote.option_id} does not exist in poll {vote.poll_id}"
-            )
+        return poll
+
+    def put_vote(self, vote: VoteDTO) -> PollReturn:
+        """
+        Save a vote for a poll option, replacing the user's previous vote
+        """
+        if self.vote_buffer:
+            return self.vote_buffer.put(vote)
 
-        self.repository.delete_poll_vote(vote.poll_id, vote.user_id)
-        self.repository.save_poll_vote(vote)
+        # Checks the poll and option, replaces the vote and counts votes at once
+        poll = self.repository.replace_poll_vote(vote)
 
-        poll.votes = self.repository.get_poll_votes(vote.poll_id)
+        # Watchers only see committed votes
+        run_after_commit(lambda: publish_poll_votes(poll))
 
         return poll
@@ -1,8 +1,9 @@
 from abc import ABCMeta, abstractmethod
 from typing import Optional
 
-from models.health import Health, HealthDB
+from models.health import Health, HealthDB, HealthMetrics
 from repository.health_repository import HealthRepository, IHealthRepository
+from utils.metrics import metrics
 
 
 class IHealthService(metaclass=ABCMeta):
@@ -28,6 +29,16 @@ class IHealthService(metaclass=ABCMeta):
         """
         pass
 
+    @abstractmethod
+    def get_metrics(self) -> HealthMetrics:
+        """
+        Get the in-process metrics of the service, e.g. cache counters.
+
+        Returns:
+            HealthMetrics: An instance of the HealthMetrics model with every registered metric.
+        """
+        pass
+
 
 class HealthService(IHealthService):
     def __init__(self, repository: Optional[IHealthRepository] = None):
@@ -46,3 +57,6 @@ class HealthService(IHealthService):
         # If db is not healthy, it will raise an exception
         _ = self.repository.get_health()
         return HealthDB(db_health="😎")
+
+    def get_metrics(self) -> HealthMetrics:
+        return HealthMetrics(metrics=metrics.snapshot())
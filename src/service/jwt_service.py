@@ -1,13 +1,100 @@
 from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
+import hashlib
 import logging
 from os import getenv
-from typing import Optional, Union
+import threading
+import time
+from typing import Any, Optional, Union
 
 import jwt
 
 from models.errors.errors import AuthenticationError
 from models.jwt import JwtCustomPayload
+from utils.cache import LRUCache
+from utils.metrics import metrics
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU cache of the payloads of verified tokens, keyed by a digest
+    of the token so tokens are not kept in memory.
+
+    Entries expire at the token exp (and after ttl seconds at most), a hit
+    of an expired token is a miss, and the whole cache is dropped when the
+    signing secret changes, so a hit is only served when jwt.decode would
+    succeed.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 3600):
+        self.cache = LRUCache(max_size=max_size, ttl=ttl)
+        self.ttl = ttl
+        self.rotations = 0
+        self._secret_digest: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(value: str) -> str:
+        return hashlib.sha256(value.encode()).hexdigest()
+
+    def _check_secret(self, secret_digest: str) -> None:
+        if self._secret_digest == secret_digest:
+            return
+
+        with self._lock:
+            if self._secret_digest != secret_digest:
+                if self._secret_digest is not None:
+                    self.rotations += 1
+                self.cache.clear()
+                self._secret_digest = secret_digest
+
+    def get(self, secret_digest: str, token: str) -> Optional[dict[str, Any]]:
+        self._check_secret(secret_digest)
+
+        key = self.digest(token)
+        payload = self.cache.get(key)
+
+        if payload is None:
+            return None
+
+        exp = payload.get("exp")
+        if exp is not None and exp <= time.time():
+            self.cache.delete(key)
+            return None
+
+        return dict(payload)
+
+    def set(self, secret_digest: str, token: str, payload: dict[str, Any]) -> None:
+        self._check_secret(secret_digest)
+
+        ttl = self.ttl
+        if payload.get("exp") is not None:
+            ttl = min(ttl, payload["exp"] - time.time())
+
+        if ttl > 0:
+            self.cache.set(self.digest(token), dict(payload), ttl)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return self.cache.stats() | {"rotations": self.rotations}
+
+
+def build_verified_token_cache() -> Optional[VerifiedTokenCache]:
+    if getenv("JWT_CACHE_ENABLED", "true").lower() != "true":
+        return None
+
+    return VerifiedTokenCache(
+        max_size=int(getenv("JWT_CACHE_MAX_SIZE", "10000")),
+        ttl=float(getenv("JWT_CACHE_TTL_SECONDS", "3600"))
+    )
+
+
+verified_tokens = build_verified_token_cache()
+
+if verified_tokens:
+    metrics.register("jwt_cache", verified_tokens.stats)
 
 
 class IJWTService(ABC):
@@ -27,7 +114,7 @@ class IJWTService(ABC):
 
 
 class JWTService(IJWTService):
-    def __init__(self):
+    def __init__(self, cache: Optional[VerifiedTokenCache] = None):
         self.expires_in = timedelta(days=365)
         self.secret = getenv('JWT_SECRET_KEY', "secret")
 
@@ -36,6 +123,9 @@ class JWTService(IJWTService):
 
         logging.info("JWT_SECRET_KEY set")
 
+        self.cache = cache or verified_tokens
+        self.secret_digest = VerifiedTokenCache.digest(self.secret)
+
     def sign(self, payload: JwtCustomPayload) -> str:
         """
         Sign a JWT token with the given payload
@@ -52,7 +142,8 @@ class JWTService(IJWTService):
 
     def verify(self, token: str) -> Union[dict, str]:
         """
-        Verify a JWT token
+        Verify a JWT token, tokens already verified with the same secret
+        are served from the cache until they expire
 
         Args:
             token: The JWT token to verify
@@ -63,11 +154,21 @@ class JWTService(IJWTService):
         Raises:
             AuthenticationError: If the token is invalid or expired
         """
+        if self.cache:
+            payload = self.cache.get(self.secret_digest, token)
+            if payload is not None:
+                return payload
+
         try:
-            return jwt.decode(token, self.secret, algorithms=['HS256'])
+            payload = jwt.decode(token, self.secret, algorithms=['HS256'])
         except jwt.InvalidTokenError:
             raise AuthenticationError()
 
+        if self.cache:
+            self.cache.set(self.secret_digest, token, payload)
+
+        return payload
+
     def decode(self, token: str) -> Optional[Union[dict, str]]:
         """
         Decode a JWT token without verification
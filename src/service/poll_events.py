@@ -0,0 +1,81 @@
+from os import getenv
+from typing import AsyncIterator, Optional
+
+from database.database import engine
+from models.poll import PollReturn
+from utils.broadcast import IBroadcast, InMemoryBroadcast, PostgresBroadcast, Subscription
+from utils.metrics import metrics
+
+
+def build_broadcast() -> IBroadcast:
+    max_queued = int(getenv("POLL_STREAM_MAX_QUEUED", "64"))
+
+    match getenv("BROADCAST_BACKEND", "memory"):
+        case "memory":
+            return InMemoryBroadcast(max_queued)
+        case "postgres":
+            return PostgresBroadcast(engine, max_queued=max_queued)
+        case backend:
+            raise ValueError(f"Unknown BROADCAST_BACKEND {backend}")
+
+
+broadcast = build_broadcast()
+
+metrics.register("broadcast", broadcast.stats)
+
+
+def poll_channel(poll_id: str) -> str:
+    return f"poll:{poll_id}"
+
+
+def poll_votes_message(poll: PollReturn) -> str:
+    return poll.model_dump_json(include={"id", "votes"})
+
+
+def publish_poll_votes(poll: PollReturn, hub: Optional[IBroadcast] = None) -> None:
+    """
+    Send the poll tallies to its watchers. They are serialized once here,
+    whatever the number of watchers.
+    """
+    (hub or broadcast).publish(poll_channel(poll.id), poll_votes_message(poll))
+
+
+class PollWatch:
+    """
+    The tallies of a poll when it started being watched, then the tallies
+    after each vote committed since.
+    """
+
+    def __init__(self, subscription: Subscription, poll: PollReturn):
+        self.subscription = subscription
+        self.poll = poll
+
+    async def messages(self, heartbeat: float) -> AsyncIterator[Optional[str]]:
+        """
+        Yield the serialized tallies, or None after heartbeat seconds without
+        a vote so the caller can keep the connection alive.
+        """
+        try:
+            yield poll_votes_message(self.poll)
+
+            while True:
+                yield await self.subscription.get(heartbeat)
+        finally:
+            self.subscription.close()
+
+    async def server_sent_events(self, heartbeat: float) -> AsyncIterator[str]:
+        try:
+            async for message in self.messages(heartbeat):
+                if message is None:
+                    yield ": keepalive\n\n"
+                else:
+                    yield f"event: votes\ndata: {message}\n\n"
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self.subscription.close()
+
+
+def poll_stream_heartbeat() -> float:
+    return float(getenv("POLL_STREAM_HEARTBEAT_SECONDS", "15"))
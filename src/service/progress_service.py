@@ -0,0 +1,615 @@
+from abc import ABCMeta, abstractmethod
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import reduce
+import logging
+import operator
+from os import getenv
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Optional
+
+import httpx
+
+from models.errors.errors import BadGatewayError, ServiceUnavailableError
+from models.routine import Schedule
+from utils.availability import week_masks, week_schedules
+from utils.cache import ICache, LRUCache
+from utils.circuit_breaker import CircuitBreaker
+from utils.metrics import LatencyMetrics, metrics
+
+# Responses worth another attempt, anything else is final
+RETRYABLE_STATUS_CODES = {502, 503, 504}
+
+progress_metrics = LatencyMetrics()
+
+
+def build_progress_breaker() -> CircuitBreaker:
+    return CircuitBreaker(
+        failure_threshold=int(getenv("PROGRESS_BREAKER_FAILURES", "5")),
+        reset_timeout=float(getenv("PROGRESS_BREAKER_RESET_SECONDS", "30")),
+    )
+
+
+def build_progress_executor() -> ThreadPoolExecutor:
+    # Fetches members concurrently and runs background refreshes in sync mode
+    return ThreadPoolExecutor(
+        max_workers=int(getenv("PROGRESS_MAX_CONNECTIONS", "20")),
+        thread_name_prefix="progress"
+    )
+
+
+metrics.register("progress_service", progress_metrics.stats)
+
+
+@dataclass(frozen=True)
+class ProgressClientSettings:
+    base_url: str
+    # Seconds allowed for a single attempt
+    timeout: float
+    # Seconds allowed for a whole call, retries and backoff included
+    deadline: float
+    retries: int
+    # Base of the exponential backoff between attempts, in seconds
+    backoff: float
+    max_connections: int
+    # What to do when schedules cannot be fetched: "stale" serves the last
+    # known schedules, if any, "reject" fails fast
+    degraded_policy: str = "stale"
+
+    @staticmethod
+    def from_env() -> "ProgressClientSettings":
+        return ProgressClientSettings(
+            base_url=getenv("PROGRESS_SERVICE_URI", "http://0.0.0.0:8082"),
+            timeout=float(getenv("PROGRESS_TIMEOUT_SECONDS", "2")),
+            deadline=float(getenv("PROGRESS_DEADLINE_SECONDS", "5")),
+            retries=int(getenv("PROGRESS_RETRIES", "2")),
+            backoff=float(getenv("PROGRESS_RETRY_BACKOFF_SECONDS", "0.1")),
+            max_connections=int(getenv("PROGRESS_MAX_CONNECTIONS", "20")),
+            degraded_policy=getenv("PROGRESS_DEGRADED_POLICY", "stale"),
+        )
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections
+        )
+
+    def retry_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, self.backoff * 2 ** attempt)
+
+
+class ProgressClients:
+    """
+    Long lived, pooled HTTP clients for the Progress service, so calls reuse
+    kept-alive connections instead of paying a handshake each time.
+
+    The app lifespan opens the async client on its event loop and closes
+    both on shutdown. The sync client is created on first use.
+    """
+
+    def __init__(self):
+        self.client: Optional[httpx.Client] = None
+        self.async_client: Optional[httpx.AsyncClient] = None
+        self._lock = threading.Lock()
+
+    def sync_client(self, settings: ProgressClientSettings) -> httpx.Client:
+        with self._lock:
+            if self.client is None:
+                self.client = httpx.Client(limits=settings.limits())
+
+            return self.client
+
+    def start(self, settings: Optional[ProgressClientSettings] = None) -> None:
+        settings = settings or ProgressClientSettings.from_env()
+        self.async_client = httpx.AsyncClient(limits=settings.limits())
+
+    async def aclose(self) -> None:
+        if self.async_client is not None:
+            await self.async_client.aclose()
+            self.async_client = None
+
+        with self._lock:
+            if self.client is not None:
+                self.client.close()
+                self.client = None
+
+
+def record_response(breaker: CircuitBreaker, response: httpx.Response) -> None:
+    """
+    Count a final answer of the Progress service in the breaker: server
+    errors are failures and only 2xx are successes, client errors leave the
+    count unchanged
+    """
+    if response.is_server_error:
+        breaker.record_failure()
+    elif response.is_success:
+        breaker.record_success()
+    else:
+        breaker.record_neutral()
+
+
+def parse_free_schedules(response: httpx.Response) -> list[Schedule]:
+    match response.status_code:
+        case 200:
+            try:
+                r: dict = response.json()
+                data = r.get("data", None)
+                if not data:
+                    raise BadGatewayError()
+
+                schedules = data.get("schedules", [])
+
+                return [Schedule(**schedule) for schedule in schedules]
+            except (ValueError, TypeError, AttributeError) as e:
+                # Not JSON, or not the expected shape (ValidationError is a ValueError)
+                logging.error(f"Invalid Progress service answer: {e!r}")
+                raise BadGatewayError()
+        case _:
+            logging.error(response.text)
+            raise BadGatewayError()
+
+
+def read_free_schedules(breaker: CircuitBreaker, response: httpx.Response) -> list[Schedule]:
+    """
+    Parse a final answer of the Progress service, then count it in the
+    breaker. A 2xx whose body is not valid free schedules is a failure.
+    """
+    try:
+        schedules = parse_free_schedules(response)
+    except BadGatewayError:
+        if response.is_success:
+            breaker.record_failure()
+        else:
+            record_response(breaker, response)
+        raise
+
+    record_response(breaker, response)
+    return schedules
+
+
+def intersect_free_schedules(members_schedules: list[list[Schedule]]) -> list[Schedule]:
+    """Get the schedules in which every member is free"""
+    if not members_schedules:
+        return []
+
+    masks = [week_masks(schedules) for schedules in members_schedules]
+
+    return week_schedules(reduce(operator.and_, day) for day in zip(*masks))
+
+
+@dataclass(frozen=True)
+class CachedSchedules:
+    schedules: list[Schedule]
+    fetched_at: float
+
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+class FreeScheduleCache:
+    """
+    Free schedules by member, with stale-while-revalidate.
+
+    Schedules younger than ttl are fresh. Up to stale_ttl seconds later they
+    are still served while a refresh runs in the background. Older ones must
+    be fetched again, but are retained so the degraded "stale" policy can
+    serve them while the Progress service is down.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 60,
+        stale_ttl: float = 300,
+        retention: float = 86400,
+        cache: Optional[ICache] = None
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.cache = cache if cache is not None else LRUCache(
+            max_size=10000, ttl=retention)
+        self._refreshing: set[str] = set()
+        self._lock = threading.Lock()
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.degraded_hits = 0
+
+    @staticmethod
+    def from_env() -> "FreeScheduleCache":
+        return FreeScheduleCache(
+            ttl=float(getenv("PROGRESS_SCHEDULES_TTL_SECONDS", "60")),
+            stale_ttl=float(
+                getenv("PROGRESS_SCHEDULES_STALE_SECONDS", "300")),
+            retention=float(
+                getenv("PROGRESS_SCHEDULES_RETENTION_SECONDS", "86400")),
+        )
+
+    def partition(self, members: list[str]) -> tuple[dict[str, list[Schedule]], list[str], list[str]]:
+        """
+        Returns:
+            The cached schedules that can be served by member, the members
+            among them to refresh in the background, and the members to
+            fetch now
+        """
+        cached: dict[str, list[Schedule]] = {}
+        refresh: list[str] = []
+        fetch: list[str] = []
+
+        for member in members:
+            entry: Optional[CachedSchedules] = self.cache.get(member)
+            age = entry.age() if entry else None
+
+            with self._lock:
+                if entry is None or age is None or age >= self.ttl + self.stale_ttl:
+                    self.misses += 1
+                    fetch.append(member)
+                    continue
+
+                if age >= self.ttl:
+                    self.stale_hits += 1
+                    refresh.append(member)
+                else:
+                    self.fresh_hits += 1
+
+            cached[member] = entry.schedules
+
+        return cached, refresh, fetch
+
+    def set(self, member: str, schedules: list[Schedule]) -> None:
+        self.cache.set(member, CachedSchedules(schedules, time.monotonic()))
+
+    def fallback(self, member: str) -> Optional[list[Schedule]]:
+        """Get the last known schedules of the member, whatever their age"""
+        entry: Optional[CachedSchedules] = self.cache.get(member)
+        if entry is None:
+            return None
+
+        with self._lock:
+            self.degraded_hits += 1
+
+        return entry.schedules
+
+    def begin_refresh(self, member: str) -> bool:
+        """Whether the caller should refresh the member, at most one at a time"""
+        with self._lock:
+            if member in self._refreshing:
+                return False
+
+            self._refreshing.add(member)
+            return True
+
+    def end_refresh(self, member: str) -> None:
+        with self._lock:
+            self._refreshing.discard(member)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.fresh_hits + self.stale_hits + self.misses
+
+            return {
+                "fresh_hits": self.fresh_hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "degraded_hits": self.degraded_hits,
+                "hit_rate": (self.fresh_hits + self.stale_hits) / lookups if lookups else 0.0,
+            }
+
+
+class IProgressService(metaclass=ABCMeta):
+    @abstractmethod
+    def get_free_schedules(self, members: list[str], auth_header: str) -> list[Schedule]:
+        """
+        Get the weekly schedules in which every member is free.
+
+        Raises:
+            BadGatewayError: If the Progress service fails or does not answer in time
+            ServiceUnavailableError: If the Progress service circuit is open
+        """
+        pass
+
+    @abstractmethod
+    def get_members_free_schedules(self, members: list[str], auth_header: str) -> dict[str, list[Schedule]]:
+        """
+        Get the weekly free schedules of each member, in the given order.
+
+        Raises:
+            BadGatewayError: If the Progress service fails or does not answer in time
+            ServiceUnavailableError: If the Progress service circuit is open
+        """
+        pass
+
+
+class ProgressService(IProgressService):
+    """
+    Free schedules are fetched and cached by member, then intersected, so a
+    member's schedules are reused across groups and routine attempts.
+    """
+
+    def __init__(
+        self,
+        client: Optional[httpx.Client] = None,
+        settings: Optional[ProgressClientSettings] = None,
+        schedules: Optional[FreeScheduleCache] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        executor: Optional[ThreadPoolExecutor] = None
+    ):
+        self.settings = settings or ProgressClientSettings.from_env()
+        self.client = client or httpx.Client(limits=self.settings.limits())
+        self.schedules = schedules or FreeScheduleCache.from_env()
+        self.breaker = breaker or build_progress_breaker()
+        self.executor = executor or build_progress_executor()
+
+    def get_free_schedules(self, members: list[str], auth_header: str) -> list[Schedule]:
+        return intersect_free_schedules(list(self.get_members_free_schedules(members, auth_header).values()))
+
+    def get_members_free_schedules(self, members: list[str], auth_header: str) -> dict[str, list[Schedule]]:
+        cached, refresh, fetch = self.schedules.partition(members)
+
+        for member in refresh:
+            if self.schedules.begin_refresh(member):
+                self.executor.submit(self._refresh, member, auth_header)
+
+        fetched = list(self.executor.map(
+            lambda member: self._get_member_schedules(member, auth_header), fetch
+        ))
+
+        fetched = dict(zip(fetch, fetched))
+
+        return {member: cached[member] if member in cached else fetched[member] for member in members}
+
+    def _get_member_schedules(self, member: str, auth_header: str) -> list[Schedule]:
+        try:
+            schedules = self._request([member], auth_header)
+        except (BadGatewayError, ServiceUnavailableError):
+            fallback = self.schedules.fallback(member) \
+                if self.settings.degraded_policy == "stale" else None
+
+            if fallback is None:
+                raise
+
+            logging.warning(
+                f"Serving stale free schedules of member {member}")
+            return fallback
+
+        self.schedules.set(member, schedules)
+        return schedules
+
+    def _refresh(self, member: str, auth_header: str) -> None:
+        try:
+            self.schedules.set(member, self._request([member], auth_header))
+        except Exception as e:
+            logging.warning(
+                f"Could not refresh free schedules of member {member}: {e!r}")
+        finally:
+            self.schedules.end_refresh(member)
+
+    def _request(self, members: list[str], auth_header: str) -> list[Schedule]:
+        if not self.breaker.allow():
+            raise ServiceUnavailableError("Progress service unavailable")
+
+        try:
+            response = self._send(members, auth_header)
+        except BaseException:
+            # Cancelled, or failed unexpectedly: a half open trial must end
+            self.breaker.record_neutral()
+            raise
+
+        if response is None:
+            self.breaker.record_failure()
+            raise BadGatewayError()
+
+        return read_free_schedules(self.breaker, response)
+
+    def _send(self, members: list[str], auth_header: str) -> Optional[httpx.Response]:
+        """Send the request with retries, None when every attempt failed"""
+        deadline = time.monotonic() + self.settings.deadline
+
+        for attempt in range(self.settings.retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            started = time.monotonic()
+            try:
+                response = self.client.get(
+                    f"{self.settings.base_url}/users/freeSchedules/",
+                    params={"users": members},
+                    headers={"Authorization": auth_header},
+                    timeout=min(self.settings.timeout, remaining)
+                )
+            except httpx.RequestError as e:
+                progress_metrics.observe(
+                    time.monotonic() - started, failed=True)
+                logging.warning(f"Progress service request failed: {e!r}")
+            else:
+                retryable = response.status_code in RETRYABLE_STATUS_CODES
+                progress_metrics.observe(
+                    time.monotonic() - started, failed=retryable)
+
+                if not retryable:
+                    return response
+
+                logging.warning(
+                    f"Progress service answered {response.status_code}")
+
+            if attempt < self.settings.retries:
+                delay = min(self.settings.retry_delay(attempt),
+                            deadline - time.monotonic())
+                if delay > 0:
+                    time.sleep(delay)
+                progress_metrics.retried()
+
+        return None
+
+
+class IAsyncProgressService(metaclass=ABCMeta):
+    @abstractmethod
+    async def get_free_schedules(self, members: list[str], auth_header: str) -> list[Schedule]:
+        """
+        Get the weekly schedules in which every member is free.
+
+        Raises:
+            BadGatewayError: If the Progress service fails or does not answer in time
+            ServiceUnavailableError: If the Progress service circuit is open
+        """
+        pass
+
+    @abstractmethod
+    async def get_members_free_schedules(self, members: list[str], auth_header: str) -> dict[str, list[Schedule]]:
+        """
+        Get the weekly free schedules of each member, in the given order.
+
+        Raises:
+            BadGatewayError: If the Progress service fails or does not answer in time
+            ServiceUnavailableError: If the Progress service circuit is open
+        """
+        pass
+
+
+# Keeps background refreshes referenced until they are done
+_refresh_tasks: set[asyncio.Task] = set()
+
+
+class AsyncProgressService(IAsyncProgressService):
+    """
+    Async counterpart of ProgressService, members are fetched concurrently.
+    """
+
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        settings: Optional[ProgressClientSettings] = None,
+        schedules: Optional[FreeScheduleCache] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        clients: Optional[ProgressClients] = None
+    ):
+        self.settings = settings or ProgressClientSettings.from_env()
+        self.client = client
+        self.schedules = schedules or FreeScheduleCache.from_env()
+        self.breaker = breaker or build_progress_breaker()
+        # Their async client is only opened by the lifespan, so it is looked up on each call
+        self.clients = clients or ProgressClients()
+
+    @asynccontextmanager
+    async def _client(self) -> AsyncIterator[httpx.AsyncClient]:
+        client = self.client or self.clients.async_client
+        if client is not None:
+            yield client
+            return
+
+        # Without a lifespan (e.g. test apps) there is no shared client
+        async with httpx.AsyncClient(limits=self.settings.limits()) as client:
+            yield client
+
+    async def get_free_schedules(self, members: list[str], auth_header: str) -> list[Schedule]:
+        return intersect_free_schedules(list((await self.get_members_free_schedules(members, auth_header)).values()))
+
+    async def get_members_free_schedules(self, members: list[str], auth_header: str) -> dict[str, list[Schedule]]:
+        cached, refresh, fetch = self.schedules.partition(members)
+
+        for member in refresh:
+            if self.schedules.begin_refresh(member):
+                task = asyncio.create_task(self._refresh(member, auth_header))
+                _refresh_tasks.add(task)
+                task.add_done_callback(_refresh_tasks.discard)
+
+        fetched = await asyncio.gather(*(
+            self._get_member_schedules(member, auth_header) for member in fetch
+        ))
+
+        fetched = dict(zip(fetch, fetched))
+
+        return {member: cached[member] if member in cached else fetched[member] for member in members}
+
+    async def _get_member_schedules(self, member: str, auth_header: str) -> list[Schedule]:
+        try:
+            schedules = await self._request([member], auth_header)
+        except (BadGatewayError, ServiceUnavailableError):
+            fallback = self.schedules.fallback(member) \
+                if self.settings.degraded_policy == "stale" else None
+
+            if fallback is None:
+                raise
+
+            logging.warning(
+                f"Serving stale free schedules of member {member}")
+            return fallback
+
+        self.schedules.set(member, schedules)
+        return schedules
+
+    async def _refresh(self, member: str, auth_header: str) -> None:
+        try:
+            self.schedules.set(member, await self._request([member], auth_header))
+        except Exception as e:
+            logging.warning(
+                f"Could not refresh free schedules of member {member}: {e!r}")
+        finally:
+            self.schedules.end_refresh(member)
+
+    async def _request(self, members: list[str], auth_header: str) -> list[Schedule]:
+        if not self.breaker.allow():
+            raise ServiceUnavailableError("Progress service unavailable")
+
+        try:
+            response = await self._send(members, auth_header)
+        except BaseException:
+            # Cancelled, or failed unexpectedly: a half open trial must end
+            self.breaker.record_neutral()
+            raise
+
+        if response is None:
+            self.breaker.record_failure()
+            raise BadGatewayError()
+
+        return read_free_schedules(self.breaker, response)
+
+    async def _send(self, members: list[str], auth_header: str) -> Optional[httpx.Response]:
+        """Send the request with retries, None when every attempt failed"""
+        deadline = time.monotonic() + self.settings.deadline
+
+        async with self._client() as client:
+            for attempt in range(self.settings.retries + 1):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+
+                started = time.monotonic()
+                try:
+                    response = await client.get(
+                        f"{self.settings.base_url}/users/freeSchedules/",
+                        params={"users": members},
+                        headers={"Authorization": auth_header},
+                        timeout=min(self.settings.timeout, remaining)
+                    )
+                except httpx.RequestError as e:
+                    progress_metrics.observe(
+                        time.monotonic() - started, failed=True)
+                    logging.warning(f"Progress service request failed: {e!r}")
+                else:
+                    retryable = response.status_code in RETRYABLE_STATUS_CODES
+                    progress_metrics.observe(
+                        time.monotonic() - started, failed=retryable)
+
+                    if not retryable:
+                        return response
+
+                    logging.warning(
+                        f"Progress service answered {response.status_code}")
+
+                if attempt < self.settings.retries:
+                    delay = min(self.settings.retry_delay(attempt),
+                                deadline - time.monotonic())
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    progress_metrics.retried()
+
+        return None
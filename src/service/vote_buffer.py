@@ -0,0 +1,293 @@
+from dataclasses import dataclass, field
+import logging
+from os import getenv
+import threading
+import time
+from typing import Any, Optional
+
+from models.errors.errors import NotFoundError
+from models.poll import PollReturn, VoteDTO
+from repository.group_repository import IGroupRepository
+from service.poll_events import publish_poll_votes
+
+
+def is_vote_buffer_enabled() -> bool:
+    return getenv("VOTE_INGESTION_MODE", "direct").lower() == "buffered"
+
+
+@dataclass
+class BufferedPoll:
+    """
+    A poll as seen by the buffer: its persisted votes overlaid with the
+    ones waiting to be written, and the tallies of both.
+    """
+    poll: PollReturn
+    votes: dict[str, int]
+    tallies: dict[int, int] = field(default_factory=dict)
+    pending: dict[str, int] = field(default_factory=dict)
+    in_flight: dict[str, int] = field(default_factory=dict)
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    def __post_init__(self):
+        for option_id in self.votes.values():
+            self.tallies[option_id] = self.tallies.get(option_id, 0) + 1
+
+    def apply(self, user_id: str, option_id: int) -> None:
+        previous = self.votes.get(user_id)
+        if previous == option_id:
+            return
+
+        if previous is not None:
+            self.tallies[previous] -= 1
+
+        self.votes[user_id] = option_id
+        self.tallies[option_id] = self.tallies.get(option_id, 0) + 1
+
+    def expired(self, max_age: float) -> bool:
+        return time.monotonic() - self.loaded_at >= max_age
+
+    def projection(self) -> PollReturn:
+        return self.poll.model_copy(update={
+            "votes": {option_id: count for option_id, count in self.tallies.items() if count > 0}
+        })
+
+
+class VoteBuffer:
+    """
+    Accepts votes in memory and writes them in batches, trading a short
+    durability window for write throughput.
+
+    A poll's votes are loaded on its first buffered vote. Then every vote
+    replaces the user's previous one (last write wins) and is acknowledged
+    right away with the projected tallies. A background thread writes the
+    pending votes with one multi-row upsert every flush_interval seconds,
+    or as soon as max_pending votes are waiting. close() drains the buffer,
+    retrying failed flushes, votes still pending when the process dies
+    without it are lost.
+
+    Polls stay loaded across flushes and are reloaded once older than
+    max_age seconds, so votes other workers flushed show up in the
+    projected tallies within about max_age. Idle polls are evicted then.
+    """
+
+    def __init__(
+        self,
+        repository: IGroupRepository,
+        flush_interval: float = 0.1,
+        max_pending: int = 500,
+        max_age: float = 1,
+        close_retries: int = 3
+    ):
+        self.repository = repository
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_age = max_age
+        self.close_retries = close_retries
+        self._polls: dict[str, BufferedPoll] = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.accepted = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.last_flush_seconds = 0.0
+
+    @staticmethod
+    def from_env(repository: IGroupRepository) -> "VoteBuffer":
+        return VoteBuffer(
+            repository,
+            flush_interval=float(getenv("VOTE_FLUSH_INTERVAL_MS", "100")) / 1000,
+            max_pending=int(getenv("VOTE_FLUSH_MAX_VOTES", "500")),
+            max_age=float(getenv("VOTE_POLL_MAX_AGE_MS", "1000")) / 1000,
+        )
+
+    def put(self, vote: VoteDTO) -> PollReturn:
+        """
+        Buffer the vote and get the poll with the projected tallies.
+
+        Raises:
+            NotFoundError: If the poll or the voted option does not exist
+        """
+        state = self._load(vote.poll_id)
+
+        if vote.option_id not in [option.id for option in state.poll.options]:
+            raise NotFoundError(
+                detail=f"Option with id {vote.option_id} does not exist in poll {vote.poll_id}"
+            )
+
+        with self._lock:
+            # A flush may have evicted the poll meanwhile
+            state = self._polls.setdefault(vote.poll_id, state)
+
+            if vote.user_id not in state.pending:
+                self._pending += 1
+
+            state.pending[vote.user_id] = vote.option_id
+            state.apply(vote.user_id, vote.option_id)
+            self.accepted += 1
+
+            projection = state.projection()
+            full = self._pending >= self.max_pending
+
+        if self._closed:
+            self.flush()
+        else:
+            self._start()
+            if full:
+                self._wake.set()
+
+        return projection
+
+    def _load(self, poll_id: str) -> BufferedPoll:
+        with self._lock:
+            state = self._polls.get(poll_id)
+            if state is not None and not state.expired(self.max_age):
+                return state
+
+        poll = self.repository.get_poll(poll_id)
+        if not poll:
+            raise NotFoundError(f"Poll with id {poll_id} not found")
+
+        votes = self.repository.get_poll_user_votes(poll_id)
+
+        with self._lock:
+            current = self._polls.get(poll_id)
+            if current is not None and not current.expired(self.max_age):
+                return current
+
+            state = BufferedPoll(poll, votes)
+
+            # Votes not written yet are missing from the loaded ones
+            if current is not None:
+                state.pending = current.pending
+                state.in_flight = current.in_flight
+                for user_id, option_id in (current.in_flight | current.pending).items():
+                    state.apply(user_id, option_id)
+
+            self._polls[poll_id] = state
+            return state
+
+    def _start(self) -> None:
+        if self._thread is not None:
+            return
+
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="vote-buffer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write every pending vote in one statement. On failure the votes are
+        kept pending, unless the user voted again since, and retried on the
+        next flush.
+
+        Returns:
+            int: The number of votes written
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch: list[VoteDTO] = []
+                for poll_id, state in list(self._polls.items()):
+                    if not state.pending:
+                        # Idle since it was loaded
+                        if state.expired(self.max_age):
+                            del self._polls[poll_id]
+                        continue
+
+                    state.in_flight = state.pending
+                    state.pending = {}
+                    batch.extend(
+                        VoteDTO(poll_id=poll_id, user_id=user_id,
+                                option_id=option_id)
+                        for user_id, option_id in state.in_flight.items()
+                    )
+                self._pending = 0
+
+            if not batch:
+                return 0
+
+            started = time.monotonic()
+            try:
+                written = self.repository.save_poll_votes(batch)
+            except Exception as e:
+                logging.error(
+                    f"Could not flush {len(batch)} buffered votes: {e!r}")
+
+                with self._lock:
+                    self.failed_flushes += 1
+                    for state in self._polls.values():
+                        state.pending = state.in_flight | state.pending
+                        state.in_flight = {}
+                    self._pending = sum(
+                        len(state.pending) for state in self._polls.values())
+
+                return 0
+
+            with self._lock:
+                flushed: list[PollReturn] = []
+                for state in self._polls.values():
+                    if state.in_flight:
+                        flushed.append(state.projection())
+
+                    state.in_flight = {}
+
+                self.flushes += 1
+                self.flushed += written
+                self.dropped += len(batch) - written
+                self.last_flush_seconds = time.monotonic() - started
+
+            # Watchers get one update per flushed poll instead of one per vote
+            for poll in flushed:
+                publish_poll_votes(poll)
+
+            return written
+
+    def close(self) -> None:
+        """
+        Stop the background flushes and write the pending votes, retrying
+        close_retries times with a growing delay if the database fails
+        """
+        self._closed = True
+        self._wake.set()
+
+        if self._thread is not None:
+            self._thread.join()
+
+        for attempt in range(self.close_retries + 1):
+            self.flush()
+
+            if not self._pending or attempt == self.close_retries:
+                break
+
+            time.sleep(0.1 * 2 ** attempt)
+
+        if self._pending:
+            logging.error(
+                f"{self._pending} buffered votes were not written on close")
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": is_vote_buffer_enabled(),
+                "accepted": self.accepted,
+                "pending": self._pending,
+                "flushed": self.flushed,
+                "dropped": self.dropped,
+                "flushes": self.flushes,
+                "failed_flushes": self.failed_flushes,
+                "last_flush_ms": self.last_flush_seconds * 1000,
+            }
+
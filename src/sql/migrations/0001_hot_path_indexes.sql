@@ -0,0 +1,21 @@
+-- get_user_groups: group_members filtered by user_id
+CREATE INDEX IF NOT EXISTS group_members_user_id_idx
+    ON group_members (user_id, group_id);
+
+-- get_routines: group_routines filtered by group_id
+CREATE INDEX IF NOT EXISTS group_routines_group_id_idx
+    ON group_routines (group_id);
+
+-- get_events pages on (date, start_hour, id) within a group: the keyset
+-- condition and the order are both served by this index, which also covers
+-- the (group_id, date) lookups of find_group_colliding_events
+CREATE INDEX IF NOT EXISTS group_events_group_id_date_start_hour_id_idx
+    ON group_events (group_id, date, start_hour, id);
+
+-- get_poll_by_event_id
+CREATE INDEX IF NOT EXISTS poll_event_id_idx
+    ON poll (event_id);
+
+-- get_poll / get_poll_options: the primary key leads with the option id
+CREATE INDEX IF NOT EXISTS poll_options_poll_id_idx
+    ON poll_options (poll_id, id);
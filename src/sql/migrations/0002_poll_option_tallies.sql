@@ -0,0 +1,38 @@
+-- Vote tallies maintained on the options, so reading a poll's votes is an
+-- index read of its options instead of an aggregate over poll_votes
+ALTER TABLE poll_options
+    ADD COLUMN IF NOT EXISTS vote_count INTEGER NOT NULL DEFAULT 0;
+
+UPDATE poll_options o
+SET vote_count = t.vote_count
+FROM (
+    SELECT poll_id, option_id, COUNT(*) AS vote_count
+    FROM poll_votes
+    GROUP BY poll_id, option_id
+) t
+WHERE o.poll_id = t.poll_id AND o.id::text = t.option_id;
+
+-- Runs in the transaction of the vote change, so tallies commit or roll back with it
+CREATE OR REPLACE FUNCTION poll_votes_tally() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE poll_options
+        SET vote_count = vote_count - 1
+        WHERE poll_id = OLD.poll_id AND id::text = OLD.option_id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE poll_options
+        SET vote_count = vote_count + 1
+        WHERE poll_id = NEW.poll_id AND id::text = NEW.option_id;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS poll_votes_tally ON poll_votes;
+
+CREATE TRIGGER poll_votes_tally
+    AFTER INSERT OR DELETE OR UPDATE OF poll_id, option_id ON poll_votes
+    FOR EACH ROW EXECUTE FUNCTION poll_votes_tally();
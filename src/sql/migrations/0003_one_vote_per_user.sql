@@ -0,0 +1,18 @@
+-- A user holds a single vote per poll. Votes are replaced with one upsert on
+-- this key, so duplicates left by concurrent vote changes are dropped first,
+-- keeping the latest (the tally trigger discounts the dropped ones)
+DELETE FROM poll_votes
+WHERE ctid IN (
+    SELECT ctid
+    FROM (
+        SELECT ctid, ROW_NUMBER() OVER (
+            PARTITION BY poll_id, user_id
+            ORDER BY created_at DESC NULLS LAST, option_id
+        ) AS position
+        FROM poll_votes
+    ) ranked
+    WHERE position > 1
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS poll_votes_poll_id_user_id_key
+    ON poll_votes (poll_id, user_id);
@@ -0,0 +1,31 @@
+-- Events of a group cannot overlap on the same date. Hours are closed ranges,
+-- so an event ending at 12 collides with one starting at 12, as before.
+--
+-- GiST needs an operator class for every column of the constraint. Equality
+-- on group_id and date is expressed as equality of singleton ranges, which
+-- GiST supports natively, so the btree_gist extension is not required.
+--
+-- The range of an event ending before it starts is invalid, and would make
+-- the constraint fail with a data error, so the hours are checked first.
+--
+-- Adding the constraints fails if overlapping events already exist: they have
+-- to be rescheduled first, and inverted ones fixed.
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'text_range') THEN
+        CREATE TYPE text_range AS RANGE (subtype = text, collation = "C");
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'group_events_hours_check') THEN
+        ALTER TABLE group_events ADD CONSTRAINT group_events_hours_check CHECK (start_hour <= end_hour);
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'group_events_no_overlap') THEN
+        ALTER TABLE group_events ADD CONSTRAINT group_events_no_overlap EXCLUDE USING gist (
+            text_range(group_id, group_id, '[]') WITH =,
+            daterange(date, date, '[]') WITH =,
+            int4range(start_hour, end_hour, '[]') WITH &&
+        );
+    END IF;
+END
+$$;
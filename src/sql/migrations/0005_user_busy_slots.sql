@@ -0,0 +1,111 @@
+-- Weekly busy slots of each user: one row per routine of every group the
+-- user is a member of, kept up to date by triggers on group_routines and
+-- group_members. The busy slots of a set of users are then an index read
+-- on user_id, instead of a join returning each routine once per member of
+-- its group.
+--
+-- Slots are also ranges of hours of the week, Monday 0h being 0, so the
+-- slots overlapping a candidate routine are found with one GiST index scan.
+-- Ranges are half open: slots sharing a bound do not overlap. Inverted hours
+-- give an empty range, which overlaps nothing.
+CREATE OR REPLACE FUNCTION routine_week_hours(day VARCHAR, start_hour SMALLINT, end_hour SMALLINT)
+RETURNS int4range AS $$
+    SELECT int4range(offset_ + start_hour, offset_ + GREATEST(start_hour, end_hour))
+    FROM (
+        SELECT CASE day
+            WHEN 'Monday' THEN 0
+            WHEN 'Tuesday' THEN 1
+            WHEN 'Wednesday' THEN 2
+            WHEN 'Thursday' THEN 3
+            WHEN 'Friday' THEN 4
+            WHEN 'Saturday' THEN 5
+            WHEN 'Sunday' THEN 6
+        END * 24 AS offset_
+    ) day_offset
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE TABLE IF NOT EXISTS user_busy_slots (
+    user_id VARCHAR(36) NOT NULL,
+    routine_id VARCHAR(36) NOT NULL,
+    group_id VARCHAR(36) NOT NULL,
+    day VARCHAR(10) NOT NULL,
+    start_hour SMALLINT NOT NULL,
+    end_hour SMALLINT NOT NULL,
+    week_hours int4range NOT NULL,
+    PRIMARY KEY (user_id, routine_id)
+);
+
+-- Routine changes
+CREATE INDEX IF NOT EXISTS user_busy_slots_routine_id_idx
+    ON user_busy_slots (routine_id);
+
+-- Membership changes
+CREATE INDEX IF NOT EXISTS user_busy_slots_group_id_idx
+    ON user_busy_slots (group_id, user_id);
+
+-- find_members_colliding_routine filters the busy slots of the members with
+-- week_hours && range, combined with the user_id lookups instead of being
+-- checked on every heap row
+CREATE INDEX IF NOT EXISTS user_busy_slots_week_hours_idx
+    ON user_busy_slots USING gist (week_hours);
+
+INSERT INTO user_busy_slots (user_id, routine_id, group_id, day, start_hour, end_hour, week_hours)
+SELECT gm.user_id, gr.id, gr.group_id, gr.day, gr.start_hour, gr.end_hour,
+    routine_week_hours(gr.day, gr.start_hour, gr.end_hour)
+FROM group_routines gr
+JOIN group_members gm ON gm.group_id = gr.group_id
+ON CONFLICT DO NOTHING;
+
+-- Both triggers run in the transaction of the change, so the projection
+-- commits or rolls back with it
+CREATE OR REPLACE FUNCTION group_routines_busy_slots() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        DELETE FROM user_busy_slots
+        WHERE routine_id = OLD.id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO user_busy_slots (user_id, routine_id, group_id, day, start_hour, end_hour, week_hours)
+        SELECT user_id, NEW.id, NEW.group_id, NEW.day, NEW.start_hour, NEW.end_hour,
+            routine_week_hours(NEW.day, NEW.start_hour, NEW.end_hour)
+        FROM group_members
+        WHERE group_id = NEW.group_id
+        ON CONFLICT DO NOTHING;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS group_routines_busy_slots ON group_routines;
+
+CREATE TRIGGER group_routines_busy_slots
+    AFTER INSERT OR DELETE OR UPDATE OF id, group_id, day, start_hour, end_hour ON group_routines
+    FOR EACH ROW EXECUTE FUNCTION group_routines_busy_slots();
+
+CREATE OR REPLACE FUNCTION group_members_busy_slots() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        DELETE FROM user_busy_slots
+        WHERE group_id = OLD.group_id AND user_id = OLD.user_id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO user_busy_slots (user_id, routine_id, group_id, day, start_hour, end_hour, week_hours)
+        SELECT NEW.user_id, id, group_id, day, start_hour, end_hour,
+            routine_week_hours(day, start_hour, end_hour)
+        FROM group_routines
+        WHERE group_id = NEW.group_id
+        ON CONFLICT DO NOTHING;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS group_members_busy_slots ON group_members;
+
+CREATE TRIGGER group_members_busy_slots
+    AFTER INSERT OR DELETE OR UPDATE ON group_members
+    FOR EACH ROW EXECUTE FUNCTION group_members_busy_slots();
@@ -1,6 +1,7 @@
 import os
 from os import getenv
 import dotenv
+import pytest
 
 
 def pytest_configure(config):
@@ -17,3 +18,28 @@ def pytest_configure(config):
 
     # Additional setup code here
     print("Running before all tests setup...")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def migrated_database():
+    """
+    Bring the test database schema up to date before any test runs.
+    """
+    from database.migrations import apply_migrations
+
+    apply_migrations()
+
+
+@pytest.fixture(autouse=True)
+def clear_group_cache(request):
+    """
+    Tests clean the tables with raw SQL, which bypasses cache invalidation.
+    The routes use the cache of the container of their test module app.
+    """
+    yield
+
+    app = getattr(request.module, "app", None)
+    container = getattr(app.state, "container", None) if app else None
+
+    if container is not None:
+        container.group_cache.cache.clear()
@@ -0,0 +1,195 @@
+from datetime import datetime, timedelta
+from fastapi.exceptions import RequestValidationError
+import pytest
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from fastapi import FastAPI, Request, status
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from container import Container
+from database import unit_of_work
+from database.database import ASYNC_DATABASE_URL, engine
+from middleware.error_handler import error_handler
+from models.errors.errors import CustomHTTPException
+from models.routine import Schedule
+from repository import async_group_repository
+from routes.group_routes import router as group_router
+from service.async_group_service import AsyncGroupService
+
+app = FastAPI()
+
+app.include_router(group_router, tags=["groups"])
+
+
+@app.exception_handler(RequestValidationError)
+@app.exception_handler(CustomHTTPException)
+@app.exception_handler(Exception)
+async def exception_handler(request: Request, exc: Exception) -> JSONResponse:
+    return error_handler(request, exc)
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def async_mode(monkeypatch):
+    # Every TestClient request runs on its own event loop, so pooled asyncpg
+    # connections cannot be shared between requests here
+    monkeypatch.setenv("GROUP_SERVICE_MODE", "async")
+    test_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+    monkeypatch.setattr(async_group_repository, "async_engine", test_engine)
+    monkeypatch.setattr(unit_of_work, "async_engine", test_engine)
+    monkeypatch.setattr(app.state, "container", Container(), raising=False)
+    yield
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM poll_votes"))
+        conn.execute(text("DELETE FROM poll_options"))
+        conn.execute(text("DELETE FROM poll"))
+        conn.execute(text("DELETE FROM group_events"))
+        conn.execute(text("DELETE FROM group_routines"))
+        conn.execute(text("DELETE FROM group_members"))
+        conn.execute(text("DELETE FROM groups"))
+
+
+class TestAsyncGroupRoutes:
+    valid_group = {
+        "name": "Test Group",
+        "description": "Test Group Description",
+        "owner_id": "1cdba348-0279-4634-9bcd-c8ea1d2856af"
+    }
+
+    valid_user_id = "1cdba348-0279-4634-9bcd-c8ea1d2856af"
+
+    valid_event = {
+        "name": "Team Meeting",
+        "description": "Weekly team status meeting",
+        "date": (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%dT00:00:00"),
+        "start_hour": 10,
+        "end_hour": 12,
+        "creator_id": "1cdba348-0279-4634-9bcd-c8ea1d2856af",
+        "poll": {
+            "question": "What topic should we focus on?",
+            "options": [
+                {"id": 1, "text": "Project Status"},
+                {"id": 2, "text": "Technical Challenges"}
+            ]
+        }
+    }
+
+    def test_service_follows_mode(self, monkeypatch):
+        assert isinstance(Container().group_controller.service, AsyncGroupService)
+
+        monkeypatch.setenv("GROUP_SERVICE_MODE", "unknown")
+        with pytest.raises(ValueError):
+            Container()
+
+    def test_create_and_get_group(self):
+        response = client.post("/groups", json=self.valid_group)
+        assert response.status_code == status.HTTP_201_CREATED
+        group_id = response.json()["data"]["id"]
+
+        response = client.get(f"/groups/{group_id}")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["data"]["id"] == group_id
+        assert response.json()["data"]["routines"] == []
+
+    def test_get_nonexistent_group(self):
+        group_id = "3cdba348-0279-4634-9bcd-c8ea1d2856af"
+        response = client.get(f"/groups/{group_id}")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.json()[
+            "detail"] == f"Group with id {group_id} not found"
+
+    def test_add_existing_member(self):
+        response = client.post("/groups", json=self.valid_group)
+        group_id = response.json()["data"]["id"]
+
+        response = client.post(
+            f"/groups/{group_id}/users/{self.valid_user_id}")
+        assert response.status_code == status.HTTP_409_CONFLICT
+
+    def test_post_group_routine_with_user_schedules_colision(self, monkeypatch):
+        async def mock_free_schedules(self, members: list[str], auth_header: str) -> list[Schedule]:
+            return [Schedule(day="Monday", start_hour=9, end_hour=10)]  # type: ignore
+
+        monkeypatch.setattr(
+            AsyncGroupService, "get_free_schedules", mock_free_schedules)
+
+        response = client.post("/groups", json=self.valid_group)
+        group_id = response.json()["data"]["id"]
+
+        routine = {
+            "name": "Test Routine",
+            "description": "Test Routine Description",
+            "day": "Monday",
+            "start_hour": 8,
+            "end_hour": 11,
+            "creator_id": self.valid_user_id
+        }
+
+        response = client.post(
+            f"/groups/{group_id}/routines", json=routine)
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert "There are members with conflicting routines" == response.json()[
+            "detail"]
+
+        routine["start_hour"] = 9
+        routine["end_hour"] = 10
+        response = client.post(
+            f"/groups/{group_id}/routines", json=routine)
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json()["data"][0]["name"] == routine["name"]
+
+    def test_get_availability_suggestions(self, monkeypatch):
+        # Connections checked out when the Progress service is called
+        checked_out = {"value": 0}
+        calls: list[int] = []
+
+        def on_checkout(*args):
+            checked_out["value"] += 1
+
+        def on_checkin(*args):
+            checked_out["value"] -= 1
+
+        async def mock_members_free_schedules(self, members: list[str], auth_header: str) -> dict[str, list[Schedule]]:
+            calls.append(checked_out["value"])
+            return {members[0]: [Schedule(day="Sunday", start_hour=18, end_hour=21)]}  # type: ignore
+
+        monkeypatch.setattr(
+            AsyncGroupService, "get_members_free_schedules", mock_members_free_schedules)
+        sync_engine = unit_of_work.async_engine.sync_engine
+        event.listen(sync_engine, "checkout", on_checkout)
+        event.listen(sync_engine, "checkin", on_checkin)
+
+        response = client.post("/groups", json=self.valid_group)
+        group_id = response.json()["data"]["id"]
+
+        response = client.get(
+            f"/groups/{group_id}/availability/suggestions?duration=2")
+        assert response.status_code == status.HTTP_200_OK
+        assert [(s["start_hour"], s["end_hour"]) for s in response.json()["data"]] == [
+            (18, 20), (19, 21)]
+        assert response.json()["data"][0]["available_members"] == [
+            self.valid_user_id]
+        assert calls == [0]
+
+        event.remove(sync_engine, "checkout", on_checkout)
+        event.remove(sync_engine, "checkin", on_checkin)
+
+    def test_event_poll_vote(self):
+        response = client.post("/groups", json=self.valid_group)
+        group_id = response.json()["data"]["id"]
+
+        response = client.post(
+            f"/groups/{group_id}/events", json=self.valid_event)
+        assert response.status_code == status.HTTP_201_CREATED
+        poll_id = response.json()["data"]["poll"]["id"]
+
+        vote = {"user_id": self.valid_user_id, "option_id": 1}
+        client.put(f"/polls/{poll_id}", json=vote)
+
+        vote["option_id"] = 2
+        response = client.put(f"/polls/{poll_id}", json=vote)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["data"]["votes"] == {"2": 1}
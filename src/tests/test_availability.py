@@ -0,0 +1,112 @@
+from datetime import date, datetime
+
+import numpy as np
+
+from models.event import EventDTO
+from models.routine import Schedule
+from utils.availability import FULL_DAY, WeeklyAvailability, hours_mask, rank_slots, week_ahead_schedules, week_masks, week_schedules
+
+
+def schedule(day: str, start_hour: int, end_hour: int) -> Schedule:
+    return Schedule(day=day, start_hour=start_hour, end_hour=end_hour)  # type: ignore
+
+
+class TestMasks:
+    def test_hours_mask(self):
+        assert hours_mask(0, 1) == 0b1
+        assert hours_mask(2, 5) == 0b11100
+        assert hours_mask(0, 24) == FULL_DAY
+        assert hours_mask(5, 5) == 0
+
+    def test_week_masks_round_trip(self):
+        schedules = [schedule("Monday", 8, 10), schedule("Monday", 10, 12),
+                     schedule("Sunday", 20, 22)]
+
+        masks = week_masks(schedules)
+        assert masks[0] == hours_mask(8, 12)
+        assert masks[6] == hours_mask(20, 22)
+
+        # Adjacent schedules are merged
+        assert week_schedules(masks) == [
+            schedule("Monday", 8, 12), schedule("Sunday", 20, 22)]
+
+
+class TestWeeklyAvailability:
+    availability = WeeklyAvailability.from_schedules({
+        "a": [schedule("Monday", 8, 12)],
+        "b": [schedule("Monday", 10, 14), schedule("Friday", 0, 23)],
+        "c": [],
+    })
+
+    def test_blocking_members(self):
+        assert self.availability.blocking_members(
+            schedule("Monday", 11, 12)) == ["a", "b"]
+        assert self.availability.blocking_members(
+            schedule("Monday", 12, 13)) == ["b"]
+        assert self.availability.collides(schedule("Friday", 3, 4))
+        assert not self.availability.collides(schedule("Sunday", 3, 4))
+
+    def test_lacking_members(self):
+        assert self.availability.lacking_members(
+            schedule("Monday", 10, 12)) == ["c"]
+        assert self.availability.lacking_members(
+            schedule("Monday", 9, 12)) == ["b", "c"]
+
+    def test_union_and_intersection(self):
+        union = self.availability.union()
+        assert union[0] == hours_mask(8, 14)
+        assert union[4] == hours_mask(0, 23)
+
+        assert self.availability.intersection() == [0] * 7
+
+    def test_hours(self):
+        hours = self.availability.hours()
+
+        assert hours.shape == (3, 7, 24)
+        assert hours.dtype == np.bool_
+        assert hours[0, 0].tolist() == [8 <= h < 12 for h in range(24)]
+        assert hours[1, 4, :23].all()
+        assert not hours[2].any()
+
+    def test_empty(self):
+        availability = WeeklyAvailability.from_schedules({})
+
+        assert availability.masks.shape == (0, 7)
+        assert not availability.collides(schedule("Monday", 8, 12))
+
+
+class TestRankSlots:
+    availability = WeeklyAvailability.from_schedules({
+        "a": [schedule("Monday", 8, 12)],
+        "b": [schedule("Monday", 10, 14)],
+    })
+
+    def test_ranks_by_free_members(self):
+        slots = rank_slots(self.availability, [0] * 7, 2, 3)
+
+        assert slots == [
+            (schedule("Monday", 10, 12), ["a", "b"]),
+            (schedule("Monday", 8, 10), ["a"]),
+            (schedule("Monday", 9, 11), ["a"]),
+        ]
+
+    def test_busy_hours_are_left_out(self):
+        busy = week_masks([schedule("Monday", 11, 12)])
+
+        slots = rank_slots(self.availability, busy, 2, 10)
+
+        assert [slot for slot, _ in slots] == [
+            schedule("Monday", 8, 10), schedule("Monday", 9, 11), schedule("Monday", 12, 14)]
+
+    def test_no_free_members(self):
+        assert rank_slots(self.availability, [0] * 7, 5, 10) == []
+        assert rank_slots(WeeklyAvailability.from_schedules({}), [0] * 7, 1, 10) == []
+
+    def test_week_ahead_schedules(self):
+        def event(day: int) -> EventDTO:
+            return EventDTO(date=datetime(2025, 1, day), start_hour=9, end_hour=11,
+                            name="Event", description="", creator_id="1cdba348-0279-4634-9bcd-c8ea1d2856af")
+
+        # 2025-01-01 is a Wednesday
+        assert week_ahead_schedules([event(1), event(7), event(8)], date(2025, 1, 1)) == [
+            schedule("Wednesday", 9, 11), schedule("Tuesday", 9, 11)]
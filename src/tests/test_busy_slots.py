@@ -0,0 +1,97 @@
+import pytest
+from sqlalchemy import text
+
+from database.busy_slots import rebuild_user_busy_slots
+from database.database import engine
+from models.group import GroupDTO
+from models.routine import RoutineDTO, Schedule
+from repository.group_repository import GroupRepository
+
+users = [f"{i}cdba348-0279-4634-9bcd-c8ea1d2856af" for i in range(1, 5)]
+
+
+@pytest.fixture(autouse=True)
+def run_around_tests():
+    yield
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM group_routines"))
+        conn.execute(text("DELETE FROM group_members"))
+        conn.execute(text("DELETE FROM groups"))
+
+
+def schedule(day: str, start_hour: int, end_hour: int) -> Schedule:
+    return Schedule(day=day, start_hour=start_hour, end_hour=end_hour)  # type: ignore
+
+
+def save_group(repository: GroupRepository, owner: str, members: list[str], routines: list[Schedule]) -> str:
+    group = repository.save_group(GroupDTO(
+        name="Test Group", description="Test Group Description", owner_id=owner))
+    assert group
+
+    for member in members:
+        repository.save_member(group.id, member)
+
+    for routine in routines:
+        repository.save_routine(group.id, RoutineDTO(
+            **routine.model_dump(), name="Routine", description="", creator_id=owner))
+
+    return group.id
+
+
+def busy_slots(repository: GroupRepository, members: list[str]) -> list[Schedule]:
+    return sorted(repository.get_user_groups_routines_schedules(members),
+                  key=lambda s: (s.day, s.start_hour))
+
+
+class TestUserBusySlots:
+    def test_routines_of_the_users_groups_once_each(self):
+        repository = GroupRepository()
+        save_group(repository, users[0], users[1:3], [
+                   schedule("Monday", 8, 9), schedule("Monday", 10, 12)])
+        save_group(repository, users[3], [], [schedule("Friday", 8, 9)])
+
+        # Created by the owner, busy for every member, whatever their number
+        assert busy_slots(repository, users[:3]) == [
+            schedule("Monday", 8, 9), schedule("Monday", 10, 12)]
+        assert busy_slots(repository, [users[2], users[3]]) == [
+            schedule("Friday", 8, 9), schedule("Monday", 8, 9), schedule("Monday", 10, 12)]
+        assert busy_slots(repository, ["0cdba348-0279-4634-9bcd-c8ea1d2856af"]) == []
+
+    def test_follows_membership_and_routine_changes(self):
+        repository = GroupRepository()
+        group_id = save_group(repository, users[0], [], [
+                              schedule("Monday", 8, 9)])
+
+        repository.save_member(group_id, users[1])
+        assert busy_slots(repository, [users[1]]) == [schedule("Monday", 8, 9)]
+
+        with engine.begin() as conn:
+            conn.execute(text(
+                "UPDATE group_routines SET day = 'Sunday', end_hour = 10 WHERE group_id = :group_id"), {"group_id": group_id})
+        assert busy_slots(repository, [users[1]]) == [schedule("Sunday", 8, 10)]
+        assert repository.find_members_colliding_routine(
+            [users[1]], schedule("Sunday", 9, 11)) == schedule("Sunday", 8, 10)
+
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM group_members WHERE user_id = :user_id"),
+                         {"user_id": users[1]})
+        assert busy_slots(repository, [users[1]]) == []
+        assert repository.find_members_colliding_routine(
+            [users[1]], schedule("Sunday", 9, 11)) is None
+
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM group_routines WHERE group_id = :group_id"),
+                         {"group_id": group_id})
+        assert busy_slots(repository, [users[0]]) == []
+
+    def test_rebuild(self):
+        repository = GroupRepository()
+        save_group(repository, users[0], users[1:3], [
+                   schedule("Monday", 8, 9), schedule("Tuesday", 8, 9)])
+
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM user_busy_slots"))
+
+        assert rebuild_user_busy_slots() == 6
+        assert busy_slots(repository, [users[2]]) == [
+            schedule("Monday", 8, 9), schedule("Tuesday", 8, 9)]
@@ -0,0 +1,418 @@
+import asyncio
+from datetime import datetime, timedelta
+import threading
+import time
+
+import fakeredis
+import pytest
+from sqlalchemy import event, text
+
+from database.database import engine
+from database.unit_of_work import AsyncUnitOfWork, UnitOfWork
+from models.event import EventDTO
+from models.group import GroupDTO
+from models.member import Member
+from models.poll import Option, PollDTO, VoteDTO
+from models.routine import RoutineDTO
+from repository.cached_group_repository import CachedGroupRepository, GroupCache, default_group_repository
+from repository.group_repository import GroupRepository
+from utils.cache import CacheCodec, LRUCache, RedisCache, TieredCache
+
+
+@pytest.fixture(autouse=True)
+def run_around_tests():
+    yield
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM poll_votes"))
+        conn.execute(text("DELETE FROM poll_options"))
+        conn.execute(text("DELETE FROM poll"))
+        conn.execute(text("DELETE FROM group_events"))
+        conn.execute(text("DELETE FROM group_routines"))
+        conn.execute(text("DELETE FROM group_members"))
+        conn.execute(text("DELETE FROM groups"))
+
+
+@pytest.fixture
+def queries():
+    count = {"value": 0}
+
+    def before_cursor_execute(*args):
+        count["value"] += 1
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield count
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+class TestLRUCache:
+    def test_get_and_set(self):
+        cache = LRUCache(max_size=2)
+
+        assert cache.get("a") is None
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_size=2)
+
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_entries_expire(self):
+        cache = LRUCache(max_size=2, ttl=60)
+
+        cache.set("a", 1, ttl=0.01)
+        cache.set("b", 2)
+        time.sleep(0.02)
+
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+        assert cache.stats()["expirations"] == 1
+
+    def test_delete_and_clear(self):
+        cache = LRUCache()
+
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.delete("a", "missing")
+        assert cache.get("a") is None
+        assert len(cache) == 1
+
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_bumped_versions_are_never_reused(self):
+        cache = LRUCache(max_size=1)
+
+        [version] = cache.get_versions("a")  # type: ignore
+        assert cache.get_versions("a") == [version]
+
+        cache.bump_version("a")
+        [bumped] = cache.get_versions("a")  # type: ignore
+        assert bumped != version
+
+        # Evicting the namespace must not bring an older version back
+        cache.get_versions("b")
+        assert cache.get_versions("a") not in ([version], [bumped])
+
+
+class TestRedisCache:
+    def test_get_and_set(self):
+        cache = RedisCache(client=fakeredis.FakeRedis())
+
+        assert cache.get("a") is None
+        cache.set("a", {"value": [1, 2]})
+        assert cache.get("a") == {"value": [1, 2]}
+
+        cache.delete("a")
+        assert cache.get("a") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 2
+
+    def test_values_are_stored_as_json(self):
+        client = fakeredis.FakeRedis()
+        cache = RedisCache(client=client, prefix="test:", codec=CacheCodec([Member]))
+        member = Member(user_id="1cdba348-0279-4634-9bcd-c8ea1d2856af",
+                        created_at=datetime(2025, 1, 1, 12, 30))
+
+        cache.set("members", [member])
+        cache.set("votes", {1: 2, 3: 0})
+
+        assert client.get("test:members").startswith(b"[{")  # type: ignore
+        assert cache.get("members") == [member]
+        assert cache.get("votes") == {1: 2, 3: 0}
+
+    def test_unregistered_models_are_not_cached(self):
+        client = fakeredis.FakeRedis()
+        cache = RedisCache(client=client, prefix="test:")
+        member = Member(user_id="1cdba348-0279-4634-9bcd-c8ea1d2856af",
+                        created_at=datetime(2025, 1, 1, 12, 30))
+
+        cache.set("a", [member])
+        assert client.get("test:a") is None
+
+        client.set("test:a", b'{"__model__": "Member", "value": {}}')
+        assert cache.get("a") is None
+        assert cache.stats()["errors"] == 0
+
+    def test_entries_expire(self):
+        cache = RedisCache(client=fakeredis.FakeRedis())
+
+        cache.set("a", 1, ttl=0.01)
+        time.sleep(0.02)
+
+        assert cache.get("a") is None
+
+    def test_versions(self):
+        cache = RedisCache(client=fakeredis.FakeRedis())
+
+        assert cache.get_versions("a", "b") == [0, 0]
+        cache.bump_version("a")
+        assert cache.get_versions("a", "b") == [1, 0]
+
+    def test_clear_only_removes_prefixed_keys(self):
+        client = fakeredis.FakeRedis()
+        client.set("other", 1)
+        cache = RedisCache(client=client, prefix="test:")
+
+        cache.set("a", 1)
+        cache.bump_version("a")
+        cache.clear()
+
+        assert cache.get("a") is None
+        assert client.get("other") == b"1"
+
+    def test_errors_bypass_the_cache(self):
+        server = fakeredis.FakeServer()
+        server.connected = False
+        cache = RedisCache(client=fakeredis.FakeRedis(server=server))
+
+        cache.set("a", 1)
+        assert cache.get("a") is None
+        assert cache.get_versions("a") is None
+        cache.bump_version("a")
+
+        assert cache.stats()["errors"] == 4
+
+
+class TestTieredCache:
+    def worker(self, server: fakeredis.FakeServer) -> TieredCache:
+        return TieredCache(LRUCache(), RedisCache(client=fakeredis.FakeRedis(server=server)), version_ttl=0.01)
+
+    def test_values_are_shared_between_workers(self):
+        server = fakeredis.FakeServer()
+        first, second = self.worker(server), self.worker(server)
+
+        first.set("a", 1)
+        assert second.get("a") == 1
+        assert second.stats()["l2"]["hits"] == 1
+
+        # Then served from the second worker L1
+        assert second.get("a") == 1
+        assert second.stats()["l2"]["hits"] == 1
+
+    def test_versions_are_shared_between_workers(self):
+        server = fakeredis.FakeServer()
+        first, second = self.worker(server), self.worker(server)
+
+        assert first.get_versions("a") == second.get_versions("a") == [0]
+        first.bump_version("a")
+        assert first.get_versions("a") == [1]
+
+        # The second worker reuses its versions until they expire
+        assert second.get_versions("a") == [0]
+        time.sleep(0.02)
+        assert second.get_versions("a") == [1]
+
+    def test_versions_are_kept_in_l1(self):
+        client = fakeredis.FakeRedis()
+        cache = TieredCache(LRUCache(), RedisCache(client=client), version_ttl=60)
+        cache.get_versions("a", "b")
+
+        client.flushall()
+        assert cache.get_versions("a", "b") == [0, 0]
+        assert cache.get_versions("a", "c") == [0, 0]
+
+        # Local invalidations are seen at once
+        cache.bump_version("b")
+        assert cache.get_versions("a", "b") == [0, 1]
+
+
+class ThreadRecordingRedis(fakeredis.FakeRedis):
+    """FakeRedis remembering the threads it was called from"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threads: list[int] = []
+
+    def execute_command(self, *args, **options):
+        self.threads.append(threading.get_ident())
+        return super().execute_command(*args, **options)
+
+
+class TestAsyncGroupCache:
+    def test_redis_calls_are_kept_off_the_event_loop(self):
+        client = ThreadRecordingRedis()
+        cache = GroupCache(TieredCache(LRUCache(), RedisCache(client=client)))
+        cache_key = cache.members_key("a")
+
+        async def run() -> int:
+            key, value = await cache.alookup(cache_key)
+            assert value is None
+            await cache.aset(key, [1])
+            assert (await cache.alookup(cache_key))[1] == [1]
+            await cache.ainvalidate(cache.members_namespace("a"))
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(run())
+
+        assert client.threads
+        assert loop_thread not in client.threads
+
+    def test_invalidation_is_repeated_when_the_unit_of_work_ends(self):
+        cache = GroupCache(RedisCache(client=fakeredis.FakeRedis()))
+        namespace = cache.members_namespace("a")
+
+        async def run() -> None:
+            async with AsyncUnitOfWork():
+                await cache.ainvalidate(namespace)
+                assert cache.cache.get_versions(namespace) == [1]
+
+        asyncio.run(run())
+
+        assert cache.cache.get_versions(namespace) == [2]
+
+
+class TestCachedGroupRepository:
+    group = GroupDTO(
+        name="Test Group",
+        description="Test Group Description",
+        owner_id="1cdba348-0279-4634-9bcd-c8ea1d2856af"
+    )
+
+    routine = RoutineDTO(
+        name="Test Routine",
+        description="Test Routine Description",
+        day="Monday",  # type: ignore
+        start_hour=8,
+        end_hour=10,
+        creator_id="1cdba348-0279-4634-9bcd-c8ea1d2856af"
+    )
+
+    new_member_id = "4cdba348-0279-4634-9bcd-c8ea1d2856af"
+
+    def repository(self) -> CachedGroupRepository:
+        return CachedGroupRepository(GroupRepository(), GroupCache(LRUCache()))
+
+    def test_reads_are_served_from_cache(self, queries):
+        repository = self.repository()
+        group = repository.save_group(self.group)
+        assert group
+
+        queries["value"] = 0
+        for _ in range(3):
+            assert repository.get_group_aggregate(group.id)
+            assert repository.get_group_members(group.id)
+            assert repository.get_routines(group.id) == []
+            assert repository.group_exists(group.id)
+
+        assert queries["value"] == 4
+        assert repository.cache.cache.stats()["hits"] == 8
+
+    def test_cached_values_are_copies(self):
+        repository = self.repository()
+        group = repository.save_group(self.group)
+        assert group
+
+        members = repository.get_group_members(group.id)
+        members.clear()
+
+        assert len(repository.get_group_members(group.id)) == 1
+
+    def test_save_member_invalidates_members(self):
+        repository = self.repository()
+        group = repository.save_group(self.group)
+        assert group
+
+        assert len(repository.get_group_members(group.id)) == 1
+        assert repository.get_group_aggregate(group.id).member_count == 1  # type: ignore
+
+        repository.save_member(group.id, self.new_member_id)
+
+        assert len(repository.get_group_members(group.id)) == 2
+        assert repository.get_group_aggregate(group.id).member_count == 2  # type: ignore
+
+    def test_save_routine_invalidates_routines(self):
+        repository = self.repository()
+        group = repository.save_group(self.group)
+        assert group
+
+        assert repository.get_routines(group.id) == []
+        assert repository.get_group_aggregate(group.id).routines == []  # type: ignore
+
+        repository.save_routine(group.id, self.routine)
+
+        assert len(repository.get_routines(group.id)) == 1
+        assert len(repository.get_group_aggregate(group.id).routines) == 1  # type: ignore
+
+    def test_rolled_back_reads_are_invalidated(self):
+        repository = self.repository()
+        group = repository.save_group(self.group)
+        assert group
+
+        with pytest.raises(RuntimeError):
+            with UnitOfWork():
+                repository.save_member(group.id, self.new_member_id)
+                assert len(repository.get_group_members(group.id)) == 2
+                raise RuntimeError()
+
+        assert len(repository.get_group_members(group.id)) == 1
+
+    def test_missing_groups_are_not_cached(self):
+        repository = self.repository()
+        group_id = "3cdba348-0279-4634-9bcd-c8ea1d2856af"
+
+        assert repository.get_group(group_id) is None
+        assert not repository.group_exists(group_id)
+        assert len(repository.cache.cache) == 0
+
+    def test_invalidations_reach_every_worker(self):
+        server = fakeredis.FakeServer()
+
+        def worker() -> CachedGroupRepository:
+            return CachedGroupRepository(GroupRepository(), GroupCache(
+                TieredCache(LRUCache(), RedisCache(
+                    client=fakeredis.FakeRedis(server=server)), version_ttl=0)
+            ))
+
+        first, second = worker(), worker()
+        group = first.save_group(self.group)
+        assert group
+
+        assert len(second.get_group_members(group.id)) == 1
+        first.save_member(group.id, self.new_member_id)
+
+        assert len(second.get_group_members(group.id)) == 2
+
+    def test_votes_invalidate_polls(self):
+        repository = self.repository()
+        group = repository.save_group(self.group)
+        assert group
+
+        event_ = repository.save_event(group.id, EventDTO(
+            name="Event", description="Event description",
+            date=datetime.now() + timedelta(days=1),
+            start_hour=10, end_hour=11, creator_id=self.group.owner_id
+        ))
+        assert event_
+
+        poll_id = repository.save_poll(group.id, self.group.owner_id, event_.id, PollDTO(
+            question="Question",
+            options=[Option(id=1, text="Yes"), Option(id=2, text="No")]
+        ))
+        assert repository.get_poll(poll_id).votes == {}  # type: ignore
+        assert len(repository.get_poll_options(poll_id)) == 2
+
+        repository.save_poll_vote(VoteDTO(
+            user_id=self.group.owner_id, option_id=1, poll_id=poll_id))
+        assert repository.get_poll(poll_id).votes == {1: 1}  # type: ignore
+        assert repository.get_poll_votes(poll_id) == {1: 1}
+
+        repository.delete_event(group.id, event_.id)
+        assert repository.get_poll(poll_id) is None
+
+    def test_cache_can_be_disabled(self, monkeypatch):
+        assert isinstance(default_group_repository(), CachedGroupRepository)
+
+        monkeypatch.setenv("GROUP_CACHE_ENABLED", "false")
+        assert isinstance(default_group_repository(), GroupRepository)
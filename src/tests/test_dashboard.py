@@ -0,0 +1,181 @@
+from datetime import date, timedelta
+from fastapi.exceptions import RequestValidationError
+import pytest
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from fastapi import FastAPI, Request, status
+from sqlalchemy import event, text
+
+from container import Container
+from database.database import engine
+from middleware.error_handler import error_handler
+from models.errors.errors import CustomHTTPException
+from repository.group_repository import GroupRepository
+from routes.group_routes import router as group_router
+from service.group_service import GroupService
+
+app = FastAPI()
+
+app.include_router(group_router, tags=["groups"])
+
+
+@app.exception_handler(RequestValidationError)
+@app.exception_handler(CustomHTTPException)
+@app.exception_handler(Exception)
+async def exception_handler(request: Request, exc: Exception) -> JSONResponse:
+    return error_handler(request, exc)
+
+client = TestClient(app)
+
+
+def day(days: int) -> str:
+    """ISO date days from today, the dashboard only lists upcoming events"""
+    return (date.today() + timedelta(days=days)).isoformat()
+
+
+@pytest.fixture(autouse=True)
+def run_around_tests():
+    yield
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM poll_votes"))
+        conn.execute(text("DELETE FROM poll_options"))
+        conn.execute(text("DELETE FROM poll"))
+        conn.execute(text("DELETE FROM group_events"))
+        conn.execute(text("DELETE FROM group_routines"))
+        conn.execute(text("DELETE FROM group_members"))
+        conn.execute(text("DELETE FROM groups"))
+
+
+class TestDashboard:
+    user_id = "1cdba348-0279-4634-9bcd-c8ea1d2856af"
+    another_user_id = "2cdba348-0279-4634-9bcd-c8ea1d2856af"
+
+    valid_routine = {
+        "name": "Morning Workout",
+        "description": "A routine for morning workouts",
+        "day": "Monday",
+        "start_hour": 8,
+        "end_hour": 9,
+        "creator_id": "1cdba348-0279-4634-9bcd-c8ea1d2856af"
+    }
+
+    valid_event = {
+        "name": "Team Meeting",
+        "description": "Weekly team status meeting",
+        "date": f"{day(30)}T00:00:00",
+        "start_hour": 10,
+        "end_hour": 12,
+        "creator_id": "1cdba348-0279-4634-9bcd-c8ea1d2856af",
+    }
+
+    valid_poll = {
+        "question": "What topic should we focus on?",
+        "options": [
+            {"id": 1, "text": "Project Status"},
+            {"id": 2, "text": "Future Planning"}
+        ]
+    }
+
+    def save_group(self, owner_id: str, name: str = "Test Group") -> str:
+        response = client.post("/groups", json={
+            "name": name, "description": "Test Group Description", "owner_id": owner_id})
+        return response.json()["data"]["id"]
+
+    def save_event(self, group_id: str, date_: str, start_hour: int, poll: bool = False, creator_id: str = user_id) -> dict:
+        event = self.valid_event | {
+            "date": f"{date_}T00:00:00", "start_hour": start_hour, "end_hour": start_hour + 1, "creator_id": creator_id}
+        if poll:
+            event["poll"] = self.valid_poll
+
+        response = client.post(f"/groups/{group_id}/events", json=event)
+        assert response.status_code == status.HTTP_201_CREATED
+        return response.json()["data"]
+
+    def test_dashboard(self):
+        group_id = self.save_group(self.user_id, "First Group")
+        client.post(f"/groups/{group_id}/routines?force_members=true", json=self.valid_routine)
+        poll_id = self.save_event(group_id, day(1), 10, poll=True)["poll"]["id"]
+        client.put(f"/polls/{poll_id}", json={"user_id": self.user_id, "option_id": 2})
+        self.save_event(group_id, day(6), 10)
+
+        joined_group_id = self.save_group(self.another_user_id, "Joined Group")
+        client.post(f"/groups/{joined_group_id}/users/{self.user_id}")
+        self.save_event(joined_group_id, day(2), 8, creator_id=self.another_user_id)
+        self.save_event(joined_group_id, day(20), 8, creator_id=self.another_user_id)
+
+        other_group_id = self.save_group(self.another_user_id, "Other Group")
+        self.save_event(other_group_id, day(1), 8, creator_id=self.another_user_id)
+
+        response = client.get(f"/users/{self.user_id}/dashboard?events=3")
+
+        assert response.status_code == status.HTTP_200_OK
+        dashboard = response.json()["data"]
+
+        groups = {group["id"]: group for group in dashboard["groups"]}
+        assert set(groups) == {group_id, joined_group_id}
+        assert [r["name"] for r in groups[group_id]["routines"]] == [self.valid_routine["name"]]
+        assert groups[joined_group_id]["routines"] == []
+
+        assert [(e["group_id"], e["date"][:10]) for e in dashboard["events"]] == [
+            (group_id, day(1)), (joined_group_id, day(2)), (group_id, day(6))]
+        assert dashboard["events"][0]["poll"]["id"] == poll_id
+        assert dashboard["events"][0]["poll"]["votes"] == {"2": 1}
+        assert dashboard["events"][1]["poll"] is None
+
+    def test_dashboard_of_user_without_groups(self):
+        response = client.get(f"/users/{self.user_id}/dashboard")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["data"] == {"groups": [], "events": []}
+
+    def test_dashboard_queries_do_not_grow_with_groups(self):
+        statements: list[str] = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        def count_dashboard_statements() -> int:
+            statements.clear()
+            event.listen(engine, "before_cursor_execute", before_cursor_execute)
+            try:
+                dashboard = GroupService(GroupRepository()).get_dashboard(self.user_id)
+                # The events are upcoming, so their polls are loaded too
+                assert dashboard.events
+                assert all(e.poll is not None for e in dashboard.events)
+            finally:
+                event.remove(engine, "before_cursor_execute", before_cursor_execute)
+            return len(statements)
+
+        # Groups, their routines, upcoming events, their polls and poll options
+        dashboard_statements = 5
+
+        group_id = self.save_group(self.user_id)
+        self.save_event(group_id, day(1), 10, poll=True)
+        assert count_dashboard_statements() == dashboard_statements
+
+        for i in range(3):
+            group_id = self.save_group(self.user_id)
+            client.post(f"/groups/{group_id}/routines?force_members=true", json=self.valid_routine)
+            self.save_event(group_id, day(1), 10 + i, poll=True)
+
+        assert count_dashboard_statements() == dashboard_statements
+
+    def test_cached_dashboard(self, monkeypatch):
+        # Shares the cache the routes invalidate
+        container = Container()
+        monkeypatch.setattr(app.state, "container", container, raising=False)
+        service = GroupService(GroupRepository(), dashboard_cache=container.group_cache)
+        group_id = self.save_group(self.user_id)
+
+        assert len(service.get_dashboard(self.user_id).groups) == 1
+
+        # Served from the cache until it expires
+        self.save_event(group_id, day(1), 10)
+        assert service.get_dashboard(self.user_id).events == []
+
+        # Joining a group invalidates it
+        joined_group_id = self.save_group(self.another_user_id)
+        client.post(f"/groups/{joined_group_id}/users/{self.user_id}")
+        dashboard = service.get_dashboard(self.user_id)
+        assert len(dashboard.groups) == 2
+        assert len(dashboard.events) == 1
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.errors.errors import ConflictError, NotFoundError
+from models.event import EventKey, EventReturn
+from models.group import GroupReturn
+from models.routine import RoutineDTO, Schedule
+from service.group_rules import check_no_colliding_events, check_routine_fits, event_page, in_requested_order, member_ids_of, suggest_slots
+from utils.pagination import decode_cursor
+
+user_id = "1cdba348-0279-4634-9bcd-c8ea1d2856af"
+
+
+def uuid(i: int) -> str:
+    return f"{i:08d}-0279-4634-9bcd-c8ea1d2856af"
+
+
+def schedule(day: str, start_hour: int, end_hour: int) -> Schedule:
+    return Schedule(day=day, start_hour=start_hour, end_hour=end_hour)  # type: ignore
+
+
+def routine(start_hour: int, end_hour: int) -> RoutineDTO:
+    return RoutineDTO(
+        name="Routine", description="Routine", day="Monday",  # type: ignore
+        start_hour=start_hour, end_hour=end_hour, creator_id=user_id
+    )
+
+
+def event(i: int) -> EventReturn:
+    return EventReturn(
+        id=uuid(i), group_id=user_id, creator_id=user_id, name="Event",
+        description="Event", date=datetime.now() + timedelta(days=i),
+        start_hour=10, end_hour=11, created_at=datetime.now(), updated_at=datetime.now()
+    )
+
+
+class TestGroupRules:
+    def test_member_ids_of_a_missing_group(self):
+        with pytest.raises(NotFoundError):
+            member_ids_of(user_id, [])
+
+    def test_routine_fits_the_free_hours(self):
+        free = [schedule("Monday", 8, 10), schedule("Monday", 10, 12)]
+
+        check_routine_fits(free, routine(9, 11))
+
+        with pytest.raises(ConflictError):
+            check_routine_fits(free, routine(11, 13))
+
+    def test_an_event_does_not_collide_with_itself(self):
+        check_no_colliding_events(uuid(1), [event(1)])
+
+        with pytest.raises(ConflictError):
+            check_no_colliding_events(uuid(1), [event(1), event(2)])
+
+    def test_event_page(self):
+        events = [event(i) for i in range(3)]
+
+        page = event_page(events, 2)
+        assert page.items == events[:2]
+        assert page.next_cursor
+        assert decode_cursor(page.next_cursor, EventKey.parse) == EventKey.of(events[1])
+
+        assert event_page(events, 3).next_cursor is None
+
+    def test_groups_in_requested_order(self):
+        groups = [GroupReturn(id=uuid(i), name="Group", description="Group", owner_id=user_id,
+                              created_at=datetime.now(), updated_at=datetime.now()) for i in range(2)]
+
+        assert [group.id for group in in_requested_order(
+            [uuid(1), uuid(3), uuid(0), uuid(1)], groups)] == [uuid(1), uuid(0)]
+
+    def test_suggest_slots_leaves_out_busy_hours(self):
+        suggestions = suggest_slots(
+            ["a", "b"],
+            {"a": [schedule("Monday", 8, 12)], "b": [schedule("Monday", 9, 12)]},
+            [schedule("Monday", 10, 11)], 1, 2
+        )
+
+        assert [(s.start_hour, s.available_members, s.unavailable_members) for s in suggestions] == [
+            (9, ["a", "b"], []), (11, ["a", "b"], [])]
@@ -1,10 +1,13 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
 from fastapi.exceptions import RequestValidationError
 import pytest
 from fastapi.responses import JSONResponse
 from fastapi.testclient import TestClient
 from fastapi import FastAPI, Request, status
 
-from models.errors.errors import CustomHTTPException
+from models.errors.errors import ConflictError, CustomHTTPException
+from models.event import EventDTO
 from models.member import Member
 from models.routine import Schedule
 from repository.group_repository import GroupRepository
@@ -29,6 +32,11 @@ async def exception_handler(request: Request, exc: Exception) -> JSONResponse:
 client = TestClient(app)
 
 
+def day(days: int) -> str:
+    """ISO date days from today, events in the past are rejected by the API"""
+    return (date.today() + timedelta(days=days)).isoformat()
+
+
 @pytest.fixture(autouse=True)
 def run_around_tests():
     yield
@@ -60,7 +68,7 @@ class TestGroupRoutes:
     valid_event = {
         "name": "Team Meeting",
         "description": "Weekly team status meeting",
-        "date": "2025-07-15T00:00:00",
+        "date": f"{day(30)}T00:00:00",
         "start_hour": 10,
         "end_hour": 12,
         "creator_id": "1cdba348-0279-4634-9bcd-c8ea1d2856af"
@@ -105,7 +113,7 @@ class TestGroupRoutes:
 
     def test_create_group_server_error(self, monkeypatch):
         # Monkeypatch to simulate 500 from controller
-        def mock_post_group_error(self, group):
+        async def mock_post_group_error(self, group):
             raise Exception("Database connection error")
 
         monkeypatch.setattr(GroupController, "post_group",
@@ -141,6 +149,87 @@ class TestGroupRoutes:
         assert response.json()[
             "detail"] == f"Group with id {self.not_found_group_id} not found"
 
+    def test_get_group_with_routines_and_member_count(self):
+        response = client.post("/groups", json=self.valid_group)
+        group_id = response.json()["data"]["id"]
+
+        client.post(f"/groups/{group_id}/users/{self.another_valid_user_id}")
+
+        routine = {
+            "name": "Test Routine",
+            "description": "Test Routine Description",
+            "day": "Monday",
+            "start_hour": 9,
+            "end_hour": 10,
+            "creator_id": self.valid_user_id
+        }
+        client.post(
+            f"/groups/{group_id}/routines?force_members=true", json=routine)
+
+        response = client.get(f"/groups/{group_id}")
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()["data"]
+        assert data["member_count"] == 2
+        assert data["members"] is None
+        assert len(data["routines"]) == 1
+        assert data["routines"][0]["name"] == routine["name"]
+        assert data["routines"][0]["group_id"] == group_id
+
+    def test_get_group_aggregate_with_members(self):
+        response = client.post("/groups", json=self.valid_group)
+        group_id = response.json()["data"]["id"]
+
+        repository = GroupRepository()
+        group = repository.get_group_aggregate(group_id, include_members=True)
+
+        assert group
+        assert group.routines == []
+        assert group.member_count == 1
+        assert group.members and group.members[0].user_id == self.valid_user_id
+
+        assert repository.group_exists(group_id)
+        assert not repository.group_exists(self.not_found_group_id)
+        assert repository.get_group_aggregate(self.not_found_group_id) is None
+
+    """
+        GET /groups?ids=
+    """
+
+    def test_get_groups_by_ids(self):
+        group_ids = []
+        for i in range(3):
+            response = client.post("/groups", json=self.valid_group)
+            group_ids.append(response.json()["data"]["id"])
+
+        client.post(f"/groups/{group_ids[2]}/users/{self.another_valid_user_id}")
+        client.post(f"/groups/{group_ids[2]}/routines?force_members=true", json={
+            "name": "Test Routine", "description": "Test Routine Description",
+            "day": "Monday", "start_hour": 9, "end_hour": 10, "creator_id": self.valid_user_id})
+
+        ids = [group_ids[2], self.not_found_group_id, group_ids[0], group_ids[2]]
+        response = client.get(f"/groups?ids={','.join(ids)}")
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()["data"]
+        # In the requested order, like GET /groups/{group_id}
+        assert [group["id"] for group in data] == [group_ids[2], group_ids[0]]
+        assert data[0] == client.get(f"/groups/{group_ids[2]}").json()["data"]
+        assert data[1]["member_count"] == 1
+        assert data[1]["routines"] == []
+
+        response = client.get(f"/groups?ids={group_ids[2]}&include=members")
+        assert len(response.json()["data"][0]["members"]) == 2
+        assert response.json()["data"][0]["routines"] == []
+
+    def test_get_groups_with_invalid_ids(self):
+        response = client.get("/groups?ids=")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()["title"] == "Invalid ids"
+
+        ids = ",".join(f"{i:08d}-0279-4634-9bcd-c8ea1d2856af" for i in range(101))
+        response = client.get(f"/groups?ids={ids}")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
     """
         GET /users/{user_id}/groups
     """
@@ -166,6 +255,35 @@ class TestGroupRoutes:
         assert len(response.json()["data"]) > 0
         assert response.json()["data"][0]["id"] == group_id
 
+    def test_get_user_groups_with_include(self):
+        group_ids = []
+        for i in range(3):
+            response = client.post("/groups", json=self.valid_group)
+            group_ids.append(response.json()["data"]["id"])
+
+        client.post(f"/groups/{group_ids[0]}/users/{self.another_valid_user_id}")
+        client.post(f"/groups/{group_ids[1]}/routines?force_members=true", json={
+            "name": "Test Routine", "description": "Test Routine Description",
+            "day": "Monday", "start_hour": 9, "end_hour": 10, "creator_id": self.valid_user_id})
+
+        response = client.get(f"/users/{self.valid_user_id}/groups?include=routines,member_count")
+        assert response.status_code == status.HTTP_200_OK
+        groups = {group["id"]: group for group in response.json()["data"]}
+        assert [len(groups[group_id]["routines"]) for group_id in group_ids] == [0, 1, 0]
+        assert [groups[group_id]["member_count"] for group_id in group_ids] == [2, 1, 1]
+        assert all(group["members"] is None for group in groups.values())
+
+        response = client.get(f"/users/{self.valid_user_id}/groups?include=members")
+        groups = {group["id"]: group for group in response.json()["data"]}
+        assert {m["user_id"] for m in groups[group_ids[0]]["members"]} == {
+            self.valid_user_id, self.another_valid_user_id}
+        assert groups[group_ids[0]]["member_count"] == 2
+        assert groups[group_ids[1]]["routines"] == []
+
+        response = client.get(f"/users/{self.valid_user_id}/groups?include=events")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()["title"] == "Invalid include"
+
     def test_get_user_groups_bad_uuid(self):
         response = client.get(f"/users/{self.invalid_user_id}/groups")
         assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -175,7 +293,7 @@ class TestGroupRoutes:
     def test_get_user_groups_server_error(self, monkeypatch):
         # Monkeypatch to simulate 500 from controller
 
-        def mock_get_user_groups_error(self, user_id):
+        async def mock_get_user_groups_error(self, user_id):
             raise Exception("Database query error")
 
         monkeypatch.setattr(GroupController, "get_user_groups",
@@ -190,7 +308,7 @@ class TestGroupRoutes:
 
     def test_add_member_to_group_success(self, monkeypatch):
         # Monkeypatch the database response
-        def mock_post_member(self, group_id, user_id):
+        async def mock_post_member(self, group_id, user_id):
             return {"data": [{"user_id": user_id, "group_id": group_id, "created_at": "2023-01-01T00:00:00"}]}
 
         monkeypatch.setattr(GroupController, "post_member", mock_post_member)
@@ -236,7 +354,7 @@ class TestGroupRoutes:
         # Monkeypatch the database response
         user_id = self.valid_user_id
 
-        def mock_get_group_members(self, group_id):
+        async def mock_get_group_members(self, group_id):
             return {"data": [{"user_id": user_id, "group_id": group_id, "created_at": "2023-01-01T00:00:00"}]}
 
         monkeypatch.setattr(
@@ -257,7 +375,7 @@ class TestGroupRoutes:
 
     def test_get_group_members_server_error(self, monkeypatch):
         # Monkeypatch to simulate 500 from controller
-        def mock_get_group_members_error(self, group_id):
+        async def mock_get_group_members_error(self, group_id):
             raise Exception("Database query error")
 
         monkeypatch.setattr(GroupController, "get_group_members",
@@ -389,22 +507,60 @@ class TestGroupRoutes:
         assert isinstance(response.json()["data"], list)
         assert len(response.json()["data"]) > 0
 
-    def test_post_group_routine_with_user_groups_schedules_collision(self, monkeypatch):
-        def mock_get_user_groups_routines_schedules(self, members: list[Member]) -> list[Schedule]:
+    def test_post_group_routine_across_free_schedules(self, monkeypatch):
+        def mock_free_schedules(self, members: list[Member], auth_header: str) -> list[Schedule]:
             return [
-                Schedule(
-                    day="Monday",  # type: ignore
-                    start_hour=9,
-                    end_hour=10,
-                ),
+                Schedule(day="Monday", start_hour=8, end_hour=10),  # type: ignore
+                Schedule(day="Monday", start_hour=10, end_hour=12),  # type: ignore
+                Schedule(day="Monday", start_hour=14, end_hour=16),  # type: ignore
             ]
 
         monkeypatch.setattr(
-            GroupRepository, "get_user_groups_routines_schedules", mock_get_user_groups_routines_schedules
-        )
+            GroupService, "get_free_schedules", mock_free_schedules)
 
         response = client.post("/groups", json=self.valid_group)
+        group_id = response.json()["data"]["id"]
+
+        routine = {
+            "name": "Test Routine",
+            "description": "Test Routine Description",
+            "day": "Monday",
+            "start_hour": 9,
+            "end_hour": 11,
+            "creator_id": self.valid_user_id
+        }
+
+        # Free windows back to back are free hours in a row
+        response = client.post(
+            f"/groups/{group_id}/routines?force_members=false", json=routine)
+        assert response.status_code == status.HTTP_201_CREATED
+
+        # Members are busy from 12 to 14
+        response = client.post(
+            f"/groups/{group_id}/routines?force_members=false", json=routine | {"start_hour": 11, "end_hour": 15})
+        assert response.status_code == status.HTTP_409_CONFLICT
 
+    def test_post_group_routine_with_invalid_hours(self):
+        response = client.post("/groups", json=self.valid_group)
+        group_id = response.json()["data"]["id"]
+
+        routine = {
+            "name": "Test Routine",
+            "description": "Test Routine Description",
+            "day": "Monday",
+            "creator_id": self.valid_user_id
+        }
+
+        for hours in [{"start_hour": 10, "end_hour": 10}, {"start_hour": 11, "end_hour": 9}]:
+            response = client.post(
+                f"/groups/{group_id}/routines?force_members=false", json=routine | hours)
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_post_group_routine_with_user_groups_schedules_collision(self):
+        response = client.post("/groups", json=self.valid_group)
+        other_group_id = response.json()["data"]["id"]
+
+        response = client.post("/groups", json=self.valid_group)
         group_id = response.json()["data"]["id"]
 
         routine = {
@@ -416,8 +572,13 @@ class TestGroupRoutes:
             "creator_id": self.valid_user_id
         }
 
+        # The member already has a routine at that time in another group
         response = client.post(
-            f"/groups/{group_id}/routines?force_members=false", json=routine)
+            f"/groups/{other_group_id}/routines?force_members=true", json=routine)
+        assert response.status_code == status.HTTP_201_CREATED
+
+        response = client.post(
+            f"/groups/{group_id}/routines?force_members=false", json=routine | {"start_hour": 8})
         assert response.status_code == status.HTTP_409_CONFLICT
         assert f"Conflicting member routine on Monday from 9 to 10" == response.json()[
             "detail"]
@@ -427,13 +588,6 @@ class TestGroupRoutes:
         assert 409 == response.json()["status"]
 
     def test_post_group_routine_without_user_groups_schedules_collision(self, monkeypatch):
-        def mock_get_user_groups_routines_schedules(self, members: list[Member]) -> list[Schedule]:
-            return []
-
-        monkeypatch.setattr(
-            GroupRepository, "get_user_groups_routines_schedules", mock_get_user_groups_routines_schedules
-        )
-
         def mock_free_schedules(self, members: list[Member], auth_header: str) -> list[Schedule]:
             return [
                 Schedule(
@@ -459,6 +613,12 @@ class TestGroupRoutes:
             "creator_id": self.valid_user_id
         }
 
+        # Sharing a bound or the hours on another day is not a collision
+        for existing in [{"start_hour": 8, "end_hour": 9}, {"start_hour": 10, "end_hour": 11}, {"day": "Tuesday"}]:
+            response = client.post(
+                f"/groups/{group_id}/routines?force_members=true", json=routine | existing)
+            assert response.status_code == status.HTTP_201_CREATED
+
         response = client.post(
             f"/groups/{group_id}/routines?force_members=false", json=routine)
         assert response.status_code == status.HTTP_201_CREATED
@@ -595,6 +755,89 @@ class TestGroupRoutes:
         assert response.json()[
             "detail"] == f"Group with id {self.not_found_group_id} not found"
 
+    """
+        GET /groups/{group_id}/availability/suggestions
+    """
+
+    def test_get_availability_suggestions(self, monkeypatch):
+        def mock_members_free_schedules(self, members: list[str], auth_header: str) -> dict[str, list[Schedule]]:
+            return {
+                members[0]: [Schedule(day="Monday", start_hour=8, end_hour=15)],  # type: ignore
+                members[1]: [Schedule(day="Monday", start_hour=10, end_hour=12),  # type: ignore
+                             Schedule(day="Tuesday", start_hour=9, end_hour=10)],  # type: ignore
+            }
+
+        monkeypatch.setattr(
+            GroupService, "get_members_free_schedules", mock_members_free_schedules)
+
+        response = client.post("/groups", json=self.valid_group)
+        group_id = response.json()["data"]["id"]
+        client.post(f"/groups/{group_id}/users/{self.another_valid_user_id}")
+
+        routine = {
+            "name": "Test Routine",
+            "description": "Test Routine Description",
+            "day": "Monday",
+            "start_hour": 10,
+            "end_hour": 11,
+            "creator_id": self.valid_user_id
+        }
+        client.post(
+            f"/groups/{group_id}/routines?force_members=true", json=routine)
+
+        response = client.get(
+            f"/groups/{group_id}/availability/suggestions?duration=1&limit=3")
+
+        assert response.status_code == status.HTTP_200_OK
+        suggestions = response.json()["data"]
+        # Monday from 10 to 11 is taken by the routine
+        assert [(s["day"], s["start_hour"], s["end_hour"]) for s in suggestions] == [
+            ("Monday", 11, 12), ("Monday", 8, 9), ("Monday", 9, 10)]
+        assert sorted(suggestions[0]["available_members"]) == sorted(
+            [self.valid_user_id, self.another_valid_user_id])
+        assert suggestions[1]["unavailable_members"] == [
+            self.another_valid_user_id]
+
+    def test_get_availability_suggestions_skips_upcoming_events(self, monkeypatch):
+        tomorrow = date.today() + timedelta(days=1)
+        day = tomorrow.strftime("%A")
+
+        def mock_members_free_schedules(self, members: list[str], auth_header: str) -> dict[str, list[Schedule]]:
+            return {members[0]: [Schedule(day=day, start_hour=8, end_hour=12)]}  # type: ignore
+
+        monkeypatch.setattr(
+            GroupService, "get_members_free_schedules", mock_members_free_schedules)
+
+        response = client.post("/groups", json=self.valid_group)
+        group_id = response.json()["data"]["id"]
+
+        event = self.valid_event.copy()
+        event["date"] = f"{tomorrow.isoformat()}T00:00:00"
+        event["start_hour"] = 9
+        event["end_hour"] = 11
+        client.post(f"/groups/{group_id}/events", json=event)
+
+        response = client.get(
+            f"/groups/{group_id}/availability/suggestions")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [(s["day"], s["start_hour"]) for s in response.json()["data"]] == [
+            (day, 8), (day, 11)]
+
+    def test_get_availability_suggestions_not_found(self):
+        response = client.get(
+            f"/groups/{self.not_found_group_id}/availability/suggestions")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.json()[
+            "detail"] == f"Group with id {self.not_found_group_id} not found"
+
+    def test_get_availability_suggestions_with_invalid_duration(self):
+        response = client.get(
+            f"/groups/{self.valid_group_id}/availability/suggestions?duration=24")
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
     """
         POST /groups/{group_id}/events
     """
@@ -664,26 +907,59 @@ class TestGroupRoutes:
         assert response.json()[
             "detail"] == f"User with id {self.another_valid_user_id} is not a member of group {group_id}"
 
-    def test_create_event_with_collision(self, monkeypatch):
-        # Mock the repository to simulate a collision
-        def mock_find_colliding_events(self, group_id, date, start_hour, end_hour):
-            return [{"id": "test-id", "name": "Existing Event"}]
-
-        monkeypatch.setattr(
-            GroupRepository, "find_group_colliding_events", mock_find_colliding_events)
-
-        # Create a group first
+    def test_create_event_with_collision(self):
+        # Create a group and an event first
         response = client.post("/groups", json=self.valid_group)
         group_id = response.json()["data"]["id"]
 
-        # Try to create an event that collides
         response = client.post(
             f"/groups/{group_id}/events", json=self.valid_event)
+        assert response.status_code == status.HTTP_201_CREATED
+        existing_id = response.json()["data"]["id"]
+
+        # Try to create an event that collides, sharing a bound is enough
+        response = client.post(
+            f"/groups/{group_id}/events", json=self.valid_event | {"start_hour": 12, "end_hour": 14})
 
         assert response.status_code == status.HTTP_409_CONFLICT
         assert "Conflict in event schedules" == response.json()["title"]
         assert "Event collides with existing events:" in response.json()[
             "detail"]
+        assert existing_id in response.json()["detail"]
+
+        # Other dates and hours are free
+        response = client.post(
+            f"/groups/{group_id}/events", json=self.valid_event | {"start_hour": 13, "end_hour": 14})
+        assert response.status_code == status.HTTP_201_CREATED
+
+    def test_concurrent_colliding_events(self):
+        response = client.post("/groups", json=self.valid_group)
+        group_id = response.json()["data"]["id"]
+
+        def create(start_hour: int) -> int:
+            event = self.valid_event | {"start_hour": start_hour, "end_hour": start_hour + 2}
+            return client.post(f"/groups/{group_id}/events", json=event).status_code
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            statuses = list(executor.map(create, [10] * 4 + [11] * 4))
+
+        assert statuses.count(status.HTTP_201_CREATED) == 1
+        assert statuses.count(status.HTTP_409_CONFLICT) == 7
+        assert len(client.get(f"/groups/{group_id}/events").json()["data"]) == 1
+
+    def test_update_event_collision_is_rejected_by_the_database(self):
+        response = client.post("/groups", json=self.valid_group)
+        group_id = response.json()["data"]["id"]
+
+        client.post(f"/groups/{group_id}/events", json=self.valid_event)
+        response = client.post(
+            f"/groups/{group_id}/events", json=self.valid_event | {"start_hour": 14, "end_hour": 16})
+        event_id = response.json()["data"]["id"]
+
+        # Past the service check, as when another update commits meanwhile
+        event = EventDTO(**self.valid_event | {"start_hour": 11, "end_hour": 15})
+        with pytest.raises(ConflictError):
+            GroupRepository().update_event(group_id, event_id, event)
 
     """
         GET /groups/{group_id}/events
@@ -721,6 +997,55 @@ class TestGroupRoutes:
         assert response.json()[
             "data"][0]["description"] == self.valid_event["description"]
 
+    def test_get_group_events_pages(self):
+        response = client.post("/groups", json=self.valid_group)
+        group_id = response.json()["data"]["id"]
+
+        slots = [(day(2), 8), (day(1), 14), (day(1), 10), (day(6), 9), (day(20), 9)]
+        for date_, start_hour in slots:
+            response = client.post(f"/groups/{group_id}/events", json=self.valid_event | {
+                "date": f"{date_}T00:00:00", "start_hour": start_hour, "end_hour": start_hour + 1})
+            assert response.status_code == status.HTTP_201_CREATED
+
+        # Already past, the API does not accept them
+        GroupRepository().save_event(group_id, EventDTO(
+            **self.valid_event | {"date": f"{day(-10)}T00:00:00"}))
+
+        pages = []
+        url = f"/groups/{group_id}/events?limit=2"
+        while True:
+            response = client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            pages.append([(e["date"][:10], e["start_hour"]) for e in response.json()["data"]])
+
+            cursor = response.json()["next_cursor"]
+            if cursor is None:
+                break
+            url = f"/groups/{group_id}/events?limit=2&cursor={cursor}"
+
+        # Upcoming events only by default
+        assert pages == [
+            [(day(1), 10), (day(1), 14)],
+            [(day(2), 8), (day(6), 9)],
+            [(day(20), 9)],
+        ]
+
+        # An explicit past from includes the past event
+        response = client.get(
+            f"/groups/{group_id}/events?from={day(-20)}&to={day(1)}")
+        assert [e["date"][:10] for e in response.json()["data"]] == [
+            day(-10), day(1), day(1)]
+        assert response.json()["next_cursor"] is None
+
+    def test_get_group_events_with_invalid_cursor(self):
+        response = client.post("/groups", json=self.valid_group)
+        group_id = response.json()["data"]["id"]
+
+        response = client.get(f"/groups/{group_id}/events?cursor=not-a-cursor")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()["title"] == "Invalid cursor"
+
     def test_get_group_events_with_invalid_group_id(self):
         response = client.get(f"/groups/{self.invalid_group_id}/events")
 
@@ -947,7 +1272,7 @@ class TestGroupRoutes:
 
     def test_create_event_server_error(self, monkeypatch):
         # Monkeypatch to simulate 500 from controller
-        def mock_post_event_error(self, group_id, event):
+        async def mock_post_event_error(self, group_id, event):
             raise Exception("Database connection error")
 
         monkeypatch.setattr(
@@ -985,6 +1310,12 @@ class TestGroupRoutes:
             f"/groups/{group_id}/events", json=invalid_event)
         assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
 
+        invalid_event = self.valid_event.copy()
+        invalid_event["start_hour"] = 13  # After the end hour
+        response = client.post(
+            f"/groups/{group_id}/events", json=invalid_event)
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
         # Missing required fields
         invalid_event = {
             "name": "Test Event"
@@ -2,6 +2,7 @@ from fastapi.responses import JSONResponse
 from fastapi.testclient import TestClient
 from fastapi import FastAPI, Request
 
+from controller.health_controller import HealthController
 from routes.health_routes import router
 
 from middleware.error_handler import error_handler
@@ -30,3 +31,28 @@ class TestHealthRoutes:
         response = client.get("/health/db")
         assert response.status_code == 200
         assert response.json() == {"db_health": "😎"}
+
+    def test_metrics(self):
+        client.get("/health")
+        app.state.container.group_cache.cache.get("missing")
+
+        response = client.get("/health/metrics")
+        assert response.status_code == 200
+        assert response.json()["metrics"]["group_cache"]["misses"] >= 1
+
+    def test_controllers_are_built_once(self, monkeypatch):
+        built = []
+        original_init = HealthController.__init__
+
+        def init(self, *args, **kwargs):
+            built.append(self)
+            original_init(self, *args, **kwargs)
+
+        monkeypatch.setattr(HealthController, "__init__", init)
+        monkeypatch.setattr(app.state, "container", None, raising=False)
+
+        for _ in range(3):
+            assert client.get("/health").status_code == 200
+
+        assert len(built) == 1
+        assert app.state.container.health_controller is built[0]
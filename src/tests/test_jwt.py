@@ -1,18 +1,21 @@
 from os import getenv
-from typing import Any, Coroutine, Optional, Union
+import time
+import jwt
+from typing import Optional, Union
 from fastapi.responses import JSONResponse
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 import pytest
 from fastapi.testclient import TestClient
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, WebSocket
+from starlette.websockets import WebSocketDisconnect
 
 import requests_mock
 from routes.health_routes import router
 
-from middleware.auth_middleware import JWTMiddleware
+from middleware.auth_middleware import AuthMiddleware
 from middleware.error_handler import error_handler
-from starlette.middleware.base import BaseHTTPMiddleware
-from service.jwt_service import JWTService
+from service.jwt_service import JWTService, VerifiedTokenCache
+import service.jwt_service as jwt_service_module
+from models.errors.errors import AuthenticationError
 from models.jwt import JwtCustomPayload
 
 
@@ -34,19 +37,6 @@ class MockJWTService(JWTService):
         }
 
 
-class MockHTTPBearer(HTTPBearer):
-    def __init__(self):
-        pass
-
-    async def __call__(  # type: ignore
-        self, request: Request
-    ) -> Coroutine[Any, Any, HTTPAuthorizationCredentials | None]:
-        return HTTPAuthorizationCredentials(
-            # type: ignore
-            scheme="Bearer", credentials="test-token"
-        )
-
-
 @pytest.fixture
 def auth_header():
     return {"Authorization": "Bearer dummy-token"}
@@ -69,8 +59,7 @@ def sample_message_data():
 
 app = FastAPI()
 
-app.add_middleware(BaseHTTPMiddleware,
-                   dispatch=JWTMiddleware(MockJWTService(), MockHTTPBearer()))
+app.add_middleware(AuthMiddleware, jwt_service=MockJWTService())
 
 
 app.include_router(router, prefix="/health", tags=["health"])
@@ -81,7 +70,7 @@ async def exception_handler(request: Request, exc: Exception) -> JSONResponse:
     return error_handler(request, exc)
 
 
-client = TestClient(app)
+client = TestClient(app, headers={"Authorization": "Bearer test-token"})
 
 class TestAuthentication:
     def test_invalid_auth_user_username(self):
@@ -155,19 +144,9 @@ class TestAuthentication:
                 assert data.title == "ServiceUnavailableError"
 
     def test_no_token(self):
-        class MockHTTPBearer(HTTPBearer):
-            def __init__(self):
-                pass
-
-            async def __call__(  # type: ignore
-                self, request: Request
-            ) -> Coroutine[Any, Any, HTTPAuthorizationCredentials | None]:
-                return None  # type: ignore
-
         app_aux = FastAPI()
 
-        app_aux.add_middleware(BaseHTTPMiddleware,
-                               dispatch=JWTMiddleware(MockJWTService(), MockHTTPBearer()))
+        app_aux.add_middleware(AuthMiddleware, jwt_service=MockJWTService())
 
         app_aux.include_router(router, prefix="/health", tags=["health"])
 
@@ -188,3 +167,130 @@ class TestAuthentication:
                 assert response.status_code == 401
                 assert data.detail == ""
                 assert data.title == "AuthenticationError"
+
+
+auth_app = FastAPI()
+
+auth_app.add_middleware(AuthMiddleware)
+
+
+@auth_app.get("/me")
+async def me(request: Request) -> dict:
+    return {"user": request.state.user, "auth_header": request.state.auth_header}
+
+
+@auth_app.get("/health")
+async def health() -> dict:
+    return {"status": "ok"}
+
+
+@auth_app.get("/health/metrics")
+async def health_metrics() -> dict:
+    return {"metrics": {}}
+
+
+@auth_app.websocket("/ws")
+async def ws(websocket: WebSocket):
+    await websocket.accept()
+    await websocket.send_json(websocket.state.user)
+    await websocket.close()
+
+
+auth_client = TestClient(auth_app)
+
+payload = {"type": "user", "userId": 1,
+           "email": "test@gmail.com", "username": "test"}
+
+
+class TestAuthMiddleware:
+    token = JWTService().sign(payload)  # type: ignore
+
+    def test_sets_user_and_auth_header(self):
+        response = auth_client.get(
+            "/me", headers={"Authorization": f"Bearer {self.token}"})
+
+        assert response.status_code == 200
+        assert response.json()["user"]["userId"] == payload["userId"]
+        assert response.json()["auth_header"] == f"Bearer {self.token}"
+
+    def test_rejects_missing_and_invalid_tokens(self):
+        response = auth_client.get("/me")
+        assert response.status_code == 403
+        assert response.json()["detail"] == "Not authenticated"
+
+        response = auth_client.get("/me", headers={"Authorization": f"Basic {self.token}"})
+        assert response.status_code == 403
+
+        response = auth_client.get("/me", headers={"Authorization": "Bearer invalid"})
+        assert response.status_code == 401
+        assert response.json()["title"] == "AuthenticationError"
+
+    def test_public_routes_and_preflights(self):
+        assert auth_client.get("/health").status_code == 200
+        assert auth_client.get("/openapi.json").status_code == 200
+        assert auth_client.options("/me").status_code == 405
+
+        # Only the exact root and health checks are public
+        assert auth_client.get("/me/health").status_code == 403
+        assert auth_client.get("/health/metrics").status_code == 403
+        assert auth_client.get(
+            "/health/metrics", headers={"Authorization": f"Bearer {self.token}"}).status_code == 200
+
+    def test_websocket_handshake(self):
+        with auth_client.websocket_connect(f"/ws?token={self.token}") as websocket:
+            assert websocket.receive_json()["userId"] == 1
+
+        with auth_client.websocket_connect("/ws", headers={"Authorization": f"Bearer {self.token}"}) as websocket:
+            assert websocket.receive_json()["userId"] == 1
+
+        with pytest.raises(WebSocketDisconnect) as e:
+            with auth_client.websocket_connect("/ws?token=invalid"):
+                pass
+        assert e.value.code == 1008
+
+
+class TestVerifiedTokenCache:
+    def test_verified_tokens_are_cached(self):
+        cache = VerifiedTokenCache()
+        service = JWTService(cache)
+        token = service.sign(payload)  # type: ignore
+
+        first = service.verify(token)
+        assert cache.stats()["misses"] == 1
+
+        first["userId"] = 2  # type: ignore
+        assert service.verify(token)["userId"] == 1  # type: ignore
+        assert cache.stats()["hits"] == 1
+
+        with pytest.raises(AuthenticationError):
+            service.verify(token[:-2])
+        assert cache.stats()["size"] == 1
+
+    def test_tokens_are_evicted_at_their_expiration(self, monkeypatch):
+        cache = VerifiedTokenCache()
+        service = JWTService(cache)
+        exp = int(time.time()) + 60
+        token = jwt.encode(payload | {"exp": exp}, service.secret, algorithm="HS256")
+
+        assert service.verify(token)["exp"] == exp  # type: ignore
+
+        monkeypatch.setattr(jwt_service_module.time, "time", lambda: exp)
+        assert cache.get(service.secret_digest, token) is None
+        monkeypatch.undo()
+
+        expired = jwt.encode(payload | {"exp": int(time.time()) - 1}, service.secret, algorithm="HS256")
+        with pytest.raises(AuthenticationError):
+            service.verify(expired)
+        assert cache.stats()["size"] == 0
+
+    def test_secret_rotation_drops_the_cache(self, monkeypatch):
+        cache = VerifiedTokenCache()
+        token = JWTService(cache).sign(payload)  # type: ignore
+        JWTService(cache).verify(token)
+
+        monkeypatch.setenv("JWT_SECRET_KEY", "rotated")
+        with pytest.raises(AuthenticationError):
+            JWTService(cache).verify(token)
+
+        assert cache.stats()["rotations"] == 1
+        assert cache.stats()["hits"] == 0
@@ -0,0 +1,158 @@
+from datetime import datetime, timedelta
+from typing import Any, Callable
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.exc import IntegrityError
+
+from database.database import engine
+from database.migrations import apply_migrations, get_migrations
+from database.query_plans import explain, sequential_scans
+from models.event import EventDTO, EventKey
+from models.group import GroupDTO
+from models.poll import Option, PollDTO, VoteDTO
+from models.routine import RoutineDTO, Schedule
+from repository.group_repository import GroupRepository
+
+
+@pytest.fixture(autouse=True)
+def run_around_tests():
+    yield
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM poll_votes"))
+        conn.execute(text("DELETE FROM poll_options"))
+        conn.execute(text("DELETE FROM poll"))
+        conn.execute(text("DELETE FROM group_events"))
+        conn.execute(text("DELETE FROM group_routines"))
+        conn.execute(text("DELETE FROM group_members"))
+        conn.execute(text("DELETE FROM groups"))
+
+
+def capture_statements(operation: Callable[[], Any]) -> list[tuple[str, Any]]:
+    statements: list[tuple[str, Any]] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        operation()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    return statements
+
+
+class TestMigrations:
+    def test_migrations_are_idempotent(self):
+        assert apply_migrations() == []
+
+        with engine.connect() as conn:
+            versions = conn.execute(
+                text("SELECT version FROM schema_migrations")).scalars().all()
+
+        assert set(versions) == {
+            migration.version for migration in get_migrations()}
+
+    def test_migrations_are_ordered_by_version(self):
+        versions = [migration.version for migration in get_migrations()]
+        assert versions == sorted(versions)
+
+    def test_inverted_event_hours_are_rejected(self):
+        with pytest.raises(IntegrityError), engine.begin() as conn:
+            conn.execute(text("""
+                INSERT INTO group_events (id, group_id, creator_id, name, description, date, start_hour, end_hour)
+                VALUES (:id, :id, :id, 'Event', 'Inverted hours', CURRENT_DATE, 12, 10)
+            """), {"id": "1cdba348-0279-4634-9bcd-c8ea1d2856af"})
+
+
+class TestQueryPlans:
+    """
+    Every repository read must be served by an index on a seeded dataset.
+    """
+
+    user_ids = [f"{i:08d}-0279-4634-9bcd-c8ea1d2856af" for i in range(20)]
+
+    def seed(self, repository: GroupRepository) -> dict[str, str]:
+        ids: dict[str, str] = {}
+
+        for g in range(10):
+            group = repository.save_group(GroupDTO(
+                name=f"Group {g}", description="Seeded group", owner_id=self.user_ids[g]
+            ))
+            assert group
+
+            for user_id in self.user_ids[g + 1:g + 6]:
+                repository.save_member(group.id, user_id)
+
+            repository.save_routine(group.id, RoutineDTO(
+                name="Routine", description="Seeded routine", day="Monday",  # type: ignore
+                start_hour=g, end_hour=g + 1, creator_id=self.user_ids[g]
+            ))
+
+            for d in range(5):
+                event_ = repository.save_event(group.id, EventDTO(
+                    name="Event", description="Seeded event",
+                    date=datetime.now() + timedelta(days=d + 1),
+                    start_hour=10, end_hour=11, creator_id=self.user_ids[g]
+                ))
+                assert event_
+
+                poll_id = repository.save_poll(group.id, self.user_ids[g], event_.id, PollDTO(
+                    question="Seeded poll",
+                    options=[Option(id=1, text="Yes"),
+                             Option(id=2, text="No")]
+                ))
+                repository.save_poll_vote(VoteDTO(
+                    user_id=self.user_ids[g], option_id=1, poll_id=poll_id))
+
+                ids.update(group_id=group.id,
+                           event_id=event_.id, poll_id=poll_id)
+
+        with engine.begin() as conn:
+            conn.execute(
+                text("ANALYZE groups, group_members, group_routines, group_events, poll, poll_options, poll_votes"))
+
+        return ids
+
+    def test_repository_queries_use_indexes(self):
+        repository = GroupRepository()
+        ids = self.seed(repository)
+        date = datetime.now() + timedelta(days=1)
+
+        def read_paths():
+            repository.get_group(ids["group_id"])
+            repository.group_exists(ids["group_id"])
+            repository.get_groups([ids["group_id"]])
+            repository.get_group_aggregate(
+                ids["group_id"], include_members=True)
+            repository.get_user_groups(self.user_ids[3])
+            repository.get_group_members(ids["group_id"])
+            repository.get_members_by_group_ids([ids["group_id"]])
+            repository.get_member_counts([ids["group_id"]])
+            repository.get_routines(ids["group_id"])
+            repository.get_routines_by_group_ids([ids["group_id"]])
+            repository.get_user_groups_routines_schedules(self.user_ids[:3])
+            repository.find_members_colliding_routine(self.user_ids[:3], Schedule(
+                day="Monday", start_hour=1, end_hour=3))  # type: ignore
+            repository.get_event(ids["group_id"], ids["event_id"])
+            repository.get_events(ids["group_id"])
+            repository.get_events(ids["group_id"], date.date(), None, EventKey(
+                date.date(), 10, ids["event_id"]), 20)
+            repository.get_groups_events([ids["group_id"]], date.date(), 10)
+            repository.find_group_colliding_events(
+                ids["group_id"], date, 10, 11)
+            repository.get_poll_options(ids["poll_id"])
+            repository.get_poll_votes(ids["poll_id"])
+            repository.get_poll_by_event_id(ids["event_id"])
+            repository.get_polls_by_event_ids([ids["event_id"]])
+            repository.replace_poll_vote(VoteDTO(
+                user_id=self.user_ids[1], option_id=2, poll_id=ids["poll_id"]))
+
+        statements = capture_statements(read_paths)
+        assert statements
+
+        with engine.connect() as conn:
+            for statement, parameters in statements:
+                scans = sequential_scans(explain(conn, statement, parameters))
+                assert scans == [], f"Sequential scan on {scans} for:\n{statement}"
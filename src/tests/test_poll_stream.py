@@ -0,0 +1,222 @@
+import asyncio
+from datetime import datetime, timedelta
+import json
+import threading
+
+from fastapi import FastAPI, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import text
+from starlette.websockets import WebSocketDisconnect
+
+from database.database import engine
+from middleware.auth_middleware import AuthMiddleware
+from middleware.error_handler import error_handler
+from models.errors.errors import CustomHTTPException
+from models.event import EventDTO
+from models.group import GroupDTO
+from models.poll import Option, PollDTO, VoteDTO
+from repository.group_repository import GroupRepository
+from routes.group_routes import router as group_router
+from service.jwt_service import JWTService
+from service.poll_events import PollWatch, broadcast, poll_channel
+from service.vote_buffer import VoteBuffer
+from utils.broadcast import InMemoryBroadcast, PostgresBroadcast
+
+app = FastAPI()
+
+app.add_middleware(AuthMiddleware)
+
+app.include_router(group_router, tags=["groups"])
+
+
+@app.exception_handler(RequestValidationError)
+@app.exception_handler(CustomHTTPException)
+@app.exception_handler(Exception)
+async def exception_handler(request: Request, exc: Exception) -> JSONResponse:
+    return error_handler(request, exc)
+
+client = TestClient(app)
+
+users = [f"{i}cdba348-0279-4634-9bcd-c8ea1d2856af" for i in range(1, 3)]
+
+token = JWTService().sign({
+    "type": "user", "userId": 1, "email": "test@gmail.com", "username": "test"
+})
+
+auth = {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(autouse=True)
+def run_around_tests():
+    yield
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM poll_votes"))
+        conn.execute(text("DELETE FROM poll_options"))
+        conn.execute(text("DELETE FROM poll"))
+        conn.execute(text("DELETE FROM group_events"))
+        conn.execute(text("DELETE FROM group_members"))
+        conn.execute(text("DELETE FROM groups"))
+
+
+@pytest.fixture
+def poll_id() -> str:
+    repository = GroupRepository()
+
+    group = repository.save_group(GroupDTO(
+        name="Test Group", description="Test Group Description", owner_id=users[0]))
+    assert group
+
+    event = repository.save_event(group.id, EventDTO(
+        name="Team Meeting", description="Weekly team status meeting",
+        date=datetime.now() + timedelta(days=1), start_hour=10, end_hour=12, creator_id=users[0]
+    ))
+    assert event
+
+    return repository.save_poll(group.id, users[0], event.id, PollDTO(
+        question="What topic should we focus on?",
+        options=[Option(id=1, text="Project Status"),
+                 Option(id=2, text="Technical Challenges")]
+    ))
+
+
+class TestBroadcast:
+    def test_fan_out(self):
+        hub = InMemoryBroadcast()
+
+        async def scenario():
+            first, second, other = hub.subscribe(
+                "a"), hub.subscribe("a"), hub.subscribe("b")
+
+            # Published from a worker thread, as after a vote commit
+            publisher = threading.Thread(target=hub.publish, args=("a", "1"))
+            publisher.start()
+            publisher.join()
+
+            assert await first.get(1) == "1"
+            assert await second.get(1) == "1"
+            assert await other.get(0.01) is None
+
+            first.close()
+            second.close()
+            assert hub.stats()["subscriptions"] == 1
+            other.close()
+
+        asyncio.run(scenario())
+        assert hub.stats()["channels"] == 0
+
+    def test_slow_subscriber_loses_oldest_messages(self):
+        hub = InMemoryBroadcast(max_queued=2)
+
+        async def scenario():
+            subscription = hub.subscribe("a")
+
+            for message in ["1", "2", "3"]:
+                hub.publish("a", message)
+            await asyncio.sleep(0)
+
+            assert [await subscription.get(1), await subscription.get(1)] == ["2", "3"]
+            subscription.close()
+
+        asyncio.run(scenario())
+        assert hub.stats()["dropped"] == 1
+
+    def test_postgres_fan_out_across_processes(self):
+        # Each hub stands for a worker with its own listening connection
+        publisher, listener = PostgresBroadcast(engine), PostgresBroadcast(engine)
+
+        async def scenario():
+            subscription = listener.subscribe("a")
+            assert await asyncio.to_thread(listener.listening.wait, 5)
+
+            publisher.publish("a", '{"id": "1"}')
+
+            assert await subscription.get(5) == '{"id": "1"}'
+            subscription.close()
+
+        asyncio.run(scenario())
+
+    def test_server_sent_events(self, poll_id):
+        hub = InMemoryBroadcast()
+        poll = GroupRepository().get_poll(poll_id)
+        assert poll
+
+        async def scenario():
+            watch = PollWatch(hub.subscribe(poll_channel(poll_id)), poll)
+            events = watch.server_sent_events(heartbeat=0.01)
+
+            assert await anext(events) == f'event: votes\ndata: {{"id":"{poll_id}","votes":{{}}}}\n\n'
+            assert await anext(events) == ": keepalive\n\n"
+
+            hub.publish(poll_channel(poll_id), "{}")
+            assert await anext(events) == "event: votes\ndata: {}\n\n"
+
+            await events.aclose()
+            assert hub.stats()["subscriptions"] == 0
+
+        asyncio.run(scenario())
+
+
+class TestPollWebSocket:
+    def test_votes_are_pushed_once_committed(self, poll_id):
+        with client.websocket_connect(f"/polls/{poll_id}/ws?token={token}") as websocket:
+            assert websocket.receive_json() == {"id": poll_id, "votes": {}}
+
+            response = client.put(
+                f"/polls/{poll_id}", json={"user_id": users[0], "option_id": 1}, headers=auth)
+            assert response.status_code == 200
+            assert websocket.receive_json() == {"id": poll_id, "votes": {"1": 1}}
+
+            client.put(f"/polls/{poll_id}",
+                       json={"user_id": users[1], "option_id": 2}, headers=auth)
+            assert websocket.receive_json() == {
+                "id": poll_id, "votes": {"1": 1, "2": 1}}
+
+            # Rolled back, nothing is pushed
+            response = client.put(
+                f"/polls/{poll_id}", json={"user_id": users[0], "option_id": 3}, headers=auth)
+            assert response.status_code == 404
+
+            client.put(f"/polls/{poll_id}",
+                       json={"user_id": users[0], "option_id": 2}, headers=auth)
+            assert websocket.receive_json() == {"id": poll_id, "votes": {"2": 2}}
+
+    def test_authorization_header(self, poll_id):
+        with client.websocket_connect(f"/polls/{poll_id}/ws", headers={"Authorization": f"Bearer {token}"}) as websocket:
+            assert websocket.receive_json()["id"] == poll_id
+
+    def test_rejected_without_token(self, poll_id):
+        with pytest.raises(WebSocketDisconnect) as e:
+            with client.websocket_connect(f"/polls/{poll_id}/ws"):
+                pass
+
+        assert e.value.code == 1008
+
+    def test_rejected_for_unknown_poll(self):
+        with pytest.raises(WebSocketDisconnect) as e:
+            with client.websocket_connect(f"/polls/123e4567-e89b-12d3-a456-426614174001/ws?token={token}"):
+                pass
+
+        assert e.value.code == 1008
+        assert broadcast.stats()["subscriptions"] == 0
+
+    def test_buffered_votes_are_pushed_once_flushed(self, poll_id):
+        buffer = VoteBuffer(GroupRepository(), flush_interval=60)
+
+        async def scenario():
+            subscription = broadcast.subscribe(poll_channel(poll_id))
+
+            buffer.put(VoteDTO(user_id=users[0], option_id=1, poll_id=poll_id))
+            buffer.put(VoteDTO(user_id=users[1], option_id=1, poll_id=poll_id))
+            assert await subscription.get(0.01) is None
+
+            await asyncio.to_thread(buffer.flush)
+            message = await subscription.get(1)
+            assert message and json.loads(message)["votes"] == {"1": 2}
+
+            subscription.close()
+
+        asyncio.run(scenario())
+        buffer.close()
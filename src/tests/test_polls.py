@@ -3,17 +3,19 @@ import pytest
 from fastapi.responses import JSONResponse
 from fastapi.testclient import TestClient
 from fastapi import FastAPI, Request, status
+from concurrent.futures import ThreadPoolExecutor
 import datetime
 
 from models.errors.errors import CustomHTTPException
 from models.member import Member
-from models.poll import Option, PollDTO
+from models.poll import Option, PollDTO, VoteDTO
 from repository.group_repository import GroupRepository
 from routes.group_routes import router as group_router
 from middleware.error_handler import error_handler
 from controller.group_controller import GroupController
 from database.database import engine
-from sqlalchemy import text
+from database.poll_tallies import reconcile_poll_tallies
+from sqlalchemy import event, text
 
 from service.group_service import GroupService
 app = FastAPI()
@@ -61,7 +63,8 @@ class TestPollRoutes:
     valid_event = {
         "name": "Team Meeting",
         "description": "Weekly team status meeting",
-        "date": "2025-07-15T00:00:00",
+        # Events in the past are rejected
+        "date": (datetime.date.today() + datetime.timedelta(days=30)).strftime("%Y-%m-%dT00:00:00"),
         "start_hour": 10,
         "end_hour": 12,
         "creator_id": "1cdba348-0279-4634-9bcd-c8ea1d2856af",
@@ -136,6 +139,67 @@ class TestPollRoutes:
         poll = response.json()["data"]["poll"]
         assert len(poll["options"]) == 3
 
+    """
+        Test listing events with their polls
+    """
+
+    def test_get_events_with_polls(self):
+        response = client.post("/groups", json=self.valid_group)
+        group_id = response.json()["data"]["id"]
+
+        response = client.post(
+            f"/groups/{group_id}/events", json=self.valid_event)
+        poll_id = response.json()["data"]["poll"]["id"]
+        client.put(f"/polls/{poll_id}", json=self.valid_vote)
+
+        without_poll = self.valid_event | {"start_hour": 14, "end_hour": 15}
+        del without_poll["poll"]
+        client.post(f"/groups/{group_id}/events", json=without_poll)
+
+        statements: list[str] = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            response = client.get(f"/groups/{group_id}/events?include=poll")
+            first_count = len(statements)
+
+            for start_hour in [16, 18]:
+                client.post(f"/groups/{group_id}/events", json=self.valid_event | {
+                    "start_hour": start_hour, "end_hour": start_hour + 1})
+
+            statements.clear()
+            client.get(f"/groups/{group_id}/events?include=poll")
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+        # The same queries whatever the number of events
+        assert len(statements) == first_count
+
+        assert response.status_code == status.HTTP_200_OK
+        events = response.json()["data"]
+        assert len(events) == 2
+        assert events[0]["poll"]["id"] == poll_id
+        assert events[0]["poll"]["votes"] == {"1": 1}
+        assert [o["text"] for o in events[0]["poll"]["options"]] == [
+            "Project Status", "Technical Challenges", "Future Planning"]
+        assert events[1]["poll"] is None
+
+        # Without include the polls are not loaded
+        response = client.get(f"/groups/{group_id}/events")
+        assert all(e["poll"] is None for e in response.json()["data"])
+
+    def test_get_events_with_invalid_include(self):
+        response = client.post("/groups", json=self.valid_group)
+        group_id = response.json()["data"]["id"]
+
+        response = client.get(f"/groups/{group_id}/events?include=poll,votes")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()["title"] == "Invalid include"
+
     """
         Test voting on a poll
     """
@@ -249,6 +313,84 @@ class TestPollRoutes:
         assert response.status_code == status.HTTP_200_OK
         assert response.json()["data"]["votes"] == {"1": 2, "2": 1}
 
+    """
+        Test the maintained vote tallies
+    """
+
+    def test_tallies_follow_vote_changes(self):
+        response = client.post("/groups", json=self.valid_group)
+        group_id = response.json()["data"]["id"]
+
+        response = client.post(
+            f"/groups/{group_id}/events", json=self.valid_event)
+        poll_id = response.json()["data"]["poll"]["id"]
+
+        client.put(f"/polls/{poll_id}", json=self.valid_vote)
+        client.put(f"/polls/{poll_id}", json=self.valid_vote)
+
+        with engine.begin() as conn:
+            tallies = conn.execute(text(
+                "SELECT id, vote_count FROM poll_options WHERE poll_id = :poll_id ORDER BY id"
+            ), {"poll_id": poll_id}).fetchall()
+
+        assert [tuple(row) for row in tallies] == [(1, 1), (2, 0), (3, 0)]
+
+        # Tallies must not survive a rolled back vote
+        with pytest.raises(RuntimeError):
+            with engine.begin() as conn:
+                conn.execute(text(
+                    "INSERT INTO poll_votes (poll_id, user_id, option_id) VALUES (:poll_id, :user_id, '2')"
+                ), {"poll_id": poll_id, "user_id": self.another_valid_user_id})
+                raise RuntimeError()
+
+        assert GroupRepository().get_poll_votes(poll_id) == {1: 1}
+
+    def test_concurrent_vote_changes_keep_one_vote(self):
+        response = client.post("/groups", json=self.valid_group)
+        group_id = response.json()["data"]["id"]
+
+        response = client.post(
+            f"/groups/{group_id}/events", json=self.valid_event)
+        poll_id = response.json()["data"]["poll"]["id"]
+
+        repository = GroupRepository()
+
+        def vote(option_id: int) -> dict[int, int]:
+            return repository.replace_poll_vote(VoteDTO(
+                user_id=self.valid_user_id, option_id=option_id, poll_id=poll_id)).votes
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(vote, [1, 2, 3] * 10))
+
+        assert all(sum(votes.values()) == 1 for votes in results)
+
+        votes = repository.get_poll_votes(poll_id)
+        with engine.begin() as conn:
+            rows = conn.execute(text(
+                "SELECT option_id FROM poll_votes WHERE poll_id = :poll_id"
+            ), {"poll_id": poll_id}).scalars().all()
+
+        assert votes == {int(rows[0]): 1}
+
+    def test_reconcile_tallies(self):
+        response = client.post("/groups", json=self.valid_group)
+        group_id = response.json()["data"]["id"]
+
+        response = client.post(
+            f"/groups/{group_id}/events", json=self.valid_event)
+        poll_id = response.json()["data"]["poll"]["id"]
+
+        client.put(f"/polls/{poll_id}", json=self.valid_vote)
+
+        with engine.begin() as conn:
+            conn.execute(text(
+                "UPDATE poll_options SET vote_count = 5 WHERE poll_id = :poll_id"
+            ), {"poll_id": poll_id})
+
+        assert reconcile_poll_tallies() == 3
+        assert reconcile_poll_tallies() == 0
+        assert GroupRepository().get_poll_votes(poll_id) == {1: 1}
+
     """
         Error cases
     """
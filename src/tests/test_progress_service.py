@@ -0,0 +1,388 @@
+import asyncio
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+from typing import Iterator, Optional
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import pytest
+
+from models.errors.errors import BadGatewayError, ServiceUnavailableError
+from models.routine import Schedule
+from service.progress_service import AsyncProgressService, FreeScheduleCache, ProgressClientSettings, ProgressService, intersect_free_schedules, progress_metrics
+from utils.circuit_breaker import CircuitBreaker, CircuitState
+
+
+class ProgressStub(ThreadingHTTPServer):
+    """
+    Local stand-in for the Progress service. Each request pops the next
+    (status, delay) pair from responses, the last one is repeated. Users
+    are free on Monday from 9 to 12 unless set in schedules, or the body is
+    replaced when set.
+    """
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), ProgressStubHandler)
+        self.responses: list[tuple[int, float]] = [(200, 0)]
+        self.schedules: dict[str, list[dict]] = {}
+        self.body: Optional[bytes] = None
+        self.requests: list[dict] = []
+        self.connections: set[int] = set()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class ProgressStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: ProgressStub
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        users = parse_qs(url.query).get("users", [])
+        self.server.requests.append({
+            "path": url.path,
+            "users": users,
+            "authorization": self.headers.get("Authorization"),
+        })
+        self.server.connections.add(self.client_address[1])
+
+        responses = self.server.responses
+        status, delay = responses.pop(0) if len(responses) > 1 else responses[0]
+        time.sleep(delay)
+
+        schedules = self.server.schedules.get(
+            users[0], [{"day": "Monday", "start_hour": 9, "end_hour": 12}])
+        body = self.server.body or json.dumps(
+            {"data": {"schedules": schedules}}).encode()
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub() -> Iterator[ProgressStub]:
+    server = ProgressStub()
+    thread = threading.Thread(
+        target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client() -> Iterator[httpx.Client]:
+    with httpx.Client() as client:
+        yield client
+
+
+def settings(stub: ProgressStub, **kwargs) -> ProgressClientSettings:
+    values = dict(base_url=stub.url, timeout=0.5, deadline=2,
+                  retries=2, backoff=0.01, max_connections=5)
+    values.update(kwargs)
+    return ProgressClientSettings(**values)  # type: ignore
+
+
+def service(stub: ProgressStub, client: httpx.Client, schedules: Optional[FreeScheduleCache] = None,
+            breaker: Optional[CircuitBreaker] = None, **kwargs) -> ProgressService:
+    return ProgressService(
+        client, settings(stub, **kwargs),
+        schedules or FreeScheduleCache(), breaker or CircuitBreaker()
+    )
+
+
+def wait_for(condition, timeout: float = 2) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+members = ["1cdba348-0279-4634-9bcd-c8ea1d2856af",
+           "4cdba348-0279-4634-9bcd-c8ea1d2856af"]
+
+
+class TestProgressService:
+    def test_get_free_schedules(self, stub, client):
+        schedules = service(stub, client).get_free_schedules(
+            members[:1], "Bearer token")
+
+        assert [s.day for s in schedules] == ["Monday"]
+        assert stub.requests[0] == {
+            "path": "/users/freeSchedules/",
+            "users": members[:1],
+            "authorization": "Bearer token",
+        }
+
+    def test_connections_are_reused(self, stub, client):
+        progress = service(stub, client, schedules=FreeScheduleCache(
+            ttl=0, stale_ttl=0))
+        for _ in range(3):
+            progress.get_free_schedules(members[:1], "Bearer token")
+
+        assert len(stub.requests) == 3
+        assert len(stub.connections) == 1
+
+    def test_retries_unavailable_service(self, stub, client):
+        stub.responses = [(503, 0), (503, 0), (200, 0)]
+        retries = progress_metrics.retries
+
+        assert service(stub, client).get_free_schedules(
+            members[:1], "Bearer token")
+
+        assert len(stub.requests) == 3
+        assert progress_metrics.retries == retries + 2
+
+    def test_gives_up_after_retries(self, stub, client):
+        stub.responses = [(503, 0)]
+
+        with pytest.raises(BadGatewayError):
+            service(stub, client).get_free_schedules(
+                members[:1], "Bearer token")
+
+        assert len(stub.requests) == 3
+
+    def test_client_errors_are_not_retried(self, stub, client):
+        stub.responses = [(400, 0)]
+
+        with pytest.raises(BadGatewayError):
+            service(stub, client).get_free_schedules(
+                members[:1], "Bearer token")
+
+        assert len(stub.requests) == 1
+
+    def test_slow_service_is_cut_by_the_deadline(self, stub, client):
+        stub.responses = [(200, 0.5)]
+
+        started = time.monotonic()
+        with pytest.raises(BadGatewayError):
+            service(stub, client, timeout=0.1, deadline=0.3).get_free_schedules(
+                members[:1], "Bearer token")
+
+        assert time.monotonic() - started < 0.6
+
+
+class TestFreeScheduleCache:
+    def test_schedules_are_cached_by_member(self, stub, client):
+        stub.schedules[members[1]] = [
+            {"day": "Monday", "start_hour": 10, "end_hour": 14}]
+        progress = service(stub, client)
+
+        schedules = progress.get_free_schedules(members, "Bearer token")
+        assert schedules == [
+            Schedule(day="Monday", start_hour=10, end_hour=12)]  # type: ignore
+        assert sorted(r["users"][0] for r in stub.requests) == sorted(members)
+
+        progress.get_free_schedules(members[1:], "Bearer token")
+        progress.get_free_schedules(members, "Bearer token")
+
+        assert len(stub.requests) == 2
+        assert progress.schedules.stats()["fresh_hits"] == 3
+
+    def test_stale_schedules_are_served_while_revalidating(self, stub, client):
+        progress = service(
+            stub, client, schedules=FreeScheduleCache(ttl=0, stale_ttl=60))
+        progress.get_free_schedules(members[:1], "Bearer token")
+
+        stub.schedules[members[0]] = [
+            {"day": "Friday", "start_hour": 9, "end_hour": 12}]
+        schedules = progress.get_free_schedules(members[:1], "Bearer token")
+        assert [s.day for s in schedules] == ["Monday"]
+
+        wait_for(lambda: progress.schedules.fallback(members[0]) == [
+            Schedule(day="Friday", start_hour=9, end_hour=12)])  # type: ignore
+        assert progress.schedules.stats()["stale_hits"] == 1
+
+    def test_stale_policy_serves_expired_schedules(self, stub, client):
+        progress = service(stub, client, schedules=FreeScheduleCache(
+            ttl=0, stale_ttl=0), retries=0)
+        progress.get_free_schedules(members[:1], "Bearer token")
+
+        stub.responses = [(503, 0)]
+        schedules = progress.get_free_schedules(members[:1], "Bearer token")
+
+        assert [s.day for s in schedules] == ["Monday"]
+        assert progress.schedules.stats()["degraded_hits"] == 1
+
+    def test_reject_policy_fails(self, stub, client):
+        progress = service(stub, client, schedules=FreeScheduleCache(
+            ttl=0, stale_ttl=0), retries=0, degraded_policy="reject")
+        progress.get_free_schedules(members[:1], "Bearer token")
+
+        stub.responses = [(503, 0)]
+        with pytest.raises(BadGatewayError):
+            progress.get_free_schedules(members[:1], "Bearer token")
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self, stub, client):
+        stub.responses = [(503, 0)]
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        progress = service(
+            stub, client, schedules=FreeScheduleCache(ttl=0, stale_ttl=0),
+            breaker=breaker, retries=0, degraded_policy="reject")
+
+        for _ in range(2):
+            with pytest.raises(BadGatewayError):
+                progress.get_free_schedules(members[:1], "Bearer token")
+
+        assert breaker.state == CircuitState.OPEN
+
+        with pytest.raises(ServiceUnavailableError):
+            progress.get_free_schedules(members[:1], "Bearer token")
+
+        assert len(stub.requests) == 2
+        assert breaker.stats()["rejected"] == 1
+
+    def test_server_errors_open_the_circuit(self, stub, client):
+        stub.responses = [(500, 0)]
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        progress = service(
+            stub, client, schedules=FreeScheduleCache(ttl=0, stale_ttl=0),
+            breaker=breaker, degraded_policy="reject")
+
+        for _ in range(2):
+            with pytest.raises(BadGatewayError):
+                progress.get_free_schedules(members[:1], "Bearer token")
+
+        assert breaker.state == CircuitState.OPEN
+        assert len(stub.requests) == 2
+
+    def test_client_errors_do_not_count(self, stub, client):
+        stub.responses = [(400, 0)]
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        progress = service(
+            stub, client, schedules=FreeScheduleCache(ttl=0, stale_ttl=0),
+            breaker=breaker, degraded_policy="reject")
+
+        # The half open trial ends without closing nor opening the circuit
+        for _ in range(2):
+            with pytest.raises(BadGatewayError):
+                progress.get_free_schedules(members[:1], "Bearer token")
+
+        assert breaker.state == CircuitState.HALF_OPEN
+        assert len(stub.requests) == 2
+
+    def test_invalid_answers_count_as_failures(self, stub, client):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        progress = service(
+            stub, client, schedules=FreeScheduleCache(ttl=0, stale_ttl=0),
+            breaker=breaker, degraded_policy="reject")
+
+        for body in [b"not json", b'{"data": {"schedules": [{"day": "Someday"}]}}']:
+            stub.body = body
+            with pytest.raises(BadGatewayError):
+                progress.get_free_schedules(members[:1], "Bearer token")
+
+        assert breaker.state == CircuitState.OPEN
+        assert len(stub.requests) == 2
+
+    def test_cancelled_trial_ends(self, stub):
+        stub.responses = [(200, 0.5)]
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        progress = AsyncProgressService(
+            settings=settings(stub, degraded_policy="reject"),
+            schedules=FreeScheduleCache(ttl=0, stale_ttl=0), breaker=breaker)
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(asyncio.wait_for(progress.get_free_schedules(
+                members[:1], "Bearer token"), 0.05))
+
+        # Neither closed nor opened, and the next call is the new trial
+        assert breaker.state == CircuitState.HALF_OPEN
+        assert breaker.allow()
+
+    def test_half_open_trial_closes_the_circuit(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+
+        breaker.record_failure()
+        assert not breaker.allow()
+
+        time.sleep(0.02)
+        assert breaker.state == CircuitState.HALF_OPEN
+        assert breaker.allow()
+        assert not breaker.allow()
+
+        breaker.record_success()
+        assert breaker.state == CircuitState.CLOSED
+
+    def test_failed_trial_opens_the_circuit_again(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.01)
+
+        for _ in range(3):
+            breaker.record_failure()
+        time.sleep(0.02)
+
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == CircuitState.OPEN
+
+
+class TestIntersectFreeSchedules:
+    def test_intersection(self):
+        first = [Schedule(day="Monday", start_hour=8, end_hour=12),  # type: ignore
+                 Schedule(day="Monday", start_hour=14, end_hour=18),  # type: ignore
+                 Schedule(day="Tuesday", start_hour=8, end_hour=12)]  # type: ignore
+        second = [Schedule(day="Monday", start_hour=10, end_hour=16),  # type: ignore
+                  Schedule(day="Wednesday", start_hour=8, end_hour=12)]  # type: ignore
+
+        assert intersect_free_schedules([first, second]) == [
+            Schedule(day="Monday", start_hour=10, end_hour=12),  # type: ignore
+            Schedule(day="Monday", start_hour=14, end_hour=16),  # type: ignore
+        ]
+        assert intersect_free_schedules([first]) == first
+        assert intersect_free_schedules([]) == []
+
+
+class TestAsyncProgressService:
+    def test_get_free_schedules_with_retries(self, stub):
+        stub.responses = [(502, 0), (200, 0)]
+
+        async def run():
+            async with httpx.AsyncClient() as client:
+                progress = AsyncProgressService(
+                    client, settings(stub), FreeScheduleCache(), CircuitBreaker())
+                return await progress.get_free_schedules(members, "Bearer token")
+
+        schedules = asyncio.run(run())
+
+        assert [s.day for s in schedules] == ["Monday"]
+        assert len(stub.requests) == 3
+
+    def test_works_without_a_shared_client(self, stub):
+        progress = AsyncProgressService(
+            settings=settings(stub), schedules=FreeScheduleCache(), breaker=CircuitBreaker())
+
+        assert asyncio.run(progress.get_free_schedules(
+            members[:1], "Bearer token"))
+        assert asyncio.run(progress.get_free_schedules(
+            members[:1], "Bearer token"))
+        assert len(stub.requests) == 1
+
+    def test_server_errors_open_the_circuit(self, stub):
+        stub.responses = [(500, 0)]
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        progress = AsyncProgressService(
+            settings=settings(stub, degraded_policy="reject"),
+            schedules=FreeScheduleCache(ttl=0, stale_ttl=0), breaker=breaker)
+
+        for _ in range(2):
+            with pytest.raises(BadGatewayError):
+                asyncio.run(progress.get_free_schedules(
+                    members[:1], "Bearer token"))
+
+        assert breaker.state == CircuitState.OPEN
@@ -0,0 +1,80 @@
+from datetime import datetime, timezone
+
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+
+from models.event import EventReturn
+from models.member import Member
+from models.poll import Option, PollReturn
+from models.response import CustomResponse, PageResponse
+from utils.serialization import ResponseEncoder
+
+group_id = "1cdba348-0279-4634-9bcd-c8ea1d2856af"
+created_at = datetime(2025, 1, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+
+events = [
+    EventReturn(
+        id=f"{i:08d}-0279-4634-9bcd-c8ea1d2856af",
+        group_id=group_id,
+        creator_id=group_id,
+        name="Team Meeting ñ",
+        description="Weekly \"team\" status meeting",
+        date=datetime(2025, 7, 15),
+        start_hour=10,
+        end_hour=12,
+        poll=PollReturn(
+            id=f"{i:08d}-0279-4634-9bcd-c8ea1d2856af",
+            question="What topic should we focus on?",
+            options=[Option(id=1, text="Status"), Option(id=2, text="Planning")],
+            votes={1: 3, 2: i},
+            created_at=created_at
+        ) if i % 2 else None,
+        created_at=created_at,
+        updated_at=created_at,
+    )
+    for i in range(3)
+]
+
+members = [Member(user_id=group_id, created_at=created_at)]
+
+app = FastAPI()
+
+
+@app.get("/model/events")
+async def model_events() -> PageResponse[EventReturn]:
+    return PageResponse(data=events, next_cursor="cursor")
+
+
+@app.get("/encoded/events")
+async def encoded_events() -> PageResponse[EventReturn]:
+    return ResponseEncoder(PageResponse[EventReturn])(PageResponse(data=events, next_cursor="cursor"))
+
+
+@app.get("/model/members")
+async def model_members() -> CustomResponse[list[Member]]:
+    return CustomResponse(data=members)
+
+
+@app.get("/encoded/members")
+async def encoded_members() -> CustomResponse[list[Member]]:
+    return ResponseEncoder(CustomResponse[list[Member]])({"data": [{"user_id": group_id, "created_at": created_at, "extra": 1}]})
+
+
+client = TestClient(app)
+
+
+class TestResponseEncoder:
+    def test_same_body_as_the_response_model(self):
+        for path in ("events", "members"):
+            model = client.get(f"/model/{path}")
+            encoded = client.get(f"/encoded/{path}")
+
+            assert encoded.status_code == status.HTTP_200_OK
+            assert encoded.headers["content-type"] == "application/json"
+            assert encoded.json() == model.json()
+
+    def test_status_code(self):
+        response = ResponseEncoder(CustomResponse[list[Member]])(
+            CustomResponse(data=members), status.HTTP_201_CREATED)
+
+        assert response.status_code == status.HTTP_201_CREATED
@@ -0,0 +1,173 @@
+import pytest
+from sqlalchemy import event, text
+
+from database.database import engine
+from database.unit_of_work import UnitOfWork
+from models.group import GroupDTO
+from models.routine import PostRoutineParams, RoutineDTO, Schedule
+from repository.group_repository import GroupRepository
+from service.group_service import GroupService
+from service.progress_service import IProgressService
+
+
+@pytest.fixture(autouse=True)
+def run_around_tests():
+    yield
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM group_routines"))
+        conn.execute(text("DELETE FROM group_members"))
+        conn.execute(text("DELETE FROM groups"))
+
+
+@pytest.fixture
+def checkouts():
+    count = {"value": 0}
+
+    def on_checkout(*args):
+        count["value"] += 1
+
+    event.listen(engine, "checkout", on_checkout)
+    yield count
+    event.remove(engine, "checkout", on_checkout)
+
+
+@pytest.fixture
+def checked_out():
+    count = {"value": 0}
+
+    def on_checkout(*args):
+        count["value"] += 1
+
+    def on_checkin(*args):
+        count["value"] -= 1
+
+    event.listen(engine, "checkout", on_checkout)
+    event.listen(engine, "checkin", on_checkin)
+    yield count
+    event.remove(engine, "checkout", on_checkout)
+    event.remove(engine, "checkin", on_checkin)
+
+
+class ConnectionCheckingProgressService(IProgressService):
+    """Free all week, recording the connections checked out when called"""
+
+    def __init__(self, checked_out: dict[str, int]):
+        self.checked_out = checked_out
+        self.calls: list[int] = []
+
+    def get_free_schedules(self, members: list[str], auth_header: str) -> list[Schedule]:
+        self.calls.append(self.checked_out["value"])
+        return [Schedule(day="Monday", start_hour=0, end_hour=23)]  # type: ignore
+
+    def get_members_free_schedules(self, members: list[str], auth_header: str) -> dict[str, list[Schedule]]:
+        return {member: self.get_free_schedules([member], auth_header) for member in members}
+
+
+class TestUnitOfWork:
+    group = GroupDTO(
+        name="Test Group",
+        description="Test Group Description",
+        owner_id="1cdba348-0279-4634-9bcd-c8ea1d2856af"
+    )
+
+    def test_repository_calls_share_one_connection(self, checkouts):
+        repository = GroupRepository()
+
+        with UnitOfWork():
+            group = repository.save_group(self.group)
+            assert group
+
+            repository.get_group(group.id)
+            repository.get_routines(group.id)
+            repository.get_group_members(group.id)
+
+        assert checkouts["value"] == 1
+        assert repository.get_group(group.id)
+
+    def test_connection_is_checked_out_lazily(self, checkouts):
+        with UnitOfWork():
+            pass
+
+        assert checkouts["value"] == 0
+
+    def test_rollback_on_error(self):
+        repository = GroupRepository()
+        group_id = None
+
+        with pytest.raises(RuntimeError):
+            with UnitOfWork():
+                group = repository.save_group(self.group)
+                assert group
+                group_id = group.id
+                raise RuntimeError()
+
+        assert group_id
+        assert repository.get_group(group_id) is None
+        assert repository.get_group_members(group_id) == []
+
+    def test_nested_unit_of_work_joins_outer(self, checkouts):
+        repository = GroupRepository()
+
+        with UnitOfWork() as outer:
+            with UnitOfWork() as inner:
+                assert inner is outer
+                group = repository.save_group(self.group)
+
+            assert group
+            assert repository.get_group(group.id)
+
+        assert checkouts["value"] == 1
+
+    def test_after_commit_runs_only_on_commit(self):
+        repository = GroupRepository()
+        calls: list[str] = []
+
+        with UnitOfWork() as unit_of_work:
+            repository.save_group(self.group)
+            unit_of_work.after_completion(lambda: calls.append("completed"))
+            unit_of_work.after_commit(lambda: calls.append("committed"))
+            assert calls == []
+
+        assert calls == ["completed", "committed"]
+
+        calls.clear()
+        with pytest.raises(RuntimeError):
+            with UnitOfWork() as unit_of_work:
+                repository.save_group(self.group)
+                unit_of_work.after_completion(lambda: calls.append("completed"))
+                unit_of_work.after_commit(lambda: calls.append("committed"))
+                raise RuntimeError()
+
+        assert calls == ["completed"]
+
+    def test_release_returns_the_connection(self, checkouts, checked_out):
+        repository = GroupRepository()
+
+        with UnitOfWork() as unit_of_work:
+            group = repository.save_group(self.group)
+            assert group
+
+            unit_of_work.release()
+            assert checked_out["value"] == 0
+
+            # The work done before is committed, and queries go on
+            assert repository.get_group(group.id)
+            assert checked_out["value"] == 1
+
+        assert checkouts["value"] == 2
+
+    def test_progress_is_called_without_a_connection(self, checked_out):
+        repository = GroupRepository()
+        progress_service = ConnectionCheckingProgressService(checked_out)
+        service = GroupService(repository, progress_service)
+        routine = RoutineDTO(
+            name="Routine", description="Routine", day="Monday",  # type: ignore
+            start_hour=9, end_hour=10, creator_id=self.group.owner_id
+        )
+
+        with UnitOfWork():
+            group = service.save_group(self.group)
+            service.save_routine(group.id, routine, PostRoutineParams())
+            service.get_availability_suggestions(group.id, 1, 3, "")
+
+        assert progress_service.calls == [0, 0]
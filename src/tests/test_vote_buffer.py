@@ -0,0 +1,215 @@
+import asyncio
+from datetime import datetime, timedelta
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import text
+
+from container import Container
+from database.database import engine
+from middleware.error_handler import error_handler
+from models.errors.errors import CustomHTTPException, NotFoundError
+from models.event import EventDTO
+from models.group import GroupDTO
+from models.poll import Option, PollDTO, VoteDTO
+from repository.group_repository import GroupRepository
+from routes.group_routes import router as group_router
+from service.vote_buffer import VoteBuffer
+
+app = FastAPI()
+
+app.include_router(group_router, tags=["groups"])
+
+
+@app.exception_handler(RequestValidationError)
+@app.exception_handler(CustomHTTPException)
+@app.exception_handler(Exception)
+async def exception_handler(request: Request, exc: Exception) -> JSONResponse:
+    return error_handler(request, exc)
+
+client = TestClient(app)
+
+users = [f"{i}cdba348-0279-4634-9bcd-c8ea1d2856af" for i in range(1, 4)]
+
+
+@pytest.fixture(autouse=True)
+def run_around_tests():
+    yield
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM poll_votes"))
+        conn.execute(text("DELETE FROM poll_options"))
+        conn.execute(text("DELETE FROM poll"))
+        conn.execute(text("DELETE FROM group_events"))
+        conn.execute(text("DELETE FROM group_members"))
+        conn.execute(text("DELETE FROM groups"))
+
+
+@pytest.fixture
+def poll_id() -> str:
+    repository = GroupRepository()
+
+    group = repository.save_group(GroupDTO(
+        name="Test Group", description="Test Group Description", owner_id=users[0]))
+    assert group
+
+    event = repository.save_event(group.id, EventDTO(
+        name="Team Meeting", description="Weekly team status meeting",
+        date=datetime.now() + timedelta(days=1), start_hour=10, end_hour=12, creator_id=users[0]
+    ))
+    assert event
+
+    return repository.save_poll(group.id, users[0], event.id, PollDTO(
+        question="What topic should we focus on?",
+        options=[Option(id=1, text="Project Status"),
+                 Option(id=2, text="Technical Challenges")]
+    ))
+
+
+def vote(poll_id: str, user: int, option_id: int) -> VoteDTO:
+    return VoteDTO(user_id=users[user], option_id=option_id, poll_id=poll_id)
+
+
+def persisted_votes(poll_id: str) -> dict[str, int]:
+    return GroupRepository().get_poll_user_votes(poll_id)
+
+
+class TestVoteBuffer:
+    def test_votes_are_projected_then_flushed(self, poll_id):
+        buffer = VoteBuffer(GroupRepository(), flush_interval=60)
+
+        buffer.put(vote(poll_id, 0, 1))
+        buffer.put(vote(poll_id, 1, 2))
+        poll = buffer.put(vote(poll_id, 0, 2))
+
+        assert poll.votes == {2: 2}
+        assert persisted_votes(poll_id) == {}
+
+        assert buffer.flush() == 2
+        assert persisted_votes(poll_id) == {users[0]: 2, users[1]: 2}
+        assert GroupRepository().get_poll_votes(poll_id) == {2: 2}
+
+        assert buffer.put(vote(poll_id, 2, 1)).votes == {1: 1, 2: 2}
+        buffer.close()
+
+    def test_polls_stay_loaded_across_flushes(self, poll_id, monkeypatch):
+        repository = GroupRepository()
+        buffer = VoteBuffer(repository, flush_interval=60, max_age=60)
+        loads: list[str] = []
+        get_poll = repository.get_poll
+
+        def counting_get_poll(poll_id: str):
+            loads.append(poll_id)
+            return get_poll(poll_id)
+
+        monkeypatch.setattr(repository, "get_poll", counting_get_poll)
+
+        buffer.put(vote(poll_id, 0, 1))
+        assert buffer.flush() == 1
+        assert buffer.flush() == 0
+
+        assert buffer.put(vote(poll_id, 1, 2)).votes == {1: 1, 2: 1}
+        assert loads == [poll_id]
+
+        # Once too old, votes other workers flushed are loaded
+        GroupRepository().save_poll_votes([vote(poll_id, 2, 2)])
+        buffer.max_age = 0
+        assert buffer.put(vote(poll_id, 1, 2)).votes == {1: 1, 2: 2}
+        assert loads == [poll_id, poll_id]
+        buffer.close()
+
+    def test_full_buffer_is_flushed_right_away(self, poll_id):
+        buffer = VoteBuffer(GroupRepository(), flush_interval=60, max_pending=2)
+
+        buffer.put(vote(poll_id, 0, 1))
+        buffer.put(vote(poll_id, 1, 1))
+
+        deadline = time.monotonic() + 2
+        while len(persisted_votes(poll_id)) < 2:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+        buffer.close()
+        assert buffer.stats()["flushes"] == 1
+
+    def test_close_drains_the_buffer(self, poll_id):
+        buffer = VoteBuffer(GroupRepository(), flush_interval=60)
+
+        buffer.put(vote(poll_id, 0, 1))
+        buffer.close()
+        assert persisted_votes(poll_id) == {users[0]: 1}
+
+        # Written right away once closed
+        buffer.put(vote(poll_id, 1, 2))
+        assert persisted_votes(poll_id) == {users[0]: 1, users[1]: 2}
+
+    def test_close_retries_failed_flushes(self, poll_id, monkeypatch):
+        repository = GroupRepository()
+        buffer = VoteBuffer(repository, flush_interval=60)
+        buffer.put(vote(poll_id, 0, 1))
+        save_poll_votes = repository.save_poll_votes
+        failures = [ConnectionError()]
+
+        def failing_save_poll_votes(votes):
+            if failures:
+                raise failures.pop()
+            return save_poll_votes(votes)
+
+        monkeypatch.setattr(repository, "save_poll_votes", failing_save_poll_votes)
+        buffer.close()
+
+        assert persisted_votes(poll_id) == {users[0]: 1}
+        assert buffer.stats()["failed_flushes"] == 1
+        assert buffer.stats()["pending"] == 0
+
+    def test_failed_flush_keeps_newer_votes(self, poll_id, monkeypatch):
+        repository = GroupRepository()
+        buffer = VoteBuffer(repository, flush_interval=60)
+        buffer.put(vote(poll_id, 0, 1))
+
+        def save_poll_votes(votes):
+            # The user votes again while the failing flush runs
+            buffer.put(vote(poll_id, 0, 2))
+            raise ConnectionError()
+
+        monkeypatch.setattr(repository, "save_poll_votes", save_poll_votes)
+        assert buffer.flush() == 0
+        assert buffer.stats()["pending"] == 1
+
+        monkeypatch.undo()
+        assert buffer.flush() == 1
+        assert persisted_votes(poll_id) == {users[0]: 2}
+        buffer.close()
+
+    def test_unknown_poll_or_option(self, poll_id):
+        buffer = VoteBuffer(GroupRepository(), flush_interval=60)
+
+        with pytest.raises(NotFoundError):
+            buffer.put(vote("5cdba348-0279-4634-9bcd-c8ea1d2856af", 0, 1))
+
+        with pytest.raises(NotFoundError):
+            buffer.put(vote(poll_id, 0, 3))
+
+        buffer.close()
+        assert buffer.stats()["accepted"] == 0
+
+    def test_buffered_ingestion_mode(self, poll_id, monkeypatch):
+        monkeypatch.setenv("VOTE_INGESTION_MODE", "buffered")
+        # The container builds its buffer and services once, with the mode of then
+        container = Container()
+        monkeypatch.setattr(app.state, "container", container, raising=False)
+
+        response = client.put(
+            f"/polls/{poll_id}", json={"user_id": users[0], "option_id": 2})
+
+        assert response.status_code == 200
+        assert response.json()["data"]["votes"] == {"2": 1}
+
+        assert container.vote_buffer is not None
+        container.vote_buffer.flush()
+        assert persisted_votes(poll_id) == {users[0]: 2}
+
+        asyncio.run(container.close())
@@ -0,0 +1,210 @@
+"""
+Weekly availability as bitmasks.
+
+With hour granularity a day fits in 24 bits, bit h being the hour from h to
+h + 1, so a schedule from start_hour to end_hour sets the bits
+[start_hour, end_hour). A set of members is a (members, 7) uint32 array of
+day masks, on which collision checks are a few vectorized bitwise ops.
+"""
+from datetime import date, timedelta
+from typing import Iterable, Optional
+
+import numpy as np
+
+from models.event import EventDTO
+from models.routine import Day, Schedule
+
+DAYS: list[Day] = list(Day)
+
+DAY_INDEX: dict[Day, int] = {day: i for i, day in enumerate(DAYS)}
+
+HOURS_PER_DAY = 24
+
+FULL_DAY = (1 << HOURS_PER_DAY) - 1
+
+
+def hours_mask(start_hour: int, end_hour: int) -> int:
+    """Mask of the hours in [start_hour, end_hour)"""
+    if end_hour <= start_hour:
+        return 0
+
+    return ((1 << end_hour) - 1) ^ ((1 << start_hour) - 1)
+
+
+def week_hours(schedule: Schedule) -> tuple[int, int]:
+    """Bounds of the schedule as hours of the week, Monday 0h being 0"""
+    offset = DAY_INDEX[schedule.day] * HOURS_PER_DAY
+
+    return offset + schedule.start_hour, offset + max(schedule.start_hour, schedule.end_hour)
+
+
+def week_masks(schedules: Iterable[Schedule]) -> list[int]:
+    """Union of the schedules as one mask per day, Monday first"""
+    masks = [0] * len(DAYS)
+
+    for schedule in schedules:
+        masks[DAY_INDEX[schedule.day]] |= hours_mask(
+            schedule.start_hour, schedule.end_hour)
+
+    return masks
+
+
+def week_ahead_schedules(events: Iterable[EventDTO], today: Optional[date] = None) -> list[Schedule]:
+    """Schedules of the events in the 7 days from today, on their weekday"""
+    today = today or date.today()
+
+    return [
+        Schedule(day=DAYS[event.date.weekday()],
+                 start_hour=event.start_hour, end_hour=event.end_hour)
+        for event in events
+        if today <= event.date.date() < today + timedelta(days=len(DAYS))
+    ]
+
+
+def mask_to_schedules(day: Day, mask: int) -> list[Schedule]:
+    """Split a day mask into its runs of consecutive hours"""
+    schedules: list[Schedule] = []
+    hour = 0
+
+    while mask >> hour:
+        if not (mask >> hour) & 1:
+            hour += 1
+            continue
+
+        start = hour
+        while (mask >> hour) & 1:
+            hour += 1
+
+        schedules.append(Schedule(day=day, start_hour=start, end_hour=hour))
+
+    return schedules
+
+
+def week_schedules(masks: Iterable[int]) -> list[Schedule]:
+    """Inverse of week_masks, adjacent hours are merged"""
+    return [
+        schedule
+        for day, mask in zip(DAYS, masks)
+        for schedule in mask_to_schedules(day, int(mask))
+    ]
+
+
+def window_masks(duration: int) -> np.ndarray:
+    """Masks of the windows of duration hours ending by hour 23, by start hour"""
+    return np.array(
+        [hours_mask(start, start + duration)
+         for start in range(HOURS_PER_DAY - duration)],
+        dtype=np.uint32
+    )
+
+
+class WeeklyAvailability:
+    """
+    Week masks of a set of members, one row per member.
+
+    The same structure holds busy hours (e.g. routines) or free hours (e.g.
+    Progress free schedules): blocking_members answers the former, the
+    members whose busy hours overlap a schedule, and lacking_members the
+    latter, the members not free during the whole schedule.
+    """
+
+    def __init__(self, members: list[str], masks: np.ndarray):
+        if masks.shape != (len(members), len(DAYS)):
+            raise ValueError(
+                f"Expected masks of shape {(len(members), len(DAYS))}, got {masks.shape}")
+
+        self.members = members
+        self.masks = masks.astype(np.uint32, copy=False)
+
+    @staticmethod
+    def from_schedules(members_schedules: dict[str, list[Schedule]]) -> "WeeklyAvailability":
+        members = list(members_schedules)
+        masks = np.array(
+            [week_masks(members_schedules[member]) for member in members],
+            dtype=np.uint32
+        ).reshape(len(members), len(DAYS))
+
+        return WeeklyAvailability(members, masks)
+
+    def _day_and_mask(self, schedule: Schedule) -> tuple[int, np.uint32]:
+        return DAY_INDEX[schedule.day], np.uint32(hours_mask(schedule.start_hour, schedule.end_hour))
+
+    def overlapping(self, schedule: Schedule) -> np.ndarray:
+        """Boolean vector of the members with any hour in the schedule"""
+        day, mask = self._day_and_mask(schedule)
+
+        return (self.masks[:, day] & mask) != 0
+
+    def covering(self, schedule: Schedule) -> np.ndarray:
+        """Boolean vector of the members with every hour of the schedule"""
+        day, mask = self._day_and_mask(schedule)
+
+        return (self.masks[:, day] & mask) == mask
+
+    def collides(self, schedule: Schedule) -> bool:
+        return bool(self.overlapping(schedule).any())
+
+    def blocking_members(self, schedule: Schedule) -> list[str]:
+        return [self.members[i] for i in np.flatnonzero(self.overlapping(schedule))]
+
+    def lacking_members(self, schedule: Schedule) -> list[str]:
+        return [self.members[i] for i in np.flatnonzero(~self.covering(schedule))]
+
+    def union(self) -> list[int]:
+        """Day masks of the hours set for any member"""
+        return [int(mask) for mask in np.bitwise_or.reduce(self.masks, axis=0, initial=0)]
+
+    def intersection(self) -> list[int]:
+        """Day masks of the hours set for every member"""
+        return [int(mask) for mask in np.bitwise_and.reduce(self.masks, axis=0, initial=FULL_DAY)]
+
+    def windows(self, duration: int) -> np.ndarray:
+        """
+        (members, 7, 24 - duration) boolean array, [m, d, h] set if every hour
+        from h to h + duration of day d is set for member m. Windows end by
+        hour 23, the latest a Schedule can end.
+        """
+        windows = window_masks(duration)
+
+        return (self.masks[:, :, np.newaxis] & windows) == windows
+
+    def hours(self) -> np.ndarray:
+        """(members, 7, 24) boolean array, [m, d, h] set if hour h of day d is set for member m"""
+        bits = np.arange(HOURS_PER_DAY, dtype=np.uint32)
+
+        return ((self.masks[:, :, np.newaxis] >> bits) & 1).astype(bool)
+
+
+def rank_slots(free: WeeklyAvailability, busy: list[int], duration: int, limit: int) -> list[tuple[Schedule, list[str]]]:
+    """
+    Sweep every window of duration hours of the week at once and rank them
+    by how many members are free during the whole window, earliest first on
+    ties. Windows overlapping the busy day masks, hours taken for the whole
+    group, are left out, and so are those with no member free.
+
+    Returns:
+        Up to limit (slot, free members) pairs, best first
+    """
+    if not 0 < duration < HOURS_PER_DAY:
+        return []
+
+    windows = free.windows(duration)
+    counts = windows.sum(axis=0)
+
+    taken = (np.array(busy, dtype=np.uint32)[:, np.newaxis]
+             & window_masks(duration)) != 0
+    counts[taken] = 0
+
+    flat = counts.ravel()
+    best = np.argsort(-flat, kind="stable")[:limit]
+
+    slots: list[tuple[Schedule, list[str]]] = []
+    for index in best[flat[best] > 0]:
+        day, start = divmod(int(index), counts.shape[1])
+        slot = Schedule(day=DAYS[day], start_hour=start,
+                        end_hour=start + duration)
+        members = [free.members[m]
+                   for m in np.flatnonzero(windows[:, day, start])]
+        slots.append((slot, members))
+
+    return slots
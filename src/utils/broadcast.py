@@ -0,0 +1,220 @@
+from abc import ABCMeta, abstractmethod
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+import select
+import threading
+import time
+from typing import Any, Optional
+
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from sqlalchemy import Engine, text
+
+
+class Subscription:
+    """
+    Messages published on a channel since the subscription was made, queued
+    on the event loop that made it.
+
+    The queue is bounded: a subscriber that does not keep up loses its
+    oldest messages instead of holding an ever growing backlog.
+    """
+
+    def __init__(self, hub: "InMemoryBroadcast", channel: str, max_queued: int):
+        self.hub = hub
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize=max_queued)
+
+    def deliver(self, message: str) -> None:
+        """Queue the message, must be called on the subscription event loop"""
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.hub.dropped += 1
+
+        self._queue.put_nowait(message)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Wait for the next message, or None once timeout seconds elapsed"""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self.hub.unsubscribe(self)
+
+
+class IBroadcast(metaclass=ABCMeta):
+    @abstractmethod
+    def publish(self, channel: str, message: str) -> None:
+        """
+        Send the message to every subscriber of the channel. Thread safe and
+        non blocking: delivery happens on the subscribers event loops.
+        """
+        pass
+
+    @abstractmethod
+    def subscribe(self, channel: str) -> Subscription:
+        """Subscribe the running event loop to the channel, close() the subscription when done"""
+        pass
+
+    @abstractmethod
+    def stats(self) -> dict[str, Any]:
+        pass
+
+
+class InMemoryBroadcast(IBroadcast):
+    """
+    In-process publish/subscribe hub.
+
+    A message is published once, already serialized, and handed as is to
+    every subscriber of its channel, so fanning it out costs a queue put per
+    subscriber. Only subscribers of this process receive it.
+    """
+
+    def __init__(self, max_queued: int = 64):
+        self.max_queued = max_queued
+        self._subscriptions: dict[str, set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def publish(self, channel: str, message: str) -> None:
+        with self._lock:
+            self.published += 1
+            subscriptions = list(self._subscriptions.get(channel, ()))
+
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.deliver, message)
+            except RuntimeError:
+                # Its event loop is closed
+                self.unsubscribe(subscription)
+
+    def subscribe(self, channel: str) -> Subscription:
+        subscription = Subscription(self, channel, self.max_queued)
+
+        with self._lock:
+            self._subscriptions.setdefault(channel, set()).add(subscription)
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is None:
+                return
+
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.channel]
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "channels": len(self._subscriptions),
+                "subscriptions": sum(len(s) for s in self._subscriptions.values()),
+                "published": self.published,
+                "dropped": self.dropped,
+            }
+
+
+class PostgresBroadcast(IBroadcast):
+    """
+    Hub shared by every worker connected to the same database, through
+    Postgres LISTEN/NOTIFY.
+
+    Messages are sent with pg_notify from a background thread, so publishing
+    never blocks the caller. Each process keeps one listening connection,
+    opened on the first subscription, and fans the notifications it gets out
+    to its local subscribers. Notification payloads are limited to 8000
+    bytes by Postgres.
+    """
+
+    def __init__(self, engine_: Engine, notify_channel: str = "group_service_broadcast", max_queued: int = 64):
+        self.engine = engine_
+        self.notify_channel = notify_channel
+        self.local = InMemoryBroadcast(max_queued)
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="broadcast-notify")
+        self._listener: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.listening = threading.Event()
+        self.failed = 0
+
+    def publish(self, channel: str, message: str) -> None:
+        self._executor.submit(self._notify, channel, message)
+
+    def _notify(self, channel: str, message: str) -> None:
+        payload = json.dumps({"channel": channel, "message": message})
+
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(
+                    text("SELECT pg_notify(:channel, :payload)"),
+                    {"channel": self.notify_channel, "payload": payload}
+                )
+        except Exception as e:
+            self.failed += 1
+            logging.error(f"Could not publish on {channel}: {e!r}")
+
+    def subscribe(self, channel: str) -> Subscription:
+        self._start()
+        return self.local.subscribe(channel)
+
+    def _start(self) -> None:
+        if self._listener is not None:
+            return
+
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(
+                    target=self._listen, name="broadcast-listen", daemon=True)
+                self._listener.start()
+
+    def _listen(self) -> None:
+        dsn = self.engine.url.set(drivername="postgresql").render_as_string(
+            hide_password=False)
+
+        while True:
+            connection = None
+            try:
+                connection = psycopg2.connect(dsn)
+                connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.notify_channel}"')
+
+                self.listening.set()
+
+                while True:
+                    if select.select([connection], [], [], 5) == ([], [], []):
+                        continue
+
+                    connection.poll()
+                    while connection.notifies:
+                        notify = connection.notifies.pop(0)
+                        payload = json.loads(notify.payload)
+                        self.local.publish(
+                            payload["channel"], payload["message"])
+            except Exception as e:
+                self.failed += 1
+                logging.warning(f"Broadcast listener failed, reconnecting: {e!r}")
+                # Messages sent while reconnecting are missed
+                self.listening.clear()
+                time.sleep(1)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+    def stats(self) -> dict[str, Any]:
+        return self.local.stats() | {
+            "backend": "postgres",
+            "listening": self.listening.is_set(),
+            "failed": self.failed,
+        }
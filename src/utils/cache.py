@@ -0,0 +1,421 @@
+from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Iterable, Optional
+
+import orjson
+from pydantic import BaseModel, ValidationError
+import redis
+
+
+class ICache(metaclass=ABCMeta):
+    # Whether calls wait on the network, so async callers must keep them off
+    # the event loop
+    blocking: bool = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Get the cached value, or None if missing or expired"""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Cache a value, optionally overriding the default time to live (seconds)"""
+        pass
+
+    @abstractmethod
+    def delete(self, *keys: str) -> None:
+        pass
+
+    @abstractmethod
+    def get_versions(self, *namespaces: str) -> Optional[list[int]]:
+        """
+        Get the current version of each namespace, to be embedded in the keys
+        built for it. None means the versions are unknown and the cache must
+        be bypassed.
+        """
+        pass
+
+    @abstractmethod
+    def bump_version(self, *namespaces: str) -> None:
+        """Invalidate every key built with the current version of the namespaces"""
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+    @abstractmethod
+    def stats(self) -> dict[str, Any]:
+        """Get the cache counters"""
+        pass
+
+
+class CacheCodec:
+    """
+    JSON encoding of the values cached out of process.
+
+    Models are written as their JSON mode dump tagged with their class name,
+    and validated back into that class, which must be one of the registered
+    models: a value read from the server is never turned into an arbitrary
+    object. Dicts are written as their items, so their keys keep their type.
+    Lists, strings, numbers, booleans and None are written as they are.
+    """
+
+    def __init__(self, models: Iterable[type[BaseModel]] = ()):
+        self.models = {model.__name__: model for model in models}
+
+    def dumps(self, value: Any) -> bytes:
+        """Encode a value, raising TypeError when it holds unregistered types"""
+        return orjson.dumps(self._encode(value))
+
+    def loads(self, data: bytes) -> Any:
+        """Decode a value, raising ValueError when it cannot be read back"""
+        return self._decode(orjson.loads(data))
+
+    def _encode(self, value: Any) -> Any:
+        if isinstance(value, BaseModel):
+            name = type(value).__name__
+            if self.models.get(name) is not type(value):
+                raise TypeError(f"Model {name} is not registered")
+
+            return {"__model__": name, "value": value.model_dump(mode="json")}
+
+        if isinstance(value, list):
+            return [self._encode(item) for item in value]
+
+        if isinstance(value, dict):
+            return {"__dict__": [[self._encode(k), self._encode(v)] for k, v in value.items()]}
+
+        if value is None or isinstance(value, (str, int, float)):
+            return value
+
+        raise TypeError(f"Type {type(value).__name__} cannot be cached")
+
+    def _decode(self, value: Any) -> Any:
+        if isinstance(value, list):
+            return [self._decode(item) for item in value]
+
+        if isinstance(value, dict):
+            if "__dict__" in value:
+                return {self._decode(k): self._decode(v) for k, v in value["__dict__"]}
+
+            model = self.models.get(value.get("__model__"))  # type: ignore
+            if model is None:
+                raise ValueError(f"Model {value.get('__model__')} is not registered")
+
+            return model.model_validate(value["value"])
+
+        return value
+
+
+# Versions are never reused, not even after a namespace is evicted or cleared,
+# so a forgotten namespace cannot match the keys of an older version
+_local_versions = itertools.count(1)
+
+
+class LRUCache(ICache):
+    """
+    Thread safe, bounded, in-process cache with least recently used eviction
+    and per entry expiration.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._versions: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def get_versions(self, *namespaces: str) -> Optional[list[int]]:
+        with self._lock:
+            versions: list[int] = []
+
+            for namespace in namespaces:
+                version = self._versions.get(namespace)
+                if version is None:
+                    version = self._versions[namespace] = next(_local_versions)
+
+                self._versions.move_to_end(namespace)
+                versions.append(version)
+
+            while len(self._versions) > self.max_size:
+                self._versions.popitem(last=False)
+
+            return versions
+
+    def bump_version(self, *namespaces: str) -> None:
+        with self._lock:
+            for namespace in namespaces:
+                self._versions.pop(namespace, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class RedisCache(ICache):
+    """
+    Cache shared by every worker, on any server speaking the Redis protocol.
+
+    Values are written as JSON by the codec, which only reads back plain
+    values and its registered models, the ones of values it cannot encode
+    are not cached. Namespace versions are plain counters without expiration, so
+    they survive volatile-* eviction policies while the cached values, which
+    always expire, are evicted.
+
+    Connection errors are logged and counted instead of raised: reads miss,
+    writes are dropped and get_versions returns None so callers bypass the
+    cache.
+    """
+
+    blocking = True
+
+    def __init__(
+        self,
+        client: Optional[redis.Redis] = None,
+        url: str = "redis://localhost:6379/0",
+        prefix: str = "group_service:",
+        ttl: float = 60,
+        codec: Optional[CacheCodec] = None,
+    ):
+        self.client = client if client is not None else redis.Redis.from_url(
+            url, socket_timeout=0.5, socket_connect_timeout=0.5
+        )
+        self.prefix = prefix
+        self.ttl = ttl
+        self.codec = codec if codec is not None else CacheCodec()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def _version_key(self, namespace: str) -> str:
+        return f"{self.prefix}version:{namespace}"
+
+    def _error(self, operation: str, error: redis.RedisError) -> None:
+        self.errors += 1
+        logging.warning(f"Redis cache {operation} failed: {error}")
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            data = self.client.get(self._key(key))
+        except redis.RedisError as e:
+            self._error("get", e)
+            self.misses += 1
+            return None
+
+        if data is None:
+            self.misses += 1
+            return None
+
+        try:
+            value = self.codec.loads(data)  # type: ignore
+        except (ValueError, ValidationError) as e:
+            logging.warning(f"Redis cache value of {key} unreadable: {e}")
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        milliseconds = int((self.ttl if ttl is None else ttl) * 1000)
+
+        try:
+            data = self.codec.dumps(value)
+        except TypeError as e:
+            logging.warning(f"Redis cache value of {key} not cached: {e}")
+            return
+
+        try:
+            self.client.set(self._key(key), data, px=max(milliseconds, 1))
+        except redis.RedisError as e:
+            self._error("set", e)
+
+    def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+
+        try:
+            self.client.delete(*[self._key(key) for key in keys])
+        except redis.RedisError as e:
+            self._error("delete", e)
+
+    def get_versions(self, *namespaces: str) -> Optional[list[int]]:
+        if not namespaces:
+            return []
+
+        try:
+            versions = self.client.mget(
+                [self._version_key(namespace) for namespace in namespaces])
+        except redis.RedisError as e:
+            self._error("get_versions", e)
+            return None
+
+        return [int(version) if version is not None else 0 for version in versions]  # type: ignore
+
+    def bump_version(self, *namespaces: str) -> None:
+        if not namespaces:
+            return
+
+        try:
+            with self.client.pipeline(transaction=False) as pipeline:
+                for namespace in namespaces:
+                    pipeline.incr(self._version_key(namespace))
+                pipeline.execute()
+        except redis.RedisError as e:
+            self._error("bump_version", e)
+
+    def clear(self) -> None:
+        try:
+            keys = list(self.client.scan_iter(match=f"{self.prefix}*"))
+            if keys:
+                self.client.delete(*keys)
+        except redis.RedisError as e:
+            self._error("clear", e)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class TieredCache(ICache):
+    """
+    In-process L1 in front of a shared L2.
+
+    Versions come from L2 and are kept in L1 for version_ttl seconds, so an
+    L1 hit costs no round trip to L2. An invalidation on this worker drops
+    its L1 versions at once, one on another worker changes the keys this
+    one looks up, in L1 as well, within version_ttl. Values found in L2 are
+    copied into L1.
+    """
+
+    def __init__(self, l1: ICache, l2: ICache, version_ttl: float = 1):
+        self.l1 = l1
+        self.l2 = l2
+        self.version_ttl = version_ttl
+        self.blocking = l1.blocking or l2.blocking
+
+    @staticmethod
+    def _version_key(namespace: str) -> str:
+        return f"version:{namespace}"
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.l1.get(key)
+        if value is not None:
+            return value
+
+        value = self.l2.get(key)
+        if value is not None:
+            self.l1.set(key, value)
+
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.l1.set(key, value, ttl)
+        self.l2.set(key, value, ttl)
+
+    def delete(self, *keys: str) -> None:
+        self.l1.delete(*keys)
+        self.l2.delete(*keys)
+
+    def get_versions(self, *namespaces: str) -> Optional[list[int]]:
+        versions = [self.l1.get(self._version_key(namespace)) for namespace in namespaces]
+        missing = [namespace for namespace, version in zip(namespaces, versions) if version is None]
+
+        if missing:
+            loaded = self.l2.get_versions(*missing)
+            if loaded is None:
+                return None
+
+            by_namespace = dict(zip(missing, loaded))
+            for namespace, version in by_namespace.items():
+                self.l1.set(self._version_key(namespace), version, self.version_ttl)
+
+            versions = [by_namespace[namespace] if version is None else version
+                        for namespace, version in zip(namespaces, versions)]
+
+        return versions
+
+    def bump_version(self, *namespaces: str) -> None:
+        self.l2.bump_version(*namespaces)
+        self.l1.delete(*[self._version_key(namespace) for namespace in namespaces])
+
+    def clear(self) -> None:
+        self.l1.clear()
+        self.l2.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {"l1": self.l1.stats(), "l2": self.l2.stats()}
@@ -0,0 +1,108 @@
+from enum import Enum
+import threading
+import time
+from typing import Any
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Thread safe circuit breaker for an outgoing dependency.
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    are rejected without reaching the dependency. Once reset_timeout seconds
+    went by, a single trial call is let through (half open): its success
+    closes the circuit, its failure opens it again.
+
+    Usage:
+        if not breaker.allow():
+            raise ServiceUnavailableError()
+        try:
+            call()
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> CircuitState:
+        if self._state == CircuitState.OPEN and \
+                time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = CircuitState.HALF_OPEN
+            self._trial_in_flight = False
+
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may be made now"""
+        with self._lock:
+            match self._current_state():
+                case CircuitState.CLOSED:
+                    return True
+                case CircuitState.HALF_OPEN if not self._trial_in_flight:
+                    self._trial_in_flight = True
+                    return True
+                case _:
+                    self.rejected += 1
+                    return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CircuitState.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+
+            if self._state == CircuitState.OPEN:
+                return
+
+            if self._state == CircuitState.HALF_OPEN or \
+                    self._failures >= self.failure_threshold:
+                self._state = CircuitState.OPEN
+                self._opened_at = time.monotonic()
+                self.opened += 1
+
+    def record_neutral(self) -> None:
+        """
+        End a call that says nothing about the health of the dependency, like
+        a client error, leaving the failure count as it is
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def reset(self) -> None:
+        self.record_success()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self._current_state().value,
+                "consecutive_failures": self._failures,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
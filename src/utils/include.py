@@ -0,0 +1,30 @@
+from typing import Collection, Optional
+
+from models.errors.errors import ValidationError
+
+
+def split_values(value: Optional[str]) -> list[str]:
+    """Get the values of a comma separated parameter, in order and without duplicates"""
+    if not value:
+        return []
+
+    return list(dict.fromkeys(item.strip() for item in value.split(",") if item.strip()))
+
+
+def parse_include(include: Optional[str], allowed: Collection[str]) -> set[str]:
+    """
+    Get the relations of a comma separated include parameter
+
+    Raises:
+        ValidationError: If a relation is not one of the allowed ones
+    """
+    relations = set(split_values(include))
+    unknown = relations - set(allowed)
+
+    if unknown:
+        raise ValidationError(
+            title="Invalid include",
+            detail=f"Cannot include {', '.join(sorted(unknown))}, allowed: {', '.join(sorted(allowed))}"
+        )
+
+    return relations
@@ -0,0 +1,77 @@
+from collections import deque
+import threading
+from typing import Any, Callable
+
+MetricsProvider = Callable[[], dict[str, Any]]
+
+
+class MetricsRegistry:
+    """
+    Process wide registry of named metrics providers, e.g. cache counters.
+    Providers are called on every snapshot, so they must be cheap.
+    """
+
+    def __init__(self):
+        self._providers: dict[str, MetricsProvider] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, provider: MetricsProvider) -> None:
+        with self._lock:
+            self._providers[name] = provider
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            self._providers.pop(name, None)
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            providers = dict(self._providers)
+
+        return {name: provider() for name, provider in providers.items()}
+
+
+class LatencyMetrics:
+    """
+    Call counters and latency percentiles of an outgoing dependency, computed
+    over a window of the latest samples.
+    """
+
+    def __init__(self, window: int = 1024):
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+
+    def observe(self, seconds: float, failed: bool = False) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self.calls += 1
+            if failed:
+                self.failures += 1
+
+    def retried(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            samples = sorted(self._samples)
+
+            def percentile(p: float) -> float:
+                if not samples:
+                    return 0.0
+                return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+            return {
+                "calls": self.calls,
+                "failures": self.failures,
+                "retries": self.retries,
+                "latency_p50_ms": percentile(0.50) * 1000,
+                "latency_p95_ms": percentile(0.95) * 1000,
+                "latency_p99_ms": percentile(0.99) * 1000,
+                "latency_max_ms": (samples[-1] if samples else 0.0) * 1000,
+            }
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,27 @@
+import base64
+import binascii
+import json
+from typing import Any, Callable, Sequence, TypeVar
+
+from models.errors.errors import ValidationError
+
+K = TypeVar("K")
+
+
+def encode_cursor(key: Sequence[Any]) -> str:
+    """Opaque cursor holding the sort key of the last item of a page, dates as ISO strings"""
+    return base64.urlsafe_b64encode(json.dumps(list(key), default=str).encode()).decode()
+
+
+def decode_cursor(cursor: str, parse: Callable[[list[Any]], K]) -> K:
+    """
+    Get the sort key held by a cursor
+
+    Raises:
+        ValidationError: If the cursor was not built by encode_cursor
+    """
+    try:
+        return parse(json.loads(base64.urlsafe_b64decode(cursor.encode())))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, IndexError):
+        raise ValidationError(title="Invalid cursor",
+                              detail=f"Cursor {cursor} is not valid")